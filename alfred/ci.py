@@ -4,12 +4,13 @@ import alfred
 @alfred.command('ci', help="execute continuous integration process of alfred")
 @alfred.option('-v', '--verbose', is_flag=True)
 def ci(verbose: bool):
-    alfred.invoke_command('alfred_check')
+    commands = ['alfred_check']
     if alfred.is_posix():
-        alfred.invoke_command('lint', verbose=verbose)
+        commands.append(('lint', {'verbose': verbose}))
     else:
         print("linter is not supported on non posix platform as windows")
 
-    alfred.invoke_command('tests', verbose=verbose)
+    commands.append(('tests', {'verbose': verbose}))
+    alfred.invoke_commands(commands)
 
 
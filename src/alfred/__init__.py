@@ -1,7 +1,8 @@
 #!/usr/bin/python
 
-from alfred.decorator import command, option
-from alfred.main import invoke_command, run, sh, env, project_directory, pythonpath, invoke_itself, CMD_RUNNING, execution_directory
+from alfred.decorator import command, option, inputs, outputs
+from alfred.main import invoke_command, invoke_commands, run, run_batched, pipe, sh, env, project_directory, pythonpath, invoke_itself, CMD_RUNNING, execution_directory
+from alfred.main import changed_since, run_async, arun, run_pool
 from alfred.os import is_posix, is_windows, is_linux, is_macos
 from alfred.alfred_prompt import prompt, confirm
 import alfred.shell_completion
@@ -1,6 +1,7 @@
+import functools
 from typing import List, Optional
 
-from alfred import commands, echo
+from alfred import commands, echo, interpreter, parallel
 from alfred.domain.command import AlfredCommand
 from alfred.exceptions import UnknownCommand
 
@@ -22,7 +23,8 @@ def format_cli_arguments(command: AlfredCommand or str or List[str], kwargs: Opt
         if command is None:
             raise UnknownCommand(command)
 
-    cmdline = command.fullname
+    # each value stays a single argument, even when it contains spaces
+    cmdline = command.fullname.split(' ')
     click_command = command.command
 
     if kwargs is not None:
@@ -30,13 +32,37 @@ def format_cli_arguments(command: AlfredCommand or str or List[str], kwargs: Opt
             match_param = False
             for param in click_command.params:
                 if param.name == param_name and param.is_flag is False:
-                    cmdline += f" {param.opts[0]} {param_value}"
+                    cmdline += [param.opts[0], str(param_value)]
                     match_param = True
                 elif param.name == param_name and param.is_flag is True:
-                    cmdline += f" {param.opts[0]}"
+                    if param_value:
+                        cmdline.append(param.opts[0])
                     match_param = True
 
             if match_param is False:
                 echo.warning(f"Unknown parameter {param_name} for command {command.name}")
 
-    return cmdline.split(' ')
+    return cmdline
+
+
+def job(command: AlfredCommand, kwargs: Optional[dict] = None, working_directory: Optional[str] = None, options: Optional[List[str]] = None) -> parallel.Job:
+    """
+    Prepares the invocation of a command in its own alfred process, using the virtual environment of its project.
+    The output of the process is streamed to the job when it runs in ``parallel.run_jobs``.
+
+    >>> lint_job = alfred_command.job(lint_command, {"verbose": True}, project_dir)
+    >>> results = parallel.run_jobs([lint_job])
+
+    ``options`` are alfred options added before the command, like ``--no-deps``.
+    """
+    if options is None:
+        options = []
+
+    args = options + format_cli_arguments(command, kwargs)
+    venv = interpreter.venv_lookup(command.project_dir)
+    click_command = command.command
+    title = f"$ alfred {command.fullname} : {click_command.help}" if click_command.help else f"$ alfred {command.fullname}"
+    return parallel.Job(name=command.fullname,
+                        title=title,
+                        start=functools.partial(interpreter.start_module, 'alfred.cli', venv, args,
+                                                cwd=working_directory))
@@ -1,6 +1,6 @@
 import contextlib
+import contextvars
 import dataclasses
-import threading
 from sys import stdin
 from typing import Optional, List, Callable
 
@@ -18,9 +18,12 @@ class Context:
     driver: str = Driver.prompt_toolkit
     input: List[str] = dataclasses.field(default_factory=list)
 
-module_var = threading.local()
-module_var.ctx = Context()
-module_context = module_var.ctx
+_context_var: contextvars.ContextVar[Context] = contextvars.ContextVar('alfred_prompt_context', default=Context())
+
+
+def _context() -> Context:
+    return _context_var.get()
+
 
 def prompt(label: str, proposals: Optional[List[str]] = None, default: Optional[str] = None, validation_func: Optional[Callable[[str], Optional[str]]] = None) -> str:
     """
@@ -46,7 +49,7 @@ def prompt(label: str, proposals: Optional[List[str]] = None, default: Optional[
     else:
         label = label + ": "
 
-    if module_context.driver == Driver.pytest:
+    if _context().driver == Driver.pytest:
         _input = _emulate_prompt_on_test(default, validation_func)
     elif stdin.isatty():
         _input = prompt_toolkit.prompt(label, completer=AlfredFuzzyCompleter(proposals), validator=FuncValidator(default, validation_func))
@@ -113,7 +116,7 @@ def _check_confirm(proposition: str) -> Optional[str]:
 
 
 def _emulate_prompt_on_test(default, validation_func):
-    _input = module_context.input.pop(0)
+    _input = _context().input.pop(0)
     if _input == "" and default is not None:
         _input = default
 
@@ -149,15 +152,15 @@ def _emulate_prompt_on_non_tty(label: str, default: Optional[str], validation_fu
 
 @contextlib.contextmanager
 def use_test_prompt():
-    previous_driver = module_context.driver
-    module_context.driver = Driver.pytest
-    module_context.input = []
-    yield
-    module_context.driver = previous_driver
+    token = _context_var.set(Context(driver=Driver.pytest))
+    try:
+        yield
+    finally:
+        _context_var.reset(token)
 
 
 def reset_test_prompt():
-    module_context.input = []
+    _context().input.clear()
 
 def send_test_response(response: str):
-    module_context.input.append(response)
+    _context().input.append(response)
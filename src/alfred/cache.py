@@ -0,0 +1,219 @@
+"""
+This module restores the outputs of a command from a local cache instead of running it again.
+
+>>> @alfred.command("dist", cache_inputs=["src/**/*.py", "pyproject.toml"], cache_outputs=["dist/*"])
+>>> def dist():
+>>>     alfred.run("poetry build")
+
+The key of a run covers the content of the inputs, the arguments of the command and the source of its module.
+The outputs are stored by content hash in ``.alfred/cache/objects``, the files of a run and its output are
+recorded in ``.alfred/cache/entries``. The files matching ``cache_outputs`` after a run are recorded as its outputs,
+a restored run removes the other files matching ``cache_outputs``. The least recently used runs are evicted when the cache exceeds
+the size configured with ``cache_size_mb`` in the section ``[alfred.project]`` of the manifest.
+"""
+import functools
+import os
+import shutil
+import stat
+from typing import Callable, Dict, List
+
+import alfred.os
+from alfred import echo, file_index, incremental, logger, manifest, output, state
+from alfred.domain.command import AlfredCommand
+
+CACHE_DIRECTORY = 'cache'
+LOCK_ENTRY = 'cache.lock'
+
+# ioctl that clones the blocks of a file on copy-on-write filesystems (btrfs, xfs)
+FICLONE = 0x40049409
+
+
+def cached(alfred_command: AlfredCommand, func: Callable) -> Callable:
+    """
+    Wraps the function of a command to restore its outputs from the cache when a run with the same key
+    has already been recorded. The output of this run is replayed instead.
+
+    The command is always executed when it does not declare any cache input.
+    """
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        if len(alfred_command.cache_inputs) == 0:
+            return func(*args, **kwargs)
+
+        project_dir = alfred_command.project_dir
+        key = incremental.fingerprint(alfred_command, kwargs, alfred_command.cache_inputs)
+        if restore(project_dir, key, alfred_command.cache_outputs):
+            return None
+
+        logger.debug(f"{alfred_command.fullname} is not in the cache, key={key}")
+        _detach_files(project_dir, file_index.list_files(project_dir, alfred_command.cache_outputs))
+        with output.record() as (stdout, stderr):
+            result = func(*args, **kwargs)
+
+        # an incremental builder keeps the outputs that are still valid, they are part of the run
+        outputs = file_index.list_files(project_dir, alfred_command.cache_outputs)
+        store(project_dir, key, outputs, stdout.getvalue(), stderr.getvalue())
+        return result
+
+    return wrapper
+
+
+def restore(project_dir: str, key: str, patterns: List[str]) -> bool:
+    """
+    Restores the outputs of a run recorded in the cache and replays its output. The files matching the output
+    patterns that the run has not produced are removed, the tree is the one left by the run.
+
+    :return: False if the run is not in the cache
+    """
+    entry_path = _entry_path(project_dir, key)
+    with state.lock(project_dir, LOCK_ENTRY):
+        entry = state.read_json(project_dir, _entry_name(key))
+        if entry is None or not all(os.path.isfile(_object_path(project_dir, digest)) for digest in entry['outputs'].values()):
+            return False
+
+        for path in file_index.list_files(project_dir, patterns):
+            if path not in entry['outputs']:
+                _remove(os.path.join(project_dir, path))
+
+        for path, digest in entry['outputs'].items():
+            _link(_object_path(project_dir, digest), os.path.join(project_dir, path))
+
+        # the modification time of an entry orders the runs from the least recently used
+        os.utime(entry_path)
+
+    echo.message(f"outputs restored from the cache, key={key}")
+    output.stdout_stream().write(entry['stdout'])
+    output.stderr_stream().write(entry['stderr'])
+    return True
+
+
+def store(project_dir: str, key: str, paths: List[str], stdout: str, stderr: str) -> None:
+    """
+    Records the outputs of a run in the cache, then evicts the least recently used runs
+    if the cache exceeds its maximum size.
+
+    :param paths: files matching the output patterns after the run, relative to the project directory
+    """
+    outputs = file_index.digests(project_dir, paths)
+    with state.lock(project_dir, LOCK_ENTRY):
+        for path, digest in outputs.items():
+            object_path = _object_path(project_dir, digest)
+            if not os.path.isfile(object_path):
+                os.makedirs(os.path.dirname(object_path), exist_ok=True)
+                _copy(os.path.join(project_dir, path), object_path)
+                # a restored output may be a hardlink of the object, it must not be modified in place
+                os.chmod(object_path, stat.S_IREAD | stat.S_IRGRP | stat.S_IROTH)
+
+        state.write_json(project_dir, _entry_name(key), {'outputs': outputs, 'stdout': stdout, 'stderr': stderr})
+        evict(project_dir, manifest.lookup_parameter_project('cache_size_mb', project_dir) * 1024 * 1024)
+
+
+def evict(project_dir: str, max_size: int) -> None:
+    """
+    Removes the least recently used runs until the objects they reference fit in ``max_size`` bytes,
+    then removes the objects that are no longer referenced. The cache lock must be held.
+    """
+    entries_dir = os.path.join(state.directory(project_dir), CACHE_DIRECTORY, 'entries')
+    entries = [name[:-len('.json')] for name in os.listdir(entries_dir) if name.endswith('.json')]
+    entries.sort(key=lambda key: os.path.getmtime(_entry_path(project_dir, key)), reverse=True)
+
+    kept: Dict[str, int] = {}
+    for key in entries:
+        entry = state.read_json(project_dir, _entry_name(key)) or {'outputs': {}}
+        digests = set(entry['outputs'].values())
+        sizes = {digest: os.path.getsize(_object_path(project_dir, digest)) for digest in digests - set(kept)
+                 if os.path.isfile(_object_path(project_dir, digest))}
+        if sum(kept.values()) + sum(sizes.values()) > max_size:
+            logger.debug(f"cache: evict the run {key}")
+            os.remove(_entry_path(project_dir, key))
+        else:
+            kept.update(sizes)
+
+    objects_dir = os.path.join(state.directory(project_dir), CACHE_DIRECTORY, 'objects')
+    for directory, _, filenames in os.walk(objects_dir):
+        for filename in filenames:
+            if filename not in kept:
+                _remove(os.path.join(directory, filename))
+
+
+def _link(source: str, destination: str) -> None:
+    """
+    Creates the destination as a hardlink of the source, or as a copy if the filesystem does not support it.
+    The destination is replaced atomically.
+    """
+    # renaming a hardlink over another link of the same file does nothing, the temporary file would remain
+    if os.path.isfile(destination) and os.path.samefile(source, destination):
+        return
+
+    os.makedirs(os.path.dirname(destination), exist_ok=True)
+    tmp_path = f"{destination}.alfred-tmp"
+    if os.path.lexists(tmp_path):
+        os.remove(tmp_path)
+
+    try:
+        os.link(source, tmp_path)
+    except OSError:
+        _copy(source, tmp_path)
+        os.chmod(tmp_path, stat.S_IREAD | stat.S_IWRITE | stat.S_IRGRP | stat.S_IROTH)
+
+    os.replace(tmp_path, destination)
+
+
+def _copy(source: str, destination: str) -> None:
+    """
+    Copies a file through a temporary file. The blocks are cloned instead of copied
+    if the filesystem supports it.
+    """
+    tmp_path = f"{destination}.alfred-tmp"
+    try:
+        with open(source, 'rb') as source_file, open(tmp_path, 'wb') as tmp_file:
+            if not _clone(source_file.fileno(), tmp_file.fileno()):
+                shutil.copyfileobj(source_file, tmp_file)
+
+        os.replace(tmp_path, destination)
+    except BaseException:
+        if os.path.lexists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+def _clone(source_fd: int, destination_fd: int) -> bool:
+    if not alfred.os.is_linux():
+        return False
+
+    import fcntl  # pylint: disable=import-outside-toplevel,import-error
+    try:
+        fcntl.ioctl(destination_fd, FICLONE, source_fd)
+        return True
+    except OSError:
+        return False
+
+
+def _detach_files(project_dir: str, paths: List[str]) -> None:
+    """
+    Replaces the outputs restored as hardlinks by a writable copy before the command
+    modifies them, the objects of the cache are not altered.
+    """
+    for path in paths:
+        full_path = os.path.join(project_dir, path)
+        if os.stat(full_path).st_nlink > 1:
+            _copy(full_path, full_path)
+            os.chmod(full_path, stat.S_IREAD | stat.S_IWRITE | stat.S_IRGRP | stat.S_IROTH)
+
+
+def _remove(path: str) -> None:
+    os.chmod(path, stat.S_IREAD | stat.S_IWRITE)
+    os.remove(path)
+
+
+def _entry_name(key: str) -> str:
+    return f"{CACHE_DIRECTORY}/entries/{key}.json"
+
+
+def _entry_path(project_dir: str, key: str) -> str:
+    return os.path.join(state.directory(project_dir), _entry_name(key))
+
+
+def _object_path(project_dir: str, digest: str) -> str:
+    return os.path.join(state.directory(project_dir), CACHE_DIRECTORY, 'objects', digest[:2], digest)
@@ -6,7 +6,7 @@ from typing import List, Any
 
 import click
 
-from alfred import ctx as alfred_ctx, manifest, echo, self_command, middlewares
+from alfred import ctx as alfred_ctx, manifest, echo, jobserver, lifecycle, output, self_command, middlewares
 from alfred import commands
 from alfred.ctx import Context
 from alfred.decorator import AlfredCommand
@@ -80,7 +80,7 @@ class AlfredCli(click.MultiCommand):
 
         return None
 
-    def invoke(self, ctx: Context) -> Any:
+    def invoke(self, ctx: Context) -> Any:  # pylint: disable=too-many-branches
         """
         The invocation of a command in alfred depends on the location of the targeted alfred command.
 
@@ -102,6 +102,14 @@ class AlfredCli(click.MultiCommand):
 
             display_obsolete_manifests()
 
+            # the programs left running by the command are stopped when alfred exits, after a success or a failure
+            ctx.call_on_close(lifecycle.install_signal_handlers())
+            ctx.call_on_close(lifecycle.cleanup)
+
+            if ctx.params['jobs'] is not None:
+                jobserver.start(ctx.params['jobs'])
+                ctx.call_on_close(jobserver.stop)
+
             if ctx.params['version'] is True:
                 self_command.version()
 
@@ -111,6 +119,12 @@ class AlfredCli(click.MultiCommand):
             if ctx.params['check'] is True:
                 self_command.check()
 
+            if ctx.params['affected'] is not None:
+                self_command.affected(ctx.params['affected'], args, ctx.params['projects'])
+
+            if ctx.params['all_projects'] is True:
+                self_command.all_projects(args, ctx.params['projects'])
+
             if ctx.params['new'] is True:
                 fullarg = ' '.join(args)
                 if fullarg.strip() == "":
@@ -153,9 +167,17 @@ class AlfredCli(click.MultiCommand):
 @click.option("--new", is_flag=True, help="open a wizard to generate a new command")
 @click.option("-c", "--check", is_flag=True, help="check the command integrity")
 @click.option("--completion", is_flag=True, help="display instructions to enable completion for your shell")
+@click.option("--no-deps", is_flag=True, help="execute the command without its dependencies")
+@click.option("--affected", metavar="BASE_REF", help="execute the command only in the projects affected by the changes since BASE_REF")
+@click.option("--all", "all_projects", is_flag=True, help="execute the command in the project and in all its subprojects")
+@click.option("--projects", metavar="GLOB", help="with --all or --affected, execute the command only in the projects whose name or directory matches GLOB")
+@click.option("--jobs", type=int, metavar="N", help="share N job slots between the make, cargo and ninja processes started by the command")
+@click.option("--output", "output_mode", type=click.Choice(output.MODES), default="grouped", help="display the output of concurrent commands by command, by line or on a dashboard")
 @click.pass_context
-def cli(ctx, debug: bool, version: bool, check: bool, completion: bool, new: bool):  # pylint: disable=unused-argument, too-many-arguments
+def cli(ctx, debug: bool, version: bool, check: bool, completion: bool, new: bool, no_deps: bool, affected: str, all_projects: bool, projects: str, jobs: int, output_mode: str):  # pylint: disable=unused-argument, too-many-arguments
     alfred_ctx.flag_set('--debug', debug)
+    alfred_ctx.flag_set('--no-deps', no_deps)
+    alfred_ctx.output_mode_set(output_mode)
     alfred_ctx.env_set('PYTHONUNBUFFERED', '1')
     alfred_ctx.directory_execution_set(os.getcwd())
 
@@ -3,17 +3,20 @@ This module exposes functions that manage the execution context of a command,
 such as the current command, its parents, ...
 """
 import contextlib
+import contextvars
 import copy
 import dataclasses
+import functools
 import os
 import sys
-from typing import List, Optional
+import time
+from typing import List, Optional, Dict, Tuple, Callable, Any
 
 from click.exceptions import Exit
 
 
 from alfred import interpreter, logger, echo, manifest
-from alfred.decorator import AlfredCommand
+from alfred.domain.command import AlfredCommand
 from alfred.exceptions import NotInCommand
 
 class Mode:
@@ -36,19 +39,52 @@ class InvocationContext:
     mode: str = Mode.Unknown
     flag: List[str] = dataclasses.field(default_factory=list)
     test_runner: bool = False
+    dependencies_done: List[str] = dataclasses.field(default_factory=list)
+    output_mode: str = 'grouped'
 
-@dataclasses.dataclass
+@dataclasses.dataclass(frozen=True)
 class Context:
-    commands_stack: List[AlfredCommand] = dataclasses.field(default_factory=list)
+    """
+    The context represents the execution state of the running command.
+
+    It is immutable, each change creates a new context stored in a context variable. A command invoked
+    in a worker thread or in an asyncio task keeps its own stack of commands without disturbing the others.
+    """
+    commands_stack: Tuple[AlfredCommand, ...] = ()
+    env_overlay: Dict[str, str] = dataclasses.field(default_factory=dict)
+    deadline: Optional[float] = None
+    process_limits: Dict[str, Any] = dataclasses.field(default_factory=dict)
 
     @property
     def running(self) -> bool:
         return len(self.commands_stack) > 0
 
 
+_invocation_context_var: contextvars.ContextVar[InvocationContext] = contextvars.ContextVar('alfred_invocation_context', default=InvocationContext())
+_context_var: contextvars.ContextVar[Context] = contextvars.ContextVar('alfred_context', default=Context())
+
+
+def _invocation_context() -> InvocationContext:
+    return _invocation_context_var.get()
+
+
+def _context() -> Context:
+    return _context_var.get()
+
+
+def bind(func: Callable[..., Any]) -> Callable[..., Any]:
+    """
+    Binds a function to a copy of the current execution context. The function sees the running command
+    and the invocation context when it is executed in a worker thread.
+
+    >>> with ThreadPoolExecutor() as executor:
+    >>>     future = executor.submit(ctx.bind(alfred.run), "pytest", cwd="tests")
 
-_invocation_context = InvocationContext()
-_context = Context()
+    ``alfred.invoke_command`` changes the working directory of the whole process, it is not safe to call it
+    from several threads. ``alfred.invoke_commands`` runs commands in parallel in their own process.
+    """
+    context = contextvars.copy_context()
+    return functools.partial(context.run, func)
 
 def assert_in_command(instruction: str) -> None:
     """
@@ -57,7 +93,7 @@ def assert_in_command(instruction: str) -> None:
     >>> ctx.assert_in_command("alfred.pythonpath")
     :return:
     """
-    if _context.running is False:
+    if _context().running is False:
         raise NotInCommand(instruction)
 
 
@@ -67,32 +103,34 @@ def current_command() -> Optional[AlfredCommand]:
 
     :return:
     """
-    return _context.commands_stack[0] if _context.running else None
+    return _context().commands_stack[0] if _context().running else None
 
 
 def command_run() -> bool:
-    return _invocation_context.mode == Mode.RunCommand
+    return _invocation_context().mode == Mode.RunCommand
 
 def cli_args_set(args: List[str]) -> None:
-    _invocation_context.args = copy.copy(args)
+    _invocation_context().args = copy.copy(args)
 
 
 def cli_args() -> Optional[List[str]]:
-    return _invocation_context.args
+    return _invocation_context().args
 
 def directory_execution_set(directory: str) -> None:
-    _invocation_context.directory_execution = directory
+    _invocation_context().directory_execution = directory
 
 
 def directory_execution() -> Optional[str]:
-    return _invocation_context.directory_execution
+    return _invocation_context().directory_execution
 
 def flag_set(flag: str, enable: bool) -> None:
     """
     configure flag to forward to interpreter when invoking a command
     """
-    if enable and flag not in _invocation_context.flag:
-        _invocation_context.flag.append(flag)
+    if enable and flag not in _invocation_context().flag:
+        _invocation_context().flag.append(flag)
+    elif not enable and flag in _invocation_context().flag:
+        _invocation_context().flag.remove(flag)
 
 def invocation_options() -> List[str]:
     """
@@ -100,16 +138,49 @@ def invocation_options() -> List[str]:
 
     Options management is missing because Alfred is not using it at the moment.
     """
-    return _invocation_context.flag
+    return _invocation_context().flag
+
+
+def dependencies_skipped() -> bool:
+    """
+    Returns whether the dependencies of the commands are ignored, with ``alfred --no-deps``.
+    """
+    return '--no-deps' in _invocation_context().flag
+
+
+def dependency_done(command_fullname: str) -> bool:
+    """
+    Checks if a dependency has already been executed during this invocation.
+    """
+    return command_fullname in _invocation_context().dependencies_done
+
+
+def dependency_done_set(command_fullname: str) -> None:
+    """
+    Records that a dependency has been executed. It won't be executed again during this invocation.
+    """
+    if command_fullname not in _invocation_context().dependencies_done:
+        _invocation_context().dependencies_done.append(command_fullname)
+
+
+def output_mode() -> str:
+    """
+    Returns how the output of the jobs running at the same time is displayed, see ``alfred.output``.
+    """
+    return _invocation_context().output_mode
+
+
+def output_mode_set(mode: str) -> None:
+    _invocation_context().output_mode = mode
 
 
 def mode_unknown() -> str:
-    return _invocation_context.mode == Mode.Unknown
+    return _invocation_context().mode == Mode.Unknown
 
 
 def mode_set(mode: str) -> None:
     logger.debug(f"mode set '{mode}'")
-    _invocation_context.mode = mode
+    _invocation_context().mode = mode
 
 
 def invoke_through_external_venv(args: List[str], pty: bool = False) -> None:
@@ -137,7 +208,7 @@ def root_command() -> Optional[AlfredCommand]:
 
     :return:
     """
-    return _context.commands_stack[-1] if _context.running else None
+    return _context().commands_stack[-1] if _context().running else None
 
 
 def should_use_external_venv() -> bool:
@@ -166,8 +237,8 @@ def stack_root_command(command: AlfredCommand) -> None:
 
     >>> ctx.stack_root_command(command)
     """
-    # assert len(_context.commands_stack) == 0, f"Commands are already running: {_context.commands_stack}"
-    _context.commands_stack = [command]
+    # assert len(_context().commands_stack) == 0, f"Commands are already running: {_context().commands_stack}"
+    _context_var.set(dataclasses.replace(_context(), commands_stack=(command,)))
 
 
 @contextlib.contextmanager
@@ -178,9 +249,11 @@ def stack_subcommand(command: AlfredCommand) -> None:
     >>> with ctx.stack_subcommand(command):
     >>>     pass
     """
-    _context.commands_stack.insert(0, command)
-    yield
-    _context.commands_stack.pop(0)
+    token = _context_var.set(dataclasses.replace(_context(), commands_stack=(command,) + _context().commands_stack))
+    try:
+        yield
+    finally:
+        _context_var.reset(token)
 
 
 @contextlib.contextmanager
@@ -192,16 +265,13 @@ def use_new_context() -> None:
     >>> with ctx.use_new_context():
     >>>     pass
     """
-    global _context, _invocation_context # pylint: disable=global-statement
-    previous_context = _context
-    previous_invocation_context = _invocation_context
+    context_token = _context_var.set(Context())
+    invocation_context_token = _invocation_context_var.set(InvocationContext())
     try:
-        _context = Context()
-        _invocation_context = InvocationContext()
         yield
     finally:
-        _context = previous_context
-        _invocation_context = previous_invocation_context
+        _context_var.reset(context_token)
+        _invocation_context_var.reset(invocation_context_token)
 
 
 def env_pythonpath(project_dir: Optional[str] = None) -> str:
@@ -230,10 +300,95 @@ def env_path(project_dir: Optional[str] = None):
         project_dir = project_directory()
 
     path_extensions = manifest.lookup_parameter_project('path_extends', project_dir)
-    path = os.environ.get('PATH', '')
+    path = env_overlay().get('PATH', os.environ.get('PATH', ''))
     path = _include_path(path, path_extensions, project_dir)
     return path
 
+def env_overlay() -> Dict[str, str]:
+    """
+    Returns the environment variables that alfred applies on top of ``os.environ``
+    to the programs started by the running command.
+
+    >>> overlay = ctx.env_overlay()
+    >>> child_env = {**os.environ, **overlay}
+    """
+    return dict(_context().env_overlay)
+
+
+@contextlib.contextmanager
+def use_env_overlay(**kwargs) -> None:
+    """
+    Adds environment variables to the overlay of the running command without modifying ``os.environ``.
+    The overlay is restored at the end of the context.
+
+    >>> with ctx.use_env_overlay(PATH="/opt/bin:/usr/bin"):
+    >>>     process.run("hello")
+    """
+    token = _context_var.set(dataclasses.replace(_context(), env_overlay={**_context().env_overlay, **kwargs}))
+    try:
+        yield
+    finally:
+        _context_var.reset(token)
+
+
+@contextlib.contextmanager
+def use_timeout(timeout: Optional[float]) -> None:
+    """
+    Limits the time left to the programs started in the context. A timeout longer than the one
+    of the parent command is ignored.
+
+    >>> with ctx.use_timeout(600):
+    >>>     process.run("pytest")
+    """
+    if timeout is None:
+        yield
+        return
+
+    deadline = time.monotonic() + timeout
+    if _context().deadline is not None:
+        deadline = min(deadline, _context().deadline)
+
+    token = _context_var.set(dataclasses.replace(_context(), deadline=deadline))
+    try:
+        yield
+    finally:
+        _context_var.reset(token)
+
+
+@contextlib.contextmanager
+def use_process_limits(**limits: Any) -> None:
+    """
+    Applies resource limits and a priority to the programs started in the context (see ``process.start``).
+    The limits set to None are ignored.
+
+    >>> with ctx.use_process_limits(nice=10, rlimit_as=4 * 1024 ** 3):
+    >>>     process.run("pytest")
+    """
+    limits = {key: value for key, value in limits.items() if value is not None}
+    token = _context_var.set(dataclasses.replace(_context(), process_limits={**_context().process_limits, **limits}))
+    try:
+        yield
+    finally:
+        _context_var.reset(token)
+
+
+def process_limits() -> Dict[str, Any]:
+    """
+    Returns the resource limits and the priority of the programs started by the running command.
+    """
+    return dict(_context().process_limits)
+
+
+def remaining_time() -> Optional[float]:
+    """
+    Returns the time left in seconds before the timeout of the running command, None if it has no timeout.
+    """
+    if _context().deadline is None:
+        return None
+
+    return max(0.0, _context().deadline - time.monotonic())
+
+
 def project_directory() -> str:
     """
     Returns the project directory of alfred relative to the current command.
@@ -273,14 +428,14 @@ def test_runner_use(enabled: bool):
     """
     Active this flag to indicate that the test runner is being used.
     """
-    _invocation_context.test_runner = enabled
+    _invocation_context().test_runner = enabled
 
 
 def test_runner_used() -> bool:
     """
     Returns whether the test runner is being used.
     """
-    return _invocation_context.test_runner
+    return _invocation_context().test_runner
 
 
 def env_set(env_var: str, value: str) -> None:
@@ -1,12 +1,16 @@
-from typing import Any, Optional
+from typing import Any, Optional, List, Union
 
 import click
 
 
-from alfred.domain.command import AlfredCommand, alfred_wrapper
+from alfred import cache, incremental
+from alfred.domain.command import AlfredCommand, alfred_wrapper, coroutine_wrapper
 
 
-def command(name: str, help: str = '', **attrs: Any):  # pylint: disable=redefined-builtin
+def command(name: str, help: str = '', depends: Optional[List[Union[str, List[str]]]] = None,  # pylint: disable=redefined-builtin,too-many-arguments
+            cache_inputs: Optional[List[str]] = None, cache_outputs: Optional[List[str]] = None,
+            timeout: Optional[float] = None, nice: Optional[int] = None, rlimit_as: Optional[int] = None,
+            rlimit_cpu: Optional[int] = None, cpu_affinity: Optional[List[int]] = None, **attrs: Any):
     """
     Declare a command.
 
@@ -23,13 +27,68 @@ def command(name: str, help: str = '', **attrs: Any):  # pylint: disable=redefin
     >>> def hello_world():
     >>>     print("hello world")
 
+    ``depends`` declares the commands to execute before this one. Alfred executes them once per invocation,
+    the independent ones run concurrently. ``alfred --no-deps dist`` executes the command without its dependencies.
+
+    >>> @alfred.command("dist", depends=["lint", "tests"])
+    >>> def dist():
+    >>>     alfred.run("poetry build")
+
+    ``cache_inputs`` and ``cache_outputs`` restore the outputs of the command from a local cache when it has already been
+    executed with the same inputs, the same arguments and the same source. The output of this run is displayed instead.
+    Switching from a branch to another does not build the package again.
+
+    >>> @alfred.command("dist", cache_inputs=["src/**/*.py", "pyproject.toml"], cache_outputs=["dist/*"])
+    >>> def dist():
+    >>>     alfred.run("poetry build")
+
+    ``timeout`` limits the duration of the programs the command starts, in seconds. When it expires, the running program
+    and its children receive SIGTERM, then SIGKILL after a delay, and the command stops with the exit code 124.
+
+    >>> @alfred.command("tests:integration", timeout=1800)
+    >>> def tests_integration():
+    >>>     alfred.run("pytest tests/integrations")
+
+    ``nice``, ``rlimit_as``, ``rlimit_cpu`` and ``cpu_affinity`` set the priority, the maximum memory in bytes, the maximum
+    CPU time in seconds and the CPUs of the programs the command starts. They are applied in the program before it executes,
+    its descendants inherit them.
+
+    >>> @alfred.command("benchmark", nice=10, rlimit_as=4 * 1024 ** 3, cpu_affinity=[2, 3])
+    >>> def benchmark():
+    >>>     alfred.run("pytest benchmarks")
+
+    A command declared with ``async def`` runs on an event loop. It can start many programs at the same time
+    with ``alfred.arun``.
+
+    >>> @alfred.command("ci")
+    >>> async def ci():
+    >>>     await asyncio.gather(alfred.arun("pytest tests/units"), alfred.arun("mypy src"), alfred.arun("pylint src"))
+
     :param name: command name
     :param help: inline documentation
+    :param depends: commands to execute before this one, a command of a subproject is given as a list (``["product1", "build"]``)
+    :param cache_inputs: glob patterns of the files that make the key of the cache, relative to the project
+    :param cache_outputs: glob patterns of the files to store in the cache, relative to the project
+    :param timeout: maximum duration in seconds of the programs started by the command
+    :param nice: priority of the programs started by the command, from -20 (highest) to 19 (lowest)
+    :param rlimit_as: maximum size in bytes of the address space of each program
+    :param rlimit_cpu: maximum CPU time in seconds of each program
+    :param cpu_affinity: CPUs on which the programs run, linux only
     :param attrs: allow to use any click supported attributes (see https://click.palletsprojects.com/en/latest/api/), support is not garanteed in long term
     """
 
     def alfred_decorated(func):
         alfred_command = AlfredCommand()
+        alfred_command.depends = list(depends) if depends is not None else []
+        alfred_command.inputs = getattr(func, '__alfred_inputs__', [])
+        alfred_command.outputs = getattr(func, '__alfred_outputs__', [])
+        alfred_command.cache_inputs = list(cache_inputs) if cache_inputs is not None else []
+        alfred_command.cache_outputs = list(cache_outputs) if cache_outputs is not None else []
+        alfred_command.timeout = timeout
+        alfred_command.process_limits = {'nice': nice, 'rlimit_as': rlimit_as, 'rlimit_cpu': rlimit_cpu, 'cpu_affinity': cpu_affinity}
+        func = coroutine_wrapper(func)
+        func = cache.cached(alfred_command, func)
+        func = incremental.skip_unchanged(alfred_command, func)
         func = alfred_wrapper(alfred_command, func)
 
         click_decorator = click.command(name, help=help, **attrs)
@@ -71,3 +130,47 @@ def option(option: str, option_alias: Optional[str] = None, help: str = '', defa
         return decorated
 
     return option_decorated
+
+
+def inputs(*patterns: str):
+    """
+    Declare the files read by a command as glob patterns relative to the project, ``**`` matches any subdirectory.
+
+    Alfred skips the command when its inputs, its arguments and the source of its module have not changed
+    since its last successful run. The output of the last run is displayed instead.
+
+    >>> @alfred.command("dist")
+    >>> @alfred.inputs("src/**/*.py", "pyproject.toml")
+    >>> @alfred.outputs("dist/*")
+    >>> def dist():
+    >>>     alfred.run("poetry build")
+
+    :param patterns: glob patterns of the files read by the command
+    """
+    def inputs_decorated(func):
+        if isinstance(func, AlfredCommand):
+            func.inputs = func.inputs + list(patterns)
+        else:
+            func.__alfred_inputs__ = getattr(func, '__alfred_inputs__', []) + list(patterns)
+        return func
+
+    return inputs_decorated
+
+
+def outputs(*patterns: str):
+    """
+    Declare the files produced by a command as glob patterns relative to the project.
+
+    A command whose outputs have been modified or deleted since its last run is executed again
+    even if its inputs have not changed.
+
+    :param patterns: glob patterns of the files produced by the command
+    """
+    def outputs_decorated(func):
+        if isinstance(func, AlfredCommand):
+            func.outputs = func.outputs + list(patterns)
+        else:
+            func.__alfred_outputs__ = getattr(func, '__alfred_outputs__', []) + list(patterns)
+        return func
+
+    return outputs_decorated
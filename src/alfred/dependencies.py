@@ -0,0 +1,101 @@
+"""
+This module executes the dependencies declared on the commands with ``@alfred.command("dist", depends=["lint", "tests"])``.
+
+The dependencies of a command form a graph built from the commands of the project. Alfred executes each
+command of the graph once per invocation, the independent branches run concurrently.
+"""
+from typing import Dict, List, Optional, Tuple
+
+import click
+from click.exceptions import Exit
+
+from alfred import commands, ctx, echo, parallel, project, alfred_command, logger
+from alfred.domain.command import AlfredCommand
+
+
+def graph(command: AlfredCommand) -> Tuple[Dict[str, AlfredCommand], Dict[str, List[str]]]:
+    """
+    Builds the graph of the dependencies of a command. The command itself is not part of the graph.
+
+    It returns the commands of the graph by fullname and the dependencies of each command.
+
+    >>> nodes, edges = dependencies.graph(dist_command)
+    >>> # edges == {"dist": ["lint", "tests"], "lint": [], "tests": []}
+
+    It raises a ``click.ClickException`` if a dependency does not exist or if the graph contains a cycle.
+    """
+    nodes: Dict[str, AlfredCommand] = {}
+    edges: Dict[str, List[str]] = {}
+    _visit(command, nodes, edges, [])
+    del nodes[command.fullname]
+    return nodes, edges
+
+
+def run_dependencies(command: AlfredCommand, max_workers: Optional[int] = None) -> None:
+    """
+    Executes the dependencies of a command before its execution. A dependency already executed during this invocation
+    is not executed again.
+
+    Each dependency runs in its own alfred process with the option ``--no-deps``, its own dependencies being
+    already satisfied by the graph.
+
+    >>> dependencies.run_dependencies(dist_command)
+    """
+    if len(command.depends) == 0 or ctx.dependencies_skipped():
+        return
+
+    nodes, edges = graph(command)
+    jobs = [alfred_command.job(node, working_directory=command.project_dir, options=['--no-deps'])
+            for fullname, node in nodes.items() if not ctx.dependency_done(fullname)]
+    logger.debug(f"dependencies of {command.fullname}: {[job.name for job in jobs]}")
+
+    results = parallel.run_graph(jobs, edges, max_workers=max_workers)
+    for result in results:
+        if result.succeeded:
+            ctx.dependency_done_set(result.name)
+
+    failure = parallel.first_failure(results)
+    if failure is not None:
+        raise Exit(failure.return_code)
+
+
+def check_integrity(project_dir: Optional[str] = None) -> bool:
+    """
+    Verifies that the dependencies of the commands exist and don't contain cycle.
+
+    :return: True if no errors were detected, False otherwise.
+    """
+    has_error = False
+    for _project in project.list_all(project_dir):
+        for command in commands.list_all(_project.directory, show_error=False):
+            if len(command.depends) == 0:
+                continue
+
+            try:
+                graph(command)
+            except click.ClickException as exception:
+                echo.error(f"project '{_project.name}': {exception.message}")
+                has_error = True
+
+    return not has_error
+
+
+def _visit(command: AlfredCommand, nodes: Dict[str, AlfredCommand], edges: Dict[str, List[str]], path: List[str]) -> None:
+    fullname = command.fullname
+    if fullname in path:
+        cycle = ' -> '.join(path[path.index(fullname):] + [fullname])
+        raise click.ClickException(f"dependency cycle detected: {cycle}")
+
+    if fullname in nodes:
+        return
+
+    edges[fullname] = []
+    for dependency in command.depends:
+        dependency_command = commands.lookup(dependency, command.project_dir)
+        if dependency_command is None:
+            raise click.ClickException(f"dependency {dependency} of command {fullname} does not exists.")
+
+        edges[fullname].append(dependency_command.fullname)
+        _visit(dependency_command, nodes, edges, path + [fullname])
+
+    nodes[fullname] = command
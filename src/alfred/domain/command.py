@@ -1,12 +1,16 @@
+import asyncio
 import contextlib
+import contextvars
 import functools
+import inspect
 import os
-from typing import Optional, Callable, Generator
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional, Callable, Generator, List, Union, Dict, Any
 
 from click import BaseCommand
 
 
-class AlfredCommand:
+class AlfredCommand:  # pylint: disable=too-many-instance-attributes
 
     def __init__(self, _command: Optional[BaseCommand] = None):
         self.command: Optional[BaseCommand] = _command
@@ -18,6 +22,13 @@ class AlfredCommand:
         self.module: Optional[str] = None
         self.path: Optional[str] = None
         self.project_dir: Optional[str] = None # alfred project directory where the command is attached
+        self.depends: List[Union[str, List[str]]] = [] # commands to execute before this one
+        self.inputs: List[str] = [] # glob patterns of the files read by the command
+        self.outputs: List[str] = [] # glob patterns of the files produced by the command
+        self.cache_inputs: List[str] = [] # glob patterns of the files that make the key of the cache
+        self.cache_outputs: List[str] = [] # glob patterns of the files restored from the cache
+        self.timeout: Optional[float] = None # maximum duration in seconds of the programs started by the command
+        self.process_limits: Dict[str, Any] = {} # priority and resource limits of the programs started by the command
 
         self._context_middleware: Optional[Callable[[], Generator[None, None, None]]] = None
 
@@ -94,3 +105,30 @@ def alfred_wrapper(alfred_command: AlfredCommand, func: Callable) -> Callable:
                 os.chdir(previous_directory)
 
     return wrapper
+
+
+def coroutine_wrapper(func: Callable) -> Callable:
+    """
+    runs the coroutine of a command declared with ``async def`` on an event loop, the other functions
+    are returned as is.
+    """
+    if not inspect.iscoroutinefunction(func):
+        return func
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        return _run_coroutine(func(*args, **kwargs))
+
+    return wrapper
+
+
+def _run_coroutine(coroutine):
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        return asyncio.run(coroutine)
+
+    # an async command invoked by another one gets its own loop, the loop of the caller waits for its end
+    context = contextvars.copy_context()
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        return executor.submit(context.run, asyncio.run, coroutine).result()
@@ -0,0 +1,190 @@
+"""
+This module keeps an index of the files of a project, like the index of git. For each file, the index records
+its modification time, its size, its inode and the hash of its content.
+
+A file whose modification time, size and inode have not changed since it was indexed is not hashed again.
+The other files are hashed concurrently in a pool of threads.
+
+>>> digests = file_index.files_digest(project_dir, ["src/**/*.py"])
+>>> # {"src/alfred/__init__.py": "5d41402abc4b2a76b9719d911017c592...", ...}
+
+The index is stored in ``.alfred/files.json``, the alfred processes of a project update it one at a time.
+"""
+import contextlib
+import contextvars
+import functools
+import glob
+import hashlib
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import ContextManager, Dict, List, Optional, Tuple
+
+from alfred import lib, logger, state
+
+INDEX_ENTRY = 'files.json'
+LOCK_ENTRY = 'files.lock'
+CHUNK_SIZE = 1024 * 1024
+
+# A file modified less than 2 seconds before being hashed may be modified again
+# without changing its modification time on filesystems with a coarse resolution.
+# Its hash is not recorded in the index to detect this modification.
+RACY_DELAY_NS = 2 * 10 ** 9
+
+_pending_snapshots_var: contextvars.ContextVar[Optional[Dict[Tuple[str, str], Dict[str, str]]]] = contextvars.ContextVar('alfred_pending_snapshots', default=None)
+
+
+def files_digest(project_dir: str, patterns: List[str]) -> Dict[str, str]:
+    """
+    Computes the content hash of the files matching glob patterns relative to the project directory,
+    ``**`` matches any subdirectory.
+
+    :return: the hash of the files by path relative to the project directory
+    """
+    return digests(project_dir, list_files(project_dir, patterns))
+
+
+def list_files(project_dir: str, patterns: List[str]) -> List[str]:
+    """
+    Lists the files matching glob patterns relative to the project directory.
+
+    >>> paths = file_index.list_files(project_dir, ["src/**/*.py", "pyproject.toml"])
+    """
+    paths = set()
+    for pattern in patterns:
+        for path in glob.glob(os.path.join(project_dir, pattern), recursive=True):
+            if os.path.isfile(path):
+                paths.add(os.path.relpath(path, project_dir))
+
+    return sorted(paths)
+
+
+def digests(project_dir: str, paths: List[str]) -> Dict[str, str]:
+    """
+    Computes the content hash of files given relative to the project directory. The hash of a file whose
+    stat data are unchanged is read from the index. A file removed meanwhile is left out of the result.
+
+    >>> digests = file_index.digests(project_dir, ["pyproject.toml", "src/alfred/__init__.py"])
+    """
+    index = state.read_json(project_dir, INDEX_ENTRY) or {}
+    stats = {}
+    for path in paths:
+        try:
+            stats[path] = os.stat(os.path.join(project_dir, path))
+        except FileNotFoundError:
+            # the file has been removed since it was listed
+            continue
+
+    result = {}
+    to_hash = []
+    for path, stat in stats.items():
+        entry = index.get(path)
+        if entry is not None and entry[:3] == [stat.st_mtime_ns, stat.st_size, stat.st_ino]:
+            result[path] = entry[3]
+        else:
+            to_hash.append(path)
+
+    if len(to_hash) > 0:
+        logger.debug(f"file index: hash {len(to_hash)} files of {len(paths)}")
+        with ThreadPoolExecutor() as executor:
+            hashed = executor.map(_file_digest_if_exists, [os.path.join(project_dir, path) for path in to_hash])
+            result.update((path, digest) for path, digest in zip(to_hash, hashed) if digest is not None)
+
+        _update_index(project_dir, {path: stats[path] for path in to_hash if path in result}, result)
+
+    return {path: result[path] for path in paths if path in result}
+
+
+def changed_since(project_dir: str, key: str, patterns: List[str]) -> List[str]:
+    """
+    Lists the files matching glob patterns that have been created or modified since the last snapshot
+    recorded under a key. All the files are returned when no snapshot exists.
+
+    The new snapshot is recorded once the running command succeeds, a command that fails
+    gets the same files on its next run.
+
+    >>> paths = file_index.changed_since(project_dir, "lint", ["src/**/*.py"])
+    """
+    previous = snapshot(project_dir, key)
+    current = files_digest(project_dir, patterns)
+    pending = _pending_snapshots_var.get()
+    if pending is not None:
+        pending[(project_dir, key)] = current
+    else:
+        snapshot_set(project_dir, key, current)
+
+    return [path for path, digest in current.items() if previous.get(path) != digest]
+
+
+@contextlib.contextmanager
+def record_snapshots_on_success() -> ContextManager[None]:
+    """
+    Delays the recording of the snapshots taken by ``changed_since`` until the end of the block.
+    They are discarded if the block raises an exception.
+
+    >>> with file_index.record_snapshots_on_success():
+    >>>     paths = file_index.changed_since(project_dir, "lint", ["src/**/*.py"])
+    """
+    pending: Dict[Tuple[str, str], Dict[str, str]] = {}
+    token = _pending_snapshots_var.set(pending)
+    try:
+        yield
+    finally:
+        _pending_snapshots_var.reset(token)
+
+    for (project_dir, key), files in pending.items():
+        snapshot_set(project_dir, key, files)
+
+
+def snapshot(project_dir: str, key: str) -> Dict[str, str]:
+    """
+    Reads the hash of the files recorded under a key with ``snapshot_set``. It returns an empty
+    snapshot if nothing has been recorded yet.
+
+    >>> previous = file_index.snapshot(project_dir, "lint")
+    """
+    return state.read_json(project_dir, _snapshot_entry(key)) or {}
+
+
+def snapshot_set(project_dir: str, key: str, files: Dict[str, str]) -> None:
+    """
+    Records the hash of files under a key.
+
+    >>> file_index.snapshot_set(project_dir, "lint", file_index.files_digest(project_dir, ["src/**/*.py"]))
+    """
+    state.write_json(project_dir, _snapshot_entry(key), files)
+
+
+def file_digest(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, 'rb') as filep:
+        for chunk in iter(functools.partial(filep.read, CHUNK_SIZE), b''):
+            digest.update(chunk)
+
+    return digest.hexdigest()
+
+
+def _snapshot_entry(key: str) -> str:
+    return f"snapshots/{lib.slugify(key)}.json"
+
+
+def _file_digest_if_exists(path: str) -> Optional[str]:
+    try:
+        return file_digest(path)
+    except FileNotFoundError:
+        # the file has been removed since it was listed
+        return None
+
+
+def _update_index(project_dir: str, stats: Dict[str, os.stat_result], hashes: Dict[str, str]) -> None:
+    now_ns = time.time_ns()
+    with state.lock(project_dir, LOCK_ENTRY):
+        # the index is read again to keep the entries written by a concurrent alfred process
+        index: Dict[str, Optional[list]] = state.read_json(project_dir, INDEX_ENTRY) or {}
+        for path, stat in stats.items():
+            if now_ns - stat.st_mtime_ns > RACY_DELAY_NS:
+                index[path] = [stat.st_mtime_ns, stat.st_size, stat.st_ino, hashes[path]]
+            else:
+                index.pop(path, None)
+
+        state.write_json(project_dir, INDEX_ENTRY, index)
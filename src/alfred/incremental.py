@@ -0,0 +1,93 @@
+"""
+This module skips a command when nothing has changed since its last successful run. A command declares
+the files it reads with ``@alfred.inputs`` and the files it produces with ``@alfred.outputs``.
+
+>>> @alfred.command("dist")
+>>> @alfred.inputs("src/**/*.py", "pyproject.toml")
+>>> @alfred.outputs("dist/*")
+>>> def dist():
+>>>     alfred.run("poetry build")
+
+The fingerprint of a run covers the content of the inputs, the arguments of the command and the source
+of its module. The fingerprint and the output of the last successful run are recorded in ``.alfred/incremental``.
+The output is the one of the programs started by the command, see ``output.record``.
+"""
+import functools
+import hashlib
+import json
+import os
+from typing import Callable, List, Optional
+
+from alfred import echo, file_index, lib, logger, output, state
+from alfred.domain.command import AlfredCommand
+
+
+def skip_unchanged(alfred_command: AlfredCommand, func: Callable) -> Callable:
+    """
+    Wraps the function of a command to skip it when its fingerprint matches the last successful run.
+    The output of the last run is replayed instead.
+
+    The command is always executed when it does not declare any input.
+    """
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        if len(alfred_command.inputs) == 0:
+            return func(*args, **kwargs)
+
+        entry = f"incremental/{lib.slugify(alfred_command.fullname)}.json"
+        current = fingerprint(alfred_command, kwargs)
+        last_run = state.read_json(alfred_command.project_dir, entry)
+        if _is_up_to_date(alfred_command, current, last_run):
+            echo.message(f"{alfred_command.fullname} is up to date, output of the last run:")
+            output.stdout_stream().write(last_run['stdout'])
+            output.stderr_stream().write(last_run['stderr'])
+            return None
+
+        logger.debug(f"{alfred_command.fullname} has changed since the last run, fingerprint={current}")
+        with output.record() as (stdout, stderr):
+            result = func(*args, **kwargs)
+
+        state.write_json(alfred_command.project_dir, entry, {
+            'fingerprint': current,
+            'outputs': file_index.files_digest(alfred_command.project_dir, alfred_command.outputs),
+            'stdout': stdout.getvalue(),
+            'stderr': stderr.getvalue(),
+        })
+        return result
+
+    return wrapper
+
+
+def fingerprint(alfred_command: AlfredCommand, kwargs: dict, inputs: Optional[List[str]] = None) -> str:
+    """
+    Computes the fingerprint of a run of the command from its inputs, its arguments and the source of its module.
+
+    The globs of the inputs are relative to the project directory, their hash is read from the index of the files.
+    The inputs declared with ``@alfred.inputs`` are used by default.
+
+    >>> current = incremental.fingerprint(alfred_command, {"verbose": True})
+    """
+    if inputs is None:
+        inputs = alfred_command.inputs
+
+    digest = hashlib.sha256()
+    if alfred_command.path is not None and os.path.isfile(alfred_command.path):
+        digest.update(file_index.file_digest(alfred_command.path).encode('utf-8'))
+
+    digest.update(json.dumps(kwargs, sort_keys=True, default=str).encode('utf-8'))
+    for path, path_digest in file_index.files_digest(alfred_command.project_dir, inputs).items():
+        digest.update(f"{path}:{path_digest}\n".encode('utf-8'))
+
+    return digest.hexdigest()
+
+
+def _is_up_to_date(alfred_command: AlfredCommand, current: str, last_run: Optional[dict]) -> bool:
+    if last_run is None or last_run.get('fingerprint') != current:
+        return False
+
+    outputs = file_index.files_digest(alfred_command.project_dir, alfred_command.outputs)
+    if len(alfred_command.outputs) > 0 and len(outputs) == 0:
+        return False
+
+    return outputs == last_run.get('outputs')
@@ -1,12 +1,12 @@
+import contextlib
 import os
 import subprocess
 import sys
-from typing import Optional, List, Tuple, Union
+from typing import Optional, List, Tuple, Union, Dict, Any
 
 import alfred.os
-from alfred import manifest, ctx, process, venv_plugins
+from alfred import manifest, ctx, jobserver, lifecycle, process, venv_plugins
 from alfred.exceptions import AlfredException
-from alfred.lib import override_envs
 from alfred.logger import logger
 
 
@@ -31,37 +31,58 @@ def run_module(module: str, venv: str, args: List[str]) -> Tuple[int, str, str]:
 
     >>> interpreter.run_module(module='alfred.cli', venv=venv, args=['hello_world'])
     """
-    global_path = os.getenv('PATH', '')
-    global_python_path = os.getenv('PYTHONPATH', '')
-    python_executable_path = venv_python_path(venv)
-    bin_path = venv_bin_path(venv)
-    global_path = format_path_variable(global_path, bin_path)
-    python_path = format_path_variable(global_python_path, bin_path)
+    process_result = start_module(module, venv, args).wait()
+    return process_result.return_code, process_result.stdout, process_result.stderr
 
-    if not os.path.isfile(python_executable_path):
-        raise AlfredException(f"python interpreter not found in venv: {venv}")
 
-    if not os.path.isdir(bin_path):
-        raise AlfredException(f"bin folder not found in venv: {venv}, bin_path={bin_path}")
+def run_module_as_pty(module: str, venv: str, args: List[str]) -> int:
+    """
+    run alfred in another virtual environment with same commands without capturing the output
 
-    python = process.sh(python_executable_path)
-    args = ctx.invocation_options() + args
-    logger.debug(f"alfred interpreter - switch to python: {python_executable_path} : args={args}")
+    The timeout of the running command applies to the other alfred process.
 
-    with override_envs(VIRTUAL_ENV=venv, PATH=global_path, PYTHONPATH=python_path):
-        python_args = ['-m', module] + args
-        process_result = process.run(python, python_args)
-        return process_result.return_code, process_result.stdout, process_result.stderr
+    >>> interpreter.run_module_as_pty(module='alfred.cli', venv=venv, args=['hello_world'])
+    """
+    python, python_args, env = _module_invocation(module, venv, args)
+    timeout = ctx.remaining_time()
+    stack = contextlib.ExitStack()
+    isolated = lifecycle.isolated(None, timeout)
+    pid = stack.enter_context(subprocess.Popen([python.executable] + python_args, stdout=None, stderr=None, env=process.environment(env),
+                                               pass_fds=jobserver.pass_fds(),
+                                               **lifecycle.popen_options(isolated)))
+    lifecycle.track(pid.pid, f"alfred {' '.join(args)}", isolated)
+    running_process = process.RunningProcess([pid], stack, process.capture_output(pid), process.capture_output(pid), timeout=timeout, isolated=isolated)
+    return running_process.wait().return_code
 
 
-def run_module_as_pty(module: str, venv: str, args: List[str]) -> int:
+def start_module(module: str, venv: Optional[str], args: List[str], **options: Any) -> process.RunningProcess:
     """
-    run alfred in another virtual environment with same commands without capturing the output
+    start alfred in a virtual environment without waiting for its end. If venv is None, alfred is started
+    with the current python interpreter.
 
-    >>> interpreter.run_module_as_pty(module='alfred.cli', venv=venv, args=['hello_world'])
+    >>> running_process = interpreter.start_module(module='alfred.cli', venv=venv, args=['hello_world'], stream_stdout=False)
+    >>> result = running_process.wait()
+
+    The options are the ones of ``process.start``.
     """
-    global_path = os.getenv('PATH', '')
-    global_python_path = os.getenv('PYTHONPATH', '')
+    python, python_args, env = _module_invocation(module, venv, args)
+    env = {**env, **options.pop('env', {})}
+    return process.start(python, python_args, env=env, **options)
+
+
+def _module_invocation(module: str, venv: Optional[str], args: List[str]) -> Tuple[process.Command, List[str], Dict[str, str]]:
+    """
+    Computes the interpreter, its arguments and its environment variables to run a python module in a virtual environment.
+    """
+    args = ctx.invocation_options() + args
+    python_args = ['-m', module] + args
+    if venv is None:
+        logger.debug(f"alfred interpreter - use current python: {current()} : args={args}")
+        return process.Command(current()), python_args, {}
+
+    global_env = process.environment()
+    global_path = global_env.get('PATH', '')
+    global_python_path = global_env.get('PYTHONPATH', '')
     python_executable_path = venv_python_path(venv)
     bin_path = venv_bin_path(venv)
     global_path = format_path_variable(global_path, bin_path)
@@ -74,18 +95,10 @@ def run_module_as_pty(module: str, venv: str, args: List[str]) -> int:
         raise AlfredException(f"bin folder not found in venv: {venv}, bin_path={bin_path}")
 
     python = process.sh(python_executable_path)
-    args = ctx.invocation_options() + args
     logger.debug(f"alfred interpreter - switch to python: {python_executable_path} : args={args}")
 
-    exit_code = 0
-    with override_envs(VIRTUAL_ENV=venv, PATH=global_path, PYTHONPATH=python_path):
-        try:
-            python_args = ['-m', module] + args
-            subprocess.run([python.executable] + python_args, stdout=None, stderr=None, check=True)
-        except subprocess.CalledProcessError as exception:
-            exit_code = exception.returncode
+    return python, python_args, {'VIRTUAL_ENV': venv, 'PATH': global_path, 'PYTHONPATH': python_path}
 
-    return exit_code
 
 def venv_bin_path(venv: str) -> str:
     """
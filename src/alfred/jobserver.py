@@ -0,0 +1,143 @@
+"""
+This module shares a GNU make jobserver between the programs started by alfred. With ``alfred --jobs 8``,
+the ``make``, ``cargo`` and ``ninja`` processes of a pipeline take their job slots from the same pool of 8 tokens
+instead of deciding on their own parallelism.
+
+>>> jobserver.start(8)
+>>> process.run("make -C native")  # MAKEFLAGS="-j8 --jobserver-auth=3,4"
+>>> jobserver.stop()
+
+When alfred runs in a recipe of make, it joins the jobserver of make instead of creating one. The recipe
+must be marked with ``+`` for make to share its jobserver.
+
+>>> # all:
+>>> # 	+alfred build
+"""
+import dataclasses
+import os
+import threading
+from typing import Dict, Optional, Tuple
+
+import click
+
+import alfred.os
+from alfred import logger
+
+
+@dataclasses.dataclass
+class Jobserver:
+    read_fd: int
+    write_fd: int
+    jobs: int
+
+
+_lock = threading.Lock()
+_jobserver: Optional[Jobserver] = None
+
+
+def start(jobs: int) -> None:
+    """
+    Creates the jobserver of the invocation with ``jobs`` job slots. alfred joins the jobserver of make instead
+    when it runs under make.
+    """
+    global _jobserver  # pylint: disable=global-statement
+    if jobs < 1:
+        raise click.ClickException(f"the number of jobs must be at least 1: {jobs}")
+
+    if alfred.os.is_windows():
+        raise click.ClickException("the jobserver is not supported on windows")
+
+    if parent_auth() is not None:
+        logger.debug(f"alfred runs under make, it joins its jobserver: {parent_auth()}")
+        return
+
+    with _lock:
+        if _jobserver is not None:
+            return
+
+        read_fd, write_fd = os.pipe()
+        # a program owns an implicit job slot, the pipe contains the other ones
+        os.write(write_fd, b'+' * (jobs - 1))
+        _jobserver = Jobserver(read_fd, write_fd, jobs)
+        logger.debug(f"jobserver started with {jobs} jobs: {read_fd},{write_fd}")
+
+
+def stop() -> None:
+    """
+    Closes the jobserver of the invocation.
+    """
+    global _jobserver  # pylint: disable=global-statement
+    with _lock:
+        if _jobserver is None:
+            return
+
+        os.close(_jobserver.read_fd)
+        os.close(_jobserver.write_fd)
+        _jobserver = None
+
+
+def environment() -> Dict[str, str]:
+    """
+    Returns the environment variables that give access to the jobserver of alfred, empty if alfred does not manage one.
+
+    >>> child_env = {**os.environ, **jobserver.environment()}
+    """
+    with _lock:
+        if _jobserver is None:
+            return {}
+
+        return {'MAKEFLAGS': makeflags(os.environ.get('MAKEFLAGS', ''), _jobserver.jobs, _jobserver.read_fd, _jobserver.write_fd)}
+
+
+def pass_fds() -> Tuple[int, ...]:
+    """
+    Returns the file descriptors of the jobserver, either the one of alfred or the one of make, that the programs
+    must inherit.
+    """
+    with _lock:
+        if _jobserver is not None:
+            return _jobserver.read_fd, _jobserver.write_fd
+
+    auth = parent_auth()
+    if auth is None or auth.startswith('fifo:'):
+        return ()
+
+    try:
+        file_descriptors = tuple(int(file_descriptor) for file_descriptor in auth.split(','))
+        for file_descriptor in file_descriptors:
+            os.fstat(file_descriptor)
+        return file_descriptors
+    except (ValueError, OSError):
+        logger.debug(f"the jobserver of make is not available ({auth}), the recipe that runs alfred must be marked with +")
+        return ()
+
+
+def parent_auth(flags: Optional[str] = None) -> Optional[str]:
+    """
+    Reads the jobserver of make in ``MAKEFLAGS``, either a pair of file descriptors, either a named pipe.
+
+    >>> auth = jobserver.parent_auth("-j8 --jobserver-auth=3,4")
+    >>> # auth == "3,4"
+    """
+    if flags is None:
+        flags = os.environ.get('MAKEFLAGS', '')
+
+    auth = None
+    for flag in flags.split():
+        for option in ('--jobserver-auth=', '--jobserver-fds='):
+            if flag.startswith(option):
+                auth = flag[len(option):]
+
+    return auth
+
+
+def makeflags(flags: str, jobs: int, read_fd: int, write_fd: int) -> str:
+    """
+    Adds a jobserver to ``MAKEFLAGS``, the other flags are kept.
+
+    >>> jobserver.makeflags("k", 8, 3, 4)
+    >>> # "k -j8 --jobserver-auth=3,4"
+    """
+    kept = [flag for flag in flags.split()
+            if not flag.startswith(('-j', '--jobserver-auth=', '--jobserver-fds='))]
+    return ' '.join(kept + [f"-j{jobs}", f"--jobserver-auth={read_fd},{write_fd}"])
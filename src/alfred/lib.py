@@ -77,13 +77,25 @@ def override_env_pythonpath(pythonpath: str) -> ContextManager[None]:
     * override pythonpath environment variable in plumbum
     * override sys.path
     """
-    previous_syspath = sys.path
     with override_envs(PYTHONPATH=pythonpath):
-        sys.path = pythonpath.split(os.pathsep)
-        try:
+        with override_syspath(pythonpath):
             yield
-        finally:
-            sys.path = previous_syspath
+
+
+@contextlib.contextmanager
+def override_syspath(pythonpath: str) -> ContextManager[None]:
+    """
+    Override sys.path to import the python modules of a pythonpath in the current interpreter
+
+    >>> with override_syspath("/home/far/project/src"):
+    >>>     import utils
+    """
+    previous_syspath = sys.path
+    sys.path = pythonpath.split(os.pathsep)
+    try:
+        yield
+    finally:
+        sys.path = previous_syspath
 
 
 @contextlib.contextmanager
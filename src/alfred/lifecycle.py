@@ -0,0 +1,373 @@
+"""
+This module tracks the programs started by alfred until the end of the invocation. A program runs in its own
+process group with its children, a development server, the workers of pytest-xdist or a docker client remain
+reachable when the program that started them has ended.
+
+>>> # $ alfred ci
+>>> # ...
+>>> # alfred has stopped the processes left running by: pytest -n 8 (pgid 4127: python, python)
+
+Alfred forwards ``SIGINT``, ``SIGTERM`` and ``SIGHUP`` to the process groups. When the command ends, with a success
+or a failure, the process groups still running receive ``SIGTERM``, then ``SIGKILL`` after ``GRACE_PERIOD`` seconds.
+The processes that survive are reported.
+
+A program that reads the terminal of alfred stays in the process group of alfred, in its own group it would be stopped
+by ``SIGTTIN``. It receives the ``Ctrl+C`` of the terminal directly. Its children are not in a group of their own,
+on linux alfred adopts them as a child subreaper while a command runs. The adopted processes still in the session of alfred
+are stopped at the end of the command, a daemon that has left the session with ``setsid`` keeps running. The adopted
+processes that have ended are reaped at the end of the command. On other platforms, the children left running
+by such a program are not stopped.
+
+The adoption is disabled with ``stop_orphans = false`` in the section ``[alfred.project]`` of the manifest.
+A program started with ``alfred.run(..., detach=True)`` runs in its own session and is not tracked, it keeps running.
+"""
+import ctypes
+import dataclasses
+import os
+import signal
+import subprocess
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import alfred.os
+from alfred import echo, logger, monitor
+
+"""
+Delay in seconds between SIGTERM and SIGKILL when the remaining processes are stopped.
+"""
+GRACE_PERIOD = 5.0
+
+FORWARDED_SIGNALS = ['SIGINT', 'SIGTERM', 'SIGHUP']
+
+PR_SET_CHILD_SUBREAPER = 36
+
+
+@dataclasses.dataclass
+class TrackedProcess:
+    pid: int
+    command: str
+    isolated: bool
+
+
+_lock = threading.Lock()
+_tracked: Dict[int, TrackedProcess] = {}
+_previous_handlers: Dict[int, Any] = {}
+_state = {'adopting': False}
+
+
+def isolated(stdin: Optional[Any], timeout: Optional[float] = None) -> bool:
+    """
+    Decides if a program starts in its own process group. The programs stopped by a timeout always do,
+    a program that inherits the terminal of alfred as input does not.
+
+    :param stdin: the standard input given to ``subprocess.Popen``, None if it is inherited
+    """
+    if timeout is not None:
+        return True
+
+    if alfred.os.is_windows():
+        # a new process group on windows does not receive the Ctrl+C of the console anymore
+        return False
+
+    return stdin is not None or not _terminal_input()
+
+
+def popen_options(_isolated: bool) -> Dict[str, Any]:
+    """
+    Returns the options of ``subprocess.Popen`` that start a program in its own process group.
+    """
+    if not _isolated:
+        return {}
+
+    if alfred.os.is_windows():
+        return {'creationflags': subprocess.CREATE_NEW_PROCESS_GROUP}  # pylint: disable=no-member
+
+    return {'start_new_session': True}
+
+
+def track(pid: int, command: str, _isolated: bool) -> None:
+    with _lock:
+        _tracked[pid] = TrackedProcess(pid, command, _isolated)
+
+
+def release(pid: int) -> None:
+    """
+    Stops the tracking of a program that has ended. Its process group remains tracked as long as
+    one of its children runs.
+    """
+    with _lock:
+        tracked_process = _tracked.get(pid)
+        if tracked_process is None:
+            return
+
+        if not tracked_process.isolated or not group_alive(pid):
+            del _tracked[pid]
+
+
+def tracked() -> List[TrackedProcess]:
+    with _lock:
+        return list(_tracked.values())
+
+
+def forward_signal(signum: int) -> None:
+    """
+    Sends a signal to the process groups of the programs, the programs of the process group of alfred
+    have already received it from the terminal.
+    """
+    for tracked_process in tracked():
+        if tracked_process.isolated:
+            _signal_group(tracked_process.pid, signum)
+
+
+def install_signal_handlers() -> Callable[[], None]:
+    """
+    Forwards the signals that stop alfred to the process groups of the programs. It returns the function
+    that restores the previous handlers. The handlers can only be installed from the main thread.
+
+    >>> restore = lifecycle.install_signal_handlers()
+    >>> restore()
+    """
+    if threading.current_thread() is not threading.main_thread() or alfred.os.is_windows():
+        return lambda: None
+
+    signums = [getattr(signal, name) for name in FORWARDED_SIGNALS if hasattr(signal, name)]
+    for signum in signums:
+        _previous_handlers[signum] = signal.signal(signum, _forward_and_stop)
+
+    def restore() -> None:
+        for _signum in signums:
+            signal.signal(_signum, _previous_handlers.pop(_signum, signal.SIG_DFL))
+
+    return restore
+
+
+def adopt_orphans() -> None:
+    """
+    Makes alfred the parent of the processes that leave their parent among the descendants of alfred, instead of
+    the init process, until ``cleanup`` has stopped them. It works on linux only.
+
+    >>> lifecycle.adopt_orphans()
+    >>> # ...
+    >>> lifecycle.cleanup()
+    """
+    if _state['adopting'] or not monitor.supported():
+        return
+
+    _state['adopting'] = _set_child_subreaper(True)
+
+
+def cleanup(grace_period: float = GRACE_PERIOD) -> List[TrackedProcess]:
+    """
+    Stops the process groups still running, first with ``SIGTERM``, then with ``SIGKILL`` after ``grace_period``
+    seconds. The orphans adopted by alfred are stopped the same way. The processes that remain are reported
+    as warnings.
+
+    :return: the programs whose process group has survived
+    """
+    with _lock:
+        remaining = list(_tracked.values())
+        _tracked.clear()
+
+    stopped: List[TrackedProcess] = []
+    survivors: List[TrackedProcess] = []
+    running = [tracked_process for tracked_process in remaining if _alive(tracked_process)] + _orphans(remaining)
+    while len(running) > 0:
+        survivors += _stop_all(running, grace_period)
+        stopped += running
+        # the children of a program stopped without its process group leave their parent
+        running = _orphans(remaining + stopped)
+
+    if _state['adopting']:
+        _state['adopting'] = False
+        _set_child_subreaper(False)
+        _reap_orphans(remaining)
+
+    if len(survivors) > 0:
+        echo.warning("processes still running after alfred: "
+                     + ', '.join(f"{tracked_process.command} ({_describe(tracked_process)})" for tracked_process in survivors))
+
+    return survivors
+
+
+def group_alive(pgid: int) -> bool:
+    """
+    Checks if a process group contains a process that is not a zombie.
+    """
+    if alfred.os.is_windows():
+        return False
+
+    try:
+        os.killpg(pgid, 0)  # pylint: disable=no-member
+    except (ProcessLookupError, PermissionError):
+        return False
+
+    # the process group may only contain zombies whose parent has not waited for yet
+    return len(group_members(pgid)) > 0 if monitor.supported() else True
+
+
+def group_members(pgid: int) -> List[str]:
+    """
+    Lists the name of the running processes of a process group, on linux only.
+    """
+    return [name for _, name, state, _, _pgid, _ in _process_stats() if _pgid == pgid and state != 'Z']
+
+
+def _stop_all(running: List[TrackedProcess], grace_period: float) -> List[TrackedProcess]:
+    echo.warning("alfred has stopped the processes left running by: "
+                 + ', '.join(f"{tracked_process.command} ({_describe(tracked_process)})" for tracked_process in running))
+    for tracked_process in running:
+        _stop(tracked_process, terminate=True)
+
+    deadline = time.monotonic() + grace_period
+    while any(_alive(tracked_process) for tracked_process in running) and time.monotonic() < deadline:
+        time.sleep(0.05)
+
+    for tracked_process in running:
+        _stop(tracked_process, terminate=False)
+
+    # SIGKILL is delivered asynchronously, a process in an uninterruptible sleep ends later
+    deadline = time.monotonic() + 1.0
+    while any(_alive(tracked_process) for tracked_process in running) and time.monotonic() < deadline:
+        time.sleep(0.05)
+
+    return [tracked_process for tracked_process in running if _alive(tracked_process)]
+
+
+def _orphans(known: List[TrackedProcess]) -> List[TrackedProcess]:
+    """
+    Lists the running children of alfred in its session that are neither tracked nor in a tracked process group,
+    the orphans adopted by alfred.
+    """
+    if not _state['adopting']:
+        return []
+
+    pids = {tracked_process.pid for tracked_process in known}
+    pgids = {tracked_process.pid for tracked_process in known if tracked_process.isolated}
+    session = os.getsid(0)  # pylint: disable=no-member
+    return [TrackedProcess(pid, name, isolated=False) for pid, name, state, ppid, pgid, sid in _process_stats()
+            if ppid == os.getpid() and state != 'Z' and sid == session and pid not in pids and pgid not in pgids]
+
+
+def _reap_orphans(known: List[TrackedProcess]) -> None:
+    """
+    Waits for the adopted processes that have ended, the command has ended and no one else waits for them.
+    The programs still tracked are left to their owner.
+    """
+    pids = {tracked_process.pid for tracked_process in known}
+    for pid, _, state, ppid, _, _ in _process_stats():
+        if ppid != os.getpid() or state != 'Z' or pid in pids:
+            continue
+
+        try:
+            os.waitpid(pid, os.WNOHANG)  # pylint: disable=no-member
+        except ChildProcessError:
+            # a thread of alfred has waited for it meanwhile
+            continue
+
+
+def _process_stats() -> List[Tuple[int, str, str, int, int, int]]:
+    """
+    Reads the pid, the name, the state, the parent, the process group and the session of every process, on linux only.
+    """
+    stats = []
+    for entry in os.listdir(monitor.PROC_DIRECTORY):
+        if not entry.isdigit():
+            continue
+
+        stat = _process_stat(int(entry))
+        if stat is not None:
+            stats.append(stat)
+
+    return stats
+
+
+def _process_stat(pid: int) -> Optional[Tuple[int, str, str, int, int, int]]:
+    try:
+        with open(os.path.join(monitor.PROC_DIRECTORY, str(pid), 'stat'), encoding='utf-8', errors='replace') as filep:
+            content = filep.read()
+    except OSError:
+        # the process has ended since the listing
+        return None
+
+    name, rest = content[content.index('(') + 1:].rsplit(')', 1)
+    fields = rest.split()
+    return pid, name, fields[0], int(fields[1]), int(fields[2]), int(fields[3])
+
+
+def _set_child_subreaper(enabled: bool) -> bool:
+    try:
+        libc = ctypes.CDLL(None, use_errno=True)
+        if libc.prctl(PR_SET_CHILD_SUBREAPER, int(enabled), 0, 0, 0) == 0:
+            return True
+        logger.debug(f"prctl PR_SET_CHILD_SUBREAPER has failed: {os.strerror(ctypes.get_errno())}")
+    except (OSError, AttributeError) as exception:
+        logger.debug(f"prctl is not available: {exception}")
+
+    return False
+
+
+def _forward_and_stop(signum: int, frame: Any) -> None:
+    logger.debug(f"signal {signum} forwarded to {len(tracked())} programs")
+    forward_signal(signum)
+    previous = _previous_handlers.get(signum)
+    if callable(previous):
+        previous(signum, frame)
+    elif previous != signal.SIG_IGN:
+        # the exit runs the cleanup of the invocation, unlike the default action of the signal
+        raise SystemExit(128 + signum)
+
+
+def _terminal_input() -> bool:
+    try:
+        return os.isatty(0)
+    except OSError:
+        return False
+
+
+def _alive(tracked_process: TrackedProcess) -> bool:
+    if alfred.os.is_windows():
+        result = subprocess.run(['tasklist', '/FI', f'PID eq {tracked_process.pid}', '/NH'], stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, check=False)
+        return str(tracked_process.pid) in result.stdout.decode('utf-8', errors='replace')
+
+    if tracked_process.isolated:
+        return group_alive(tracked_process.pid)
+
+    try:
+        os.kill(tracked_process.pid, 0)
+    except (ProcessLookupError, PermissionError):
+        return False
+
+    # a program that has ended is a zombie until its owner waits for it, alfred does not reap it in its place
+    if not monitor.supported():
+        return True
+
+    stat = _process_stat(tracked_process.pid)
+    return stat is not None and stat[2] != 'Z'
+
+
+def _stop(tracked_process: TrackedProcess, terminate: bool) -> None:
+    if alfred.os.is_windows():
+        subprocess.run(['taskkill', '/F', '/T', '/PID', str(tracked_process.pid)], stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, check=False)
+    elif tracked_process.isolated:
+        _signal_group(tracked_process.pid, signal.SIGTERM if terminate else signal.SIGKILL)  # pylint: disable=no-member
+    else:
+        try:
+            os.kill(tracked_process.pid, signal.SIGTERM if terminate else signal.SIGKILL)  # pylint: disable=no-member
+        except (ProcessLookupError, PermissionError):
+            pass
+
+
+def _signal_group(pgid: int, signum: int) -> None:
+    try:
+        os.killpg(pgid, signum)  # pylint: disable=no-member
+    except (ProcessLookupError, PermissionError):
+        # the process group has already ended
+        pass
+
+
+def _describe(tracked_process: TrackedProcess) -> str:
+    if tracked_process.isolated and monitor.supported():
+        return f"pgid {tracked_process.pid}: {', '.join(group_members(tracked_process.pid))}"
+
+    return f"{'pgid' if tracked_process.isolated else 'pid'} {tracked_process.pid}"
@@ -1,12 +1,12 @@
 import contextlib
 import os
 from functools import wraps
-from typing import Union, List, Callable, Optional, Tuple
+from typing import Union, List, Callable, Optional, Tuple, Dict, Any
 
 import click
 from click.exceptions import Exit
 
-from alfred import ctx as alfred_ctx, commands, echo, lib, manifest, alfred_command, process
+from alfred import ctx as alfred_ctx, commands, dependencies, echo, file_index, lib, manifest, alfred_command, process, parallel, pool, progress
 
 def CMD_RUNNING():  #pylint: disable=invalid-name
     """
@@ -58,16 +58,39 @@ def execution_directory() -> str:
 @contextlib.contextmanager
 def env(**kwargs) -> None:
     """
-    Assign environment variables in a command
+    Assign environment variables in a command. The variables are given to the programs started
+    in the block, ``os.environ`` of alfred is not modified.
 
     >>> with alfred.env(ENV="prod"):
     >>>     echo = alfred.sh("echo")
     >>>     echo("hello world")
     """
-    with lib.override_envs(**kwargs):
+    with alfred_ctx.use_env_overlay(**kwargs):
         yield
 
 
+def changed_since(key: str, patterns: List[str]) -> List[str]:
+    """
+    Lists the files of the project created or modified since the last successful run of the command
+    that has called ``changed_since`` with the same key. All the files are returned on the first run.
+
+    >>> @alfred.command("lint")
+    >>> def lint():
+    >>>     files = alfred.changed_since("lint", ["src/**/*.py"])
+    >>>     if len(files) > 0:
+    >>>         alfred.run("pylint", files)
+
+    The hash of the files is kept in an index, only the files whose modification time, size or inode
+    have changed are hashed again.
+
+    :param key: name of the snapshot to compare the files with
+    :param patterns: glob patterns of the files relative to the project directory, ``**`` matches any subdirectory
+    :return: paths of the files relative to the project directory
+    """
+    alfred_ctx.assert_in_command("alfred.changed_since")
+    return file_index.changed_since(alfred_ctx.current_command().project_dir, key, patterns)
+
+
 @click.pass_context
 def invoke_command(ctx, command: str or List[str], **kwargs) -> None:
     """
@@ -97,22 +120,90 @@ def invoke_command(ctx, command: str or List[str], **kwargs) -> None:
 
 
     click_command = _command.command
-    if hasattr(click_command, "help"):
-        echo.subcommand(f"$ alfred {click_command.name} : {click_command.help}")
+    header = f"$ alfred {click_command.name} : {click_command.help}" if hasattr(click_command, "help") else f"$ alfred {click_command.name}"
+    with progress.step(_command.fullname) as progress_label:
+        # the progress of the pipeline is known once its previous runs have been recorded
+        echo.subcommand(f"{header} {progress_label}" if progress_label != "" else header)
+
+        # the timeout and the resource limits of the subcommand apply to its programs as for a root command
+        with alfred_ctx.stack_subcommand(_command), alfred_ctx.use_timeout(_command.timeout), \
+                alfred_ctx.use_process_limits(**_command.process_limits):
+            os.chdir(project_dir)
+            args = alfred_command.format_cli_arguments(_command, kwargs)
+            if alfred_ctx.should_use_external_venv():
+                alfred_ctx.invoke_through_external_venv(args)
+            else:
+                previous_directory = os.getcwd()
+                try:
+                    dependencies.run_dependencies(_command)
+                    ctx.invoke(click_command, **kwargs)
+                finally:
+                    os.chdir(previous_directory)
+
+def invoke_commands(commands_to_invoke: List[Union[str, List[str], Tuple[Union[str, List[str]], dict]]],
+                    jobs: Optional[int] = None,
+                    fail_fast: bool = True,
+                    output_mode: Optional[str] = None) -> None:
+    """
+    Invokes existing commands as subcommands running concurrently. This instruction runs the independent steps
+    of a pipeline at the same time.
+
+    >>> alfred.invoke_commands(["lint", "tests"])
+
+    Each command runs in its own alfred process, in the virtual environment of its project. Its output is displayed
+    in one piece when it ends. ``jobs`` limits the number of commands running at the same time, by default
+    it's the number of processors.
+
+    >>> alfred.invoke_commands(["lint", ["product1", "tests"], ["product2", "tests"]], jobs=2)
+
+    Command arguments are passed as a dictionary with a tuple.
+
+    >>> alfred.invoke_commands([("lint", {"verbose": True}), ("tests", {"verbose": True})])
+
+    When a command fails, the other commands are stopped and alfred exits with the exit code of the failure.
+    With ``fail_fast=False``, all the commands run until the end before alfred exits with the exit code
+    of the first failure.
+
+    ``output_mode`` chooses how the output is displayed, ``grouped`` in one piece per command, ``prefixed`` line by line
+    with the name of the command or ``dashboard`` with the last line of each command at the bottom of the terminal.
+    By default, it's the mode of ``alfred --output``.
+
+    >>> alfred.invoke_commands(["lint", "tests"], output_mode="prefixed")
+    >>> # [lint] $ alfred lint : lint the code
+    >>> # [tests] $ alfred tests : run the tests
+    >>> # [tests] ============================= test session starts ==============================
+
+    :param commands_to_invoke: commands to invoke, with their arguments as a tuple
+    :param jobs: maximum number of commands running at the same time
+    :param fail_fast: stop the other commands as soon as a command fails
+    :param output_mode: display of the output, ``grouped``, ``prefixed`` or ``dashboard``
+    """
+    _calling_commmand = alfred_ctx.current_command()
+    if _calling_commmand is not None:
+        project_dir = _calling_commmand.project_dir
     else:
-        echo.subcommand(f"$ alfred {click_command.name}")
-
-    with alfred_ctx.stack_subcommand(_command):
-        os.chdir(project_dir)
-        args = alfred_command.format_cli_arguments(_command, kwargs)
-        if alfred_ctx.should_use_external_venv():
-            alfred_ctx.invoke_through_external_venv(args)
-        else:
-            previous_directory = os.getcwd()
-            try:
-                ctx.invoke(click_command, **kwargs)
-            finally:
-                os.chdir(previous_directory)
+        project_dir = manifest.lookup_project_dir()
+
+    _jobs = []
+    for command_to_invoke in commands_to_invoke:
+        command, kwargs = command_to_invoke if isinstance(command_to_invoke, tuple) else (command_to_invoke, {})
+        _command = commands.lookup(command, project_dir)
+        if _command is None:
+            raise click.ClickException(f"command {command} does not exists.")
+
+        _jobs.append(alfred_command.job(_command, kwargs, project_dir))
+
+    # the commands started together are one step of the pipeline
+    with progress.step(' + '.join(job.name for job in _jobs)) as progress_label:
+        if progress_label != "":
+            for job in _jobs:
+                job.title = f"{job.title} {progress_label}"
+
+        results = parallel.run_jobs(_jobs, max_workers=jobs, fail_fast=fail_fast, output_mode=output_mode)
+        failure = parallel.first_failure(results)
+        if failure is not None:
+            raise Exit(failure.return_code)
+
 
 class pythonpath:  #pylint: disable=invalid-name
     """
@@ -132,6 +223,8 @@ class pythonpath:  #pylint: disable=invalid-name
     >>> @alfred.pythonpath(['src'])
     >>> def my_command():
     >>>     pass
+
+    The ``PYTHONPATH`` is given to the programs started by the command, ``os.environ`` of alfred is not modified.
     """
 
     def __init__(self, directories: List[str] = None, append_project=True):
@@ -178,6 +271,9 @@ def sh(command: Union[str, List[str]], fail_message: str = None) -> process.Comm
     >>> open = alfred.sh(["open", "xdg-open"], "Either open, either xdg-open is missing on your system. Are you using a compatible platform ?")  # pylint: disable=line-too-long
     >>> alfred.run(open, "http://www.github.com")
 
+    When the program is a shim of pyenv or asdf, ``alfred.run`` starts the program targeted by the shim directly.
+    The target is cached as long as the version files like ``.python-version`` or ``.tool-versions`` are unchanged.
+
     :param command: command or list of command name to lookup
     :param fail_message: failure message show to the user if no command has been found
     :return: a command you can use with alfred.run
@@ -185,11 +281,47 @@ def sh(command: Union[str, List[str]], fail_message: str = None) -> process.Comm
     return process.sh(command, fail_message)
 
 
-def run(command: Union[str, process.Command],
+def pipe(command: Union[str, process.Command, process.Pipeline], args: Optional[Union[str, List[str]]] = None) -> process.Pipeline:
+    """
+    Builds a pipeline of programs to execute with alfred.run. The standard output of a stage is
+    connected to the standard input of the next one through an OS pipe, the data does not go through alfred.
+
+    >>> git = alfred.sh("git", "git is missing on your system")
+    >>> grep = alfred.sh("grep", "grep is missing on your system")
+    >>> alfred.run(alfred.pipe(git, ["log", "--oneline"]) | alfred.pipe(grep, ["fix"]))
+
+    The operator ``|`` accepts a command, a text command or another pipeline.
+
+    >>> alfred.run(alfred.pipe("git log --oneline") | "grep fix" | "wc -l")
+
+    :param command: first command or text program of the pipeline
+    :param args: arguments of the first command
+    :return: a pipeline you can use with alfred.run
+    """
+    if isinstance(args, str):
+        args = [args]
+
+    return process.pipe(command, args)
+
+
+def run(command: Union[str, process.Command, process.Pipeline],  # pylint: disable=too-many-arguments,too-many-locals
     args: Optional[Union[str, List[str]]] = None,
     exit_on_error=True,
     stream_stdout=True,
-    stream_stderr=True) -> Tuple[int, str, str]:
+    stream_stderr=True,
+    stdout: Optional[process.Redirection] = None,
+    stderr: Optional[process.Redirection] = None,
+    stdin: Optional[process.Redirection] = None,
+    input: Optional[process.Input] = None,  # pylint: disable=redefined-builtin
+    env: Optional[Dict[str, str]] = None,  # pylint: disable=redefined-outer-name
+    cwd: Optional[str] = None,
+    timeout: Optional[float] = None,
+    sample_interval: Optional[float] = None,
+    nice: Optional[int] = None,
+    rlimit_as: Optional[int] = None,
+    rlimit_cpu: Optional[int] = None,
+    cpu_affinity: Optional[List[int]] = None,
+    detach: bool = False) -> Tuple[int, Optional[str], Optional[str]]:
     """
     Most of the process run by alfred are supposed to stop
     if the excecution process is finishing with an exit code of 0
@@ -213,6 +345,11 @@ def run(command: Union[str, process.Command],
 
     >>> alfred.run("ls /var/yolo", stream_stdout=False)
 
+    The captured output is returned as the program has written it, a line is not followed by an extra newline.
+
+    >>> _, stdout, _ = alfred.run("git branch --show-current", stream_stdout=False)
+    >>> branch = stdout.strip()
+
     The stderr is displayed by default. You can use the flag stream_stderr to hide the error output from terminal. It's not recommanded
     if you keep the error_on_exit to True.
 
@@ -224,8 +361,56 @@ def run(command: Union[str, process.Command],
     >>> alfred.run("echo hello world")
     >>> alfred.run('cp "/home/fabien/hello world" /tmp', exit_on_error=False)
 
-    Shell operations are not supported &, |, &&, ||, etc... You can not use for example `echo hello world | grep hello` or
-    `echo hello world > file.txt`. If you use it an error will be raised.
+    Shell operations are not supported &, &&, ||, etc... You can not use for example `echo hello world > file.txt`.
+    If you use it an error will be raised.
+
+    The pipe ``|`` is supported, alfred connects the programs of the pipeline itself. The pipeline fails
+    if one of its programs fails.
+
+    >>> alfred.run("git log --oneline | grep fix")
+    >>> alfred.run(alfred.pipe("git log --oneline") | "wc -l")
+
+    The standard streams can be redirected to a file instead with ``stdout``, ``stderr`` and ``stdin``. They accept a path
+    or a file object. The program writes directly in the file, its output is not captured in this case.
+
+    >>> alfred.run("pip freeze", stdout="requirements.txt")
+    >>> with open("build.log", "ab") as filep:
+    >>>     alfred.run("make", stdout=filep, stderr=filep)
+    >>> alfred.run("psql", stdin="dump.sql")
+
+    The standard input can also be fed from python with ``input``. It accepts bytes, a file object or an iterator
+    of chunks. The chunks are sent as the program reads them, a large dataset is never loaded in memory.
+
+    >>> alfred.run("jq .name", input=b'{"name": "alfred"}')
+    >>> alfred.run("psql", input=(f"INSERT INTO t VALUES ({i});\\n" for i in range(1000000)))
+
+    The environment variables ``env`` are added to the environment of the program and ``cwd`` sets its working directory,
+    only for this call. Unlike ``alfred.env``, they do not modify the environment of alfred itself.
+
+    >>> alfred.run("pytest", env={"DATABASE_URL": "sqlite://"}, cwd="tests")
+
+    ``timeout`` stops the program and its children when it runs for too long, the output written until then is kept.
+    The return code is 124 in this case.
+
+    >>> alfred.run("pytest tests/integrations", timeout=600)
+
+    On linux, ``sample_interval`` samples the CPU and the memory of the program and of all its descendants
+    every ``sample_interval`` seconds. A summary is displayed at the end, the samples are written in a timeline file
+    in ``.alfred/monitor``.
+
+    >>> alfred.run("pytest -n 8", sample_interval=0.5)
+    >>> # process tree: cpu peak 780% average 612%, rss peak 1843.2 MB average 1210.4 MB, 9 processes at most
+
+    ``nice``, ``rlimit_as``, ``rlimit_cpu`` and ``cpu_affinity`` lower the priority of the program, limit its memory in bytes
+    and its CPU time in seconds, and pin it on some CPUs. Its children inherit them. A program that exceeds
+    ``rlimit_as`` fails to allocate memory instead of pushing the machine into swap.
+
+    >>> alfred.run("pytest", nice=10, rlimit_as=4 * 1024 ** 3, cpu_affinity=[2, 3])
+
+    The processes left running by a program are stopped when alfred exits. ``detach`` starts the program in its own
+    session without tracking it, for a program that starts a daemon on purpose.
+
+    >>> alfred.run("pg_ctl start -l postgres.log", detach=True)
 
     The return code, the stdout and the stderr are returned as a tuple.
 
@@ -235,17 +420,202 @@ def run(command: Union[str, process.Command],
     :param exit_on_error: break the flow if the exit code is different of 0 (active by default)
     :param stream_stdout: stream the command output in the terminal (enable by default)
     :param stream_stderr: stream the command errors in the terminal (enable by default)
+    :param stdout: redirect the standard output to a path or a file object
+    :param stderr: redirect the error output to a path or a file object
+    :param stdin: read the standard input from a path or a file object
+    :param input: feed the standard input with bytes, a file object or an iterator of chunks
+    :param env: environment variables to add to the environment of the program
+    :param cwd: working directory of the program
+    :param timeout: maximum duration of the program in seconds
+    :param sample_interval: interval in seconds between two samples of the tree of processes
+    :param nice: priority of the program, from -20 (highest) to 19 (lowest), posix only
+    :param rlimit_as: maximum size in bytes of the address space of the program, posix only
+    :param rlimit_cpu: maximum CPU time in seconds of the program, posix only
+    :param cpu_affinity: CPUs on which the program runs, linux only
+    :param detach: start the program in its own session, it and its children keep running after alfred, posix only
     """
     if isinstance(args, str):
         args = [args]
 
-    result = process.run(command, args, stream_stdout=stream_stdout, stream_stderr=stream_stderr)
+    result = process.run(command, args,
+                         stream_stdout=stream_stdout,
+                         stream_stderr=stream_stderr,
+                         stdout=stdout,
+                         stderr=stderr,
+                         stdin=stdin,
+                         input=input,
+                         env=env,
+                         cwd=cwd,
+                         timeout=timeout,
+                         sample_interval=sample_interval,
+                         nice=nice,
+                         rlimit_as=rlimit_as,
+                         rlimit_cpu=rlimit_cpu,
+                         cpu_affinity=cpu_affinity,
+                         detach=detach)
+    if result.tree_usage is not None:
+        echo.message(f"process tree: {result.tree_usage}")
+    if result.timed_out:
+        echo.error(f"timeout expired, the program has been stopped: {command} {' '.join(args or [])}".rstrip())
+
     if result.return_code != 0 and exit_on_error:
         raise Exit(result.return_code)
 
     return (result.return_code, result.stdout, result.stderr)
 
 
+async def arun(command: Union[str, process.Command, process.Pipeline],
+               args: Optional[Union[str, List[str]]] = None,
+               exit_on_error=True,
+               **options: Any) -> Tuple[int, Optional[str], Optional[str]]:
+    """
+    Executes a program from an ``async def`` command. It accepts the same options as ``alfred.run``.
+    The programs started together run concurrently without a thread for each of them.
+
+    >>> @alfred.command("ci")
+    >>> async def ci():
+    >>>     await asyncio.gather(alfred.arun("pytest tests/units"), alfred.arun("mypy src"), alfred.arun("pylint src"))
+
+    ``timeout`` and the timeout of the command stop the program with its children, the return code is 124.
+    The program is killed if the coroutine is cancelled.
+
+    >>> return_code, stdout, stderr = await alfred.arun("pytest tests/e2e", timeout=600)
+
+    :param command: command, text program or pipeline to execute
+    :param args: arguments of the command
+    :param exit_on_error: break the flow if the exit code is different of 0 (active by default)
+    """
+    if isinstance(args, str):
+        args = [args]
+
+    result = await process.arun(command, args, **options)
+    if result.tree_usage is not None:
+        echo.message(f"process tree: {result.tree_usage}")
+    if result.timed_out:
+        echo.error(f"timeout expired, the program has been stopped: {command} {' '.join(args or [])}".rstrip())
+
+    if result.return_code != 0 and exit_on_error:
+        raise Exit(result.return_code)
+
+    return (result.return_code, result.stdout, result.stderr)
+
+
+def run_async(command: Union[str, process.Command, process.Pipeline],
+              args: Optional[Union[str, List[str]]] = None,
+              **options: Any) -> process.RunningProcess:
+    """
+    Starts a program without waiting for its end, for example a development server that must run
+    while the tests are executed. It accepts the same options as ``alfred.run``.
+
+    >>> server = alfred.run_async("flask run", stream_stdout=False)
+    >>> for line in server:
+    >>>     if "Running on" in line:
+    >>>         break
+    >>> alfred.run("pytest tests/e2e")
+    >>> server.kill()
+
+    The handle gives the state of the program with ``poll``, which returns None while it runs. ``wait`` and ``result``
+    return its ``ProcessResult`` once it has ended, with its return code, its stdout and its stderr.
+
+    >>> tests = alfred.run_async("pytest", stream_stdout=False)
+    >>> while tests.poll() is None:
+    >>>     time.sleep(1)
+    >>> result = tests.result(timeout=60)
+
+    Used as a context manager, the program is terminated when the block ends if it still runs.
+
+    >>> with alfred.run_async("docker compose up") as services:
+    >>>     alfred.run("pytest tests/e2e")
+
+    :param command: command, text program or pipeline to execute
+    :param args: arguments of the command
+    """
+    if isinstance(args, str):
+        args = [args]
+
+    return process.start(command, args, **options)
+
+
+def run_batched(command: Union[str, process.Command, process.Pipeline],  # pylint: disable=too-many-arguments
+                items: List[str],
+                args: Optional[Union[str, List[str]]] = None,
+                chunk_size: Optional[int] = None,
+                jobs: Optional[int] = None,
+                max_arglen: Optional[int] = None,
+                exit_on_error=True,
+                **options: Any) -> Tuple[int, Optional[str], Optional[str]]:
+    """
+    Runs a program on a large list of items, usually files, like ``xargs``. The items are split in batches
+    whose command line fits in the limit of the system (``ARG_MAX``) and the batches run concurrently.
+
+    >>> files = glob.glob("src/**/*.py", recursive=True)
+    >>> alfred.run_batched("black --check", files)
+    >>> alfred.run_batched("pylint", files, args=["--rcfile", "pylintrc"], chunk_size=200, jobs=4)
+
+    The output of a batch is displayed in one piece when it ends. The return code is the first one that is not 0.
+    The result keeps the output of the batches up to 10 MB, each batch is truncated as soon as it ends.
+
+    >>> return_code, stdout, stderr = alfred.run_batched("grep -l TODO", files, exit_on_error=False, stream_stdout=False)
+
+    :param command: command or text program to execute
+    :param items: arguments split between the batches
+    :param args: arguments given to every batch before the items
+    :param chunk_size: maximum number of items of a batch
+    :param jobs: maximum number of batches that run at the same time, the number of CPUs by default
+    :param max_arglen: maximum length of the command line, computed from ``ARG_MAX`` by default
+    :param exit_on_error: break the flow if the exit code is different of 0 (active by default)
+    :param options: options of ``alfred.run`` like ``stream_stdout``, ``env`` or ``cwd``
+    """
+    if isinstance(args, str):
+        args = [args]
+
+    result = process.run_batched(command, items, args, chunk_size=chunk_size, jobs=jobs, max_arglen=max_arglen, **options)
+    if result.return_code != 0 and exit_on_error:
+        raise Exit(result.return_code)
+
+    return (result.return_code, result.stdout, result.stderr)
+
+
+def run_pool(jobs: List[pool.PoolJob],  # pylint: disable=too-many-arguments
+             mem_budget: Optional[Union[str, int]] = None,
+             max_workers: Optional[int] = None,
+             exit_on_error=True,
+             stream_stdout=True,
+             stream_stderr=True,
+             output_mode: Optional[str] = None) -> List[Tuple[int, Optional[str], Optional[str]]]:
+    """
+    Runs many programs concurrently without exceeding a memory budget, for example the test suites of several
+    components on a runner with 16 GB of memory.
+
+    >>> alfred.run_pool(["pytest tests/api", "pytest tests/worker", "mypy src"], mem_budget="12G")
+
+    A program starts only if the peak memory predicted for the running programs stays under ``mem_budget``.
+    The prediction comes from the peaks measured during the last runs of the same command line in the same directory,
+    recorded in ``.alfred/memory.json``. Until a program has been recorded, it counts for the budget divided by ``max_workers``.
+
+    The arguments and the options of ``alfred.run`` of a program are passed as a tuple. The output of a program
+    is displayed in one piece when it ends, or as ``output_mode`` chooses (see ``alfred.invoke_commands``).
+
+    >>> alfred.run_pool([("pytest", ["tests/api"]), ("pytest", ["tests"], {"cwd": "worker", "timeout": 600})], mem_budget="12G", max_workers=8)
+
+    :param jobs: programs to run, with their arguments and their options as a tuple
+    :param mem_budget: memory available to the programs, in bytes or with a unit like ``512M`` or ``12G``
+    :param max_workers: maximum number of programs that run at the same time, the number of CPUs by default
+    :param exit_on_error: break the flow if a program ends with an exit code different of 0 (active by default)
+    :param output_mode: display of the output, ``grouped``, ``prefixed`` or ``dashboard``
+    :return: the return code, the stdout and the stderr of each program, in the order of the jobs
+    """
+    _calling_commmand = alfred_ctx.current_command()
+    project_dir = _calling_commmand.project_dir if _calling_commmand is not None else manifest.lookup_project_dir()
+    results = pool.run_pool(jobs, mem_budget=mem_budget, max_workers=max_workers, project_dir=project_dir,
+                            stream_stdout=stream_stdout, stream_stderr=stream_stderr, output_mode=output_mode)
+    return_code = next((result.return_code for result in results if result.return_code != 0), 0)
+    if return_code != 0 and exit_on_error:
+        raise Exit(return_code)
+
+    return [(result.return_code, result.stdout, result.stderr) for result in results]
+
+
 def invoke_itself(args) -> None:
     """
     invoke one of alfred's own commands from alfred himself
@@ -283,7 +653,7 @@ def _pythonpath(directories: List[str] = None, append_project=True) -> None:
     if directories is None:
         directories = []
 
-    _pythonpath = os.environ.get("PYTHONPATH", "").split(':')
+    _pythonpath = process.environment().get("PYTHONPATH", "").split(':')
     root_directory = project_directory()
     real_directories = [os.path.realpath(directory) for directory in directories]
 
@@ -291,5 +661,5 @@ def _pythonpath(directories: List[str] = None, append_project=True) -> None:
         real_directories += [root_directory]
 
     new_pythonpath = ":".join(real_directories + _pythonpath)
-    with lib.override_env_pythonpath(new_pythonpath):
+    with alfred_ctx.use_env_overlay(PYTHONPATH=new_pythonpath), lib.override_syspath(new_pythonpath):
         yield
@@ -22,6 +22,10 @@ def manifest_definitions():
         ManifestParameter('venv', section='alfred.project', default=None, formatter=_format_path),
         ManifestParameter('venv_dotvenv_ignore', section='alfred.project', default=False),
         ManifestParameter('venv_poetry_ignore', section='alfred.project', default=False),
+        ManifestParameter('cache_size_mb', section='alfred.project', default=1024),
+        ManifestParameter('shims_bypass', section='alfred.project', default=True),
+        ManifestParameter('stop_orphans', section='alfred.project', default=True),
+        ManifestParameter('dependencies', section='alfred.project', default=[], formatter=_format_directory_list, checker=_check_path_list),
     ]
 
 
@@ -317,6 +321,14 @@ def _format_path_list(value: Any, project_dir: str) -> List[str]:  # pylint: dis
 
     return values
 
+def _format_directory_list(value: Any, project_dir: str) -> List[str]:
+    """
+    format a list of path read from the manifest as absolute paths, the relative paths are resolved
+    from the project directory.
+    """
+    return [_format_path(item, project_dir) for item in value]
+
+
 def _format_path(value: Any, project_dir: str) -> Optional[str]:
     """
     format a path read from the manifest to use the separator from the current OS.
@@ -1,7 +1,7 @@
 import contextlib
 from typing import ContextManager
 
-from alfred import ctx, lib
+from alfred import ctx, dependencies, file_index, lib, lifecycle, manifest, progress
 
 
 @contextlib.contextmanager
@@ -9,9 +9,24 @@ def command_middleware() -> ContextManager:
     """
     the context code is executed before executing
     the user's target command.
+
+    The PATH and PYTHONPATH of the project are applied as an overlay to the programs started by the command,
+    ``os.environ`` is not modified. Only sys.path is changed to import the project modules in the interpreter.
+
+    The dependencies declared with ``@alfred.command(depends=...)`` are executed before the command.
+    The snapshots taken with ``alfred.changed_since`` are recorded only if the command succeeds.
+    The ``timeout`` of the command covers its dependencies and the programs it starts, as its priority and its resource limits.
+    The durations of the subcommands are recorded to display the progress of the next runs.
+    The processes left by the programs are adopted to be stopped when alfred exits, see ``alfred.lifecycle``.
     """
     pythonpath = ctx.env_pythonpath()
     path = ctx.env_path()
-    with lib.override_env_pythonpath(pythonpath):
-        with lib.override_env_path(path):
-            yield
+    command = ctx.current_command()
+    if manifest.lookup_parameter_project('stop_orphans', command.project_dir) is not False:
+        lifecycle.adopt_orphans()
+
+    with ctx.use_env_overlay(PYTHONPATH=pythonpath, PATH=path), ctx.use_timeout(command.timeout), ctx.use_process_limits(**command.process_limits):
+        with lib.override_syspath(pythonpath):
+            dependencies.run_dependencies(command)
+            with file_index.record_snapshots_on_success(), progress.track_pipeline(command):
+                yield
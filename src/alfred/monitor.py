@@ -0,0 +1,221 @@
+"""
+This module samples the tree of processes of a running program through ``/proc`` on linux. Unlike ``os.wait4``,
+it sees the descendants the program does not wait for, like the workers of pytest-xdist or the jobs of a compiler,
+and the descendants that have left their parent.
+
+>>> result = process.run("pytest -n 8", sample_interval=0.5)
+>>> # result.tree_usage.peak_rss, result.tree_usage.average_cpu, result.tree_usage.timeline
+
+Each sample is written as a line of a timeline file in ``.alfred/monitor`` of the project of the running command.
+Only the last ``MAX_TIMELINES`` timelines are kept.
+
+>>> # {"time": 1.5, "cpu": 387.2, "rss": 1288372224, "processes": 9}
+"""
+import contextlib
+import dataclasses
+import json
+import os
+import threading
+import time
+from typing import Dict, List, Optional, Tuple, IO, ContextManager
+
+import alfred.os
+from alfred import ctx, logger, state
+
+PROC_DIRECTORY = '/proc'
+MONITOR_DIRECTORY = 'monitor'
+MAX_TIMELINES = 50
+
+
+@dataclasses.dataclass
+class TreeUsage:
+    """
+    The resources used by the tree of processes of a program during its execution. The CPU is given in percent
+    of one core, a tree that keeps 4 cores busy uses 400%.
+    """
+    samples: int
+    peak_cpu: float
+    average_cpu: float
+    peak_rss: int
+    average_rss: int
+    peak_processes: int
+    timeline: Optional[str] = None
+
+    def __str__(self) -> str:
+        return f"cpu peak {self.peak_cpu:.0f}% average {self.average_cpu:.0f}%, " \
+               f"rss peak {self.peak_rss / (1024 * 1024):.1f} MB average {self.average_rss / (1024 * 1024):.1f} MB, " \
+               f"{self.peak_processes} processes at most"
+
+
+class TreeSampler:  # pylint: disable=too-many-instance-attributes
+    """
+    Samples the processes started from a list of programs in a dedicated thread.
+
+    >>> sampler = monitor.TreeSampler([pid.pid], interval=0.5, timeline_path="timeline.jsonl")
+    >>> sampler.start()
+    >>> tree_usage = sampler.stop()
+    """
+
+    def __init__(self, root_pids: List[int], interval: float, timeline_path: Optional[str] = None):
+        self.root_pids = root_pids
+        self.interval = interval
+        self.timeline_path = timeline_path
+        self._stop_event = threading.Event()
+        self._thread = threading.Thread(target=self._run_sampling, daemon=True)
+        self._samples: List[Tuple[float, int, int]] = []
+        self._tracked: Dict[int, int] = {}
+        self._cpu_ticks: Dict[Tuple[int, int], int] = {}
+        self._clock_ticks = os.sysconf('SC_CLK_TCK')  # pylint: disable=no-member
+        self._page_size = os.sysconf('SC_PAGE_SIZE')  # pylint: disable=no-member
+
+    def start(self) -> None:
+        self._thread.start()
+
+    def stop(self) -> Optional[TreeUsage]:
+        """
+        Stops the sampling and summarises the samples.
+
+        :return: None if no sample has been taken
+        """
+        self._stop_event.set()
+        self._thread.join()
+        if len(self._samples) == 0:
+            return None
+
+        return TreeUsage(samples=len(self._samples),
+                         peak_cpu=max(cpu for cpu, _, _ in self._samples),
+                         average_cpu=sum(cpu for cpu, _, _ in self._samples) / len(self._samples),
+                         peak_rss=max(rss for _, rss, _ in self._samples),
+                         average_rss=sum(rss for _, rss, _ in self._samples) // len(self._samples),
+                         peak_processes=max(processes for _, _, processes in self._samples),
+                         timeline=self.timeline_path)
+
+    def _run_sampling(self) -> None:
+        started_at = time.monotonic()
+        last_sample_at = started_at
+        with _open_timeline(self.timeline_path) as timeline:
+            while not self._stop_event.wait(self.interval):
+                now = time.monotonic()
+                cpu, rss, processes = self._sample(now - last_sample_at)
+                last_sample_at = now
+                if processes == 0:
+                    continue
+
+                self._samples.append((cpu, rss, processes))
+                if timeline is not None:
+                    timeline.write(json.dumps({'time': round(now - started_at, 3), 'cpu': round(cpu, 1), 'rss': rss, 'processes': processes}) + '\n')
+                    timeline.flush()
+
+    def _sample(self, elapsed: float) -> Tuple[float, int, int]:
+        stats = _read_stats()
+        members = self._tree_members(stats)
+
+        cpu_ticks = 0
+        rss = 0
+        for pid in members:
+            _, _, ticks, starttime, rss_pages = stats[pid]
+            previous_ticks = self._cpu_ticks.get((pid, starttime))
+            # the first sample of a process counts the time since its start
+            cpu_ticks += ticks - previous_ticks if previous_ticks is not None else ticks
+            self._cpu_ticks[(pid, starttime)] = ticks
+            rss += rss_pages * self._page_size
+
+        cpu = 100.0 * cpu_ticks / self._clock_ticks / elapsed if elapsed > 0 else 0.0
+        return cpu, rss, len(members)
+
+    def _tree_members(self, stats: Dict[int, Tuple[str, int, int, int, int]]) -> List[int]:
+        """
+        Walks the tree from the root programs. The processes seen in a previous sample remain members
+        as long as they run, even once they have left their parent.
+        """
+        children: Dict[int, List[int]] = {}
+        for pid, (_, ppid, _, _, _) in stats.items():
+            children.setdefault(ppid, []).append(pid)
+
+        members = set()
+        pending = [pid for pid in self.root_pids if pid in stats]
+        pending += [pid for pid, starttime in self._tracked.items() if pid in stats and stats[pid][3] == starttime]
+        while len(pending) > 0:
+            pid = pending.pop()
+            if pid not in members:
+                members.add(pid)
+                pending.extend(children.get(pid, []))
+
+        running = [pid for pid in members if stats[pid][0] != 'Z']
+        self._tracked = {pid: stats[pid][3] for pid in running}
+        return running
+
+
+def supported() -> bool:
+    """
+    The sampling relies on ``/proc``, it is available on linux only.
+    """
+    return alfred.os.is_linux() and os.path.isdir(PROC_DIRECTORY)
+
+
+def default_timeline_path(name: str) -> Optional[str]:
+    """
+    Returns the path of a new timeline file in the state directory of the running command,
+    None outside of a command. The oldest timelines are removed to keep ``MAX_TIMELINES`` of them.
+    """
+    command = ctx.current_command()
+    if command is None:
+        return None
+
+    filename = f"{time.strftime('%Y%m%d-%H%M%S')}-{os.getpid()}-{threading.get_ident()}-{os.path.basename(name)}.jsonl"
+    timeline_path = state.path(command.project_dir, f"{MONITOR_DIRECTORY}/{filename}")
+    _remove_old_timelines(os.path.dirname(timeline_path), MAX_TIMELINES - 1)
+    return timeline_path
+
+
+def _read_stats() -> Dict[int, Tuple[str, int, int, int, int]]:
+    """
+    Reads the state, the parent, the cpu ticks, the start time and the resident pages of every process.
+    """
+    stats = {}
+    for entry in os.listdir(PROC_DIRECTORY):
+        if not entry.isdigit():
+            continue
+
+        try:
+            # the name of a program is not always valid utf-8
+            with open(os.path.join(PROC_DIRECTORY, entry, 'stat'), encoding='utf-8', errors='replace') as filep:
+                content = filep.read()
+        except OSError:
+            # the process has ended since the listing
+            continue
+
+        # the name of the program is between parentheses and may contain spaces
+        fields = content.rsplit(')', 1)[1].split()
+        stats[int(entry)] = (fields[0], int(fields[1]), int(fields[11]) + int(fields[12]), int(fields[19]), int(fields[21]))
+
+    return stats
+
+
+def _remove_old_timelines(directory: str, kept: int) -> None:
+    timelines = []
+    for filename in os.listdir(directory):
+        try:
+            timelines.append((os.path.getmtime(os.path.join(directory, filename)), filename))
+        except OSError:
+            # another alfred process has removed it meanwhile
+            continue
+
+    timelines.sort(reverse=True)
+    for _, filename in timelines[kept:]:
+        try:
+            os.remove(os.path.join(directory, filename))
+        except OSError:
+            continue
+
+
+@contextlib.contextmanager
+def _open_timeline(path: Optional[str]) -> ContextManager[Optional[IO]]:
+    if path is None:
+        yield None
+        return
+
+    with open(path, 'w', encoding='utf-8') as filep:
+        yield filep
+
+    logger.debug(f"timeline of the process tree written in {path}")
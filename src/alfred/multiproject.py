@@ -0,0 +1,138 @@
+"""
+This module runs a command in several projects of a mono-repository at the same time, each project
+in its own alfred process with its own virtual environment.
+
+>>> projects = multiproject.affected_projects("origin/main", project.list_all())
+>>> results = multiproject.run_command(projects, "tests", [])
+"""
+import fnmatch
+import functools
+import os
+from typing import List, Set, Optional
+
+import click
+
+from alfred import commands, echo, interpreter, logger, manifest, parallel, process
+from alfred.domain.project import AlfredProject
+
+
+def run_command(projects: List[AlfredProject], command: str, args: List[str], max_workers: Optional[int] = None) -> List[parallel.JobResult]:
+    """
+    Runs a command in each project that declares it. The projects run concurrently, the output of
+    each project is displayed in one piece when it ends, unless an other mode is chosen with ``alfred --output``.
+    A failure does not stop the other projects.
+
+    >>> results = multiproject.run_command(project.list_all(), "tests", ["--verbose"], max_workers=4)
+    """
+    if max_workers is None:
+        max_workers = os.cpu_count()
+
+    jobs = []
+    for _project in projects:
+        if commands.lookup(command, os.path.realpath(_project.directory)) is not None:
+            jobs.append(job(_project, command, args))
+        else:
+            logger.debug(f"project {_project.name} does not declare the command {command}")
+
+    return parallel.run_jobs(jobs, max_workers=max_workers, fail_fast=False)
+
+
+def job(project: AlfredProject, command: str, args: List[str]) -> parallel.Job:
+    """
+    Prepares the invocation of a command in the alfred process of a project.
+    """
+    project_dir = os.path.realpath(project.directory)
+    venv = interpreter.venv_lookup(project_dir)
+    return parallel.Job(name=project.name,
+                        title=f"$ alfred {command} ({project.name})",
+                        start=functools.partial(interpreter.start_module, 'alfred.cli', venv, [command] + args,
+                                                cwd=project_dir))
+
+
+def select_projects(projects: List[AlfredProject], pattern: str, root_dir: str) -> List[AlfredProject]:
+    """
+    Selects the projects whose name or directory relative to the main project matches a glob pattern.
+
+    >>> projects = multiproject.select_projects(project.list_all(), "products/*", project_dir)
+    """
+    selection = []
+    for _project in projects:
+        directory = os.path.relpath(os.path.realpath(_project.directory), os.path.realpath(root_dir))
+        if fnmatch.fnmatch(_project.name, pattern) or fnmatch.fnmatch(directory.replace(os.sep, '/'), pattern):
+            selection.append(_project)
+
+    return selection
+
+
+def display_summary(results: List[parallel.JobResult]) -> None:
+    """
+    Displays the exit code and the duration of the command in each project.
+
+    >>> multiproject.display_summary(results)
+    >>> # project     exit code    duration
+    >>> # product1    0            12.3s
+    >>> # product2    1            4.5s
+    """
+    rows = [(result.name, 'cancelled' if result.cancelled else str(result.return_code), f"{result.duration:.1f}s") for result in results]
+    widths = [max(len(row[column]) for row in rows + [('project', 'exit code', 'duration')]) for column in range(3)]
+    echo.subcommand('  '.join(title.ljust(width) for title, width in zip(('project', 'exit code', 'duration'), widths)).rstrip())
+    for result, row in zip(results, rows):
+        line = '  '.join(value.ljust(width) for value, width in zip(row, widths)).rstrip()
+        echo.message(click.style(line, fg='green' if result.succeeded else 'red'))
+
+
+def affected_projects(base_ref: str, projects: List[AlfredProject]) -> List[AlfredProject]:
+    """
+    Selects the projects affected by the changes of the working tree since a git reference. A project is
+    affected if one of its files has changed or if one of the directories it declares in ``dependencies``
+    contains a change, including the directory of an affected project.
+
+    >>> projects = multiproject.affected_projects("origin/main", project.list_all())
+    """
+    paths = changed_files(base_ref)
+    directories = {_project.name: os.path.realpath(_project.directory) for _project in projects}
+    affected: Set[str] = set()
+    for path in paths:
+        # a file belongs to the deepest project that contains it
+        owners = [name for name, directory in directories.items() if _contains(directory, path)]
+        if len(owners) > 0:
+            affected.add(max(owners, key=lambda name: len(directories[name])))
+
+    dependencies = {_project.name: manifest.lookup_parameter_project('dependencies', _project.directory) for _project in projects}
+    has_changed = True
+    while has_changed:
+        has_changed = False
+        for name, project_dependencies in dependencies.items():
+            affected_paths = paths + [directories[other] for other in affected]
+            if name not in affected and any(_contains(dependency, path) for dependency in project_dependencies for path in affected_paths):
+                affected.add(name)
+                has_changed = True
+
+    return [_project for _project in projects if _project.name in affected]
+
+
+def changed_files(base_ref: str) -> List[str]:
+    """
+    Lists the files of the git working tree created, modified or deleted since the common ancestor of
+    ``base_ref`` and ``HEAD``, including the uncommitted changes and the untracked files.
+
+    :return: the absolute path of the files
+    """
+    git = process.sh("git", "git is required to detect the changes")
+    root = _git(git, ["rev-parse", "--show-toplevel"]).strip()
+    merge_base = _git(git, ["merge-base", base_ref, "HEAD"]).strip()
+    paths = _git(git, ["diff", "--name-only", merge_base]).splitlines()
+    paths += _git(git, ["ls-files", "--others", "--exclude-standard", "--full-name"], cwd=root).splitlines()
+    return sorted({os.path.realpath(os.path.join(root, path)) for path in paths if path != ''})
+
+
+def _git(git: process.Command, args: List[str], cwd: Optional[str] = None) -> str:
+    result = process.run(git, args, stream_stdout=False, stream_stderr=False, cwd=cwd)
+    if result.return_code != 0:
+        raise click.ClickException(f"git {' '.join(args)} failed: {result.stderr.strip()}")
+
+    return result.stdout
+
+
+def _contains(directory: str, path: str) -> bool:
+    return path == directory or path.startswith(directory + os.sep)
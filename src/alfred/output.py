@@ -0,0 +1,339 @@
+"""
+This module routes the output of the jobs that run at the same time to the terminal, without mixing their lines.
+
+* ``grouped`` displays the output of a job in one piece when it ends, it's the default
+* ``prefixed`` displays each line as soon as it arrives, prefixed by the name of its job
+* ``dashboard`` displays the last line of each running job at the bottom of the terminal and the output of a job in one piece when it ends
+
+>>> with output.OutputRouter("prefixed") as router:
+>>>     job_output = router.job("lint", "$ alfred lint")
+>>>     with output.use_job_output(job_output):
+>>>         result = process.run("pylint src")
+>>>     job_output.end(result.stdout, result.stderr)
+>>> # [lint] $ alfred lint
+>>> # [lint] Your code has been rated at 10.00/10
+
+The lines are written to the terminal by a single thread that batches them, a job that writes a lot
+does not slow down the others.
+"""
+import contextlib
+import contextvars
+import io
+import shutil
+import sys
+import threading
+from typing import ContextManager, Dict, IO, List, Optional, Tuple
+
+import click
+
+from alfred import ctx
+
+MODES = ['grouped', 'prefixed', 'dashboard']
+
+"""
+Delay in seconds during which the writes are gathered before being written to the terminal.
+"""
+FLUSH_INTERVAL = 0.05
+
+PREFIX_COLORS = ['cyan', 'magenta', 'yellow', 'blue', 'green', 'red']
+
+
+class TerminalWriter:  # pylint: disable=too-many-instance-attributes
+    """
+    Writes to the terminal from a dedicated thread. The writes gathered during ``interval`` are written at once.
+
+    The writer keeps a footer of a few lines below the output, redrawn after each write.
+
+    >>> writer = output.TerminalWriter()
+    >>> writer.write("hello\\n")
+    >>> writer.close()
+    """
+
+    def __init__(self, interval: float = FLUSH_INTERVAL):
+        self.interval = interval
+        self._condition = threading.Condition()
+        self._pending: List[Tuple[bool, str]] = []
+        self._footer: List[str] = []
+        self._footer_changed = False
+        self._drawn_footer = 0
+        self._closed = False
+        self._thread = threading.Thread(target=self._run_writes, daemon=True)
+        self._thread.start()
+
+    def write(self, text: str, err: bool = False) -> None:
+        with self._condition:
+            self._pending.append((err, text))
+            self._condition.notify_all()
+
+    def set_footer(self, lines: List[str]) -> None:
+        with self._condition:
+            self._footer = lines
+            self._footer_changed = True
+            self._condition.notify_all()
+
+    def close(self) -> None:
+        """
+        Writes the pending output and stops the writer.
+        """
+        with self._condition:
+            self._closed = True
+            self._condition.notify_all()
+
+        self._thread.join()
+
+    def _run_writes(self) -> None:
+        while True:
+            with self._condition:
+                self._condition.wait_for(lambda: len(self._pending) > 0 or self._footer_changed or self._closed)
+                # the writes that follow closely are written with this one
+                self._condition.wait_for(lambda: self._closed, timeout=self.interval)
+                pending, self._pending = self._pending, []
+                footer, footer_changed = self._footer, self._footer_changed
+                self._footer_changed = False
+                closed = self._closed
+
+            self._flush(pending, footer if not closed else [], footer_changed or closed)
+            if closed:
+                return
+
+    def _flush(self, pending: List[Tuple[bool, str]], footer: List[str], footer_changed: bool) -> None:
+        if len(pending) == 0 and not footer_changed:
+            return
+
+        if self._drawn_footer > 0:
+            # moves the cursor to the first line of the footer and clears it
+            click.echo(f"\x1b[{self._drawn_footer}F\x1b[J", nl=False)
+            self._drawn_footer = 0
+
+        # the consecutive writes on the same stream are written in one call
+        batches: List[Tuple[bool, List[str]]] = []
+        for err, text in pending:
+            if len(batches) > 0 and batches[-1][0] == err:
+                batches[-1][1].append(text)
+            else:
+                batches.append((err, [text]))
+
+        for err, texts in batches:
+            click.echo(''.join(texts), nl=False, err=err)
+
+        if len(footer) > 0:
+            click.echo(''.join(f"{line}\n" for line in footer), nl=False)
+            self._drawn_footer = len(footer)
+
+
+class JobOutput:  # pylint: disable=too-many-instance-attributes
+    """
+    The output of a job, its ``stdout`` and ``stderr`` streams are given to the programs it starts.
+    """
+
+    def __init__(self, router: 'OutputRouter', name: str, title: str, color: str):
+        self.name = name
+        self.title = title
+        self.color = color
+        self.stdout = _JobStream(self, err=False)
+        self.stderr = _JobStream(self, err=True)
+        self.entries: List[Tuple[bool, str]] = []
+        self.last_line = ''
+        self.streamed = False
+        self.router = router
+
+    def end(self, stdout: Optional[str] = None, stderr: Optional[str] = None, display: bool = True) -> None:
+        """
+        Ends the job. ``stdout`` and ``stderr`` are displayed if the job has not written anything in its streams,
+        when its programs have not streamed their output.
+        """
+        self.stdout.flush_line()
+        self.stderr.flush_line()
+        if not self.streamed:
+            for err, text in ((False, stdout), (True, stderr)):
+                for line in (text or '').splitlines(keepends=True):
+                    self.router.route(self, line, err)
+
+        self.router.end(self, display)
+
+
+class OutputRouter:
+    """
+    Routes the output of concurrent jobs in one of the ``MODES``, the mode of the invocation by default.
+
+    The dashboard needs a terminal, it falls back on the ``grouped`` mode otherwise.
+    """
+
+    def __init__(self, mode: Optional[str] = None):
+        if mode is None:
+            mode = ctx.output_mode()
+
+        if mode not in MODES:
+            raise click.ClickException(f"invalid output mode: {mode}, expected one of {', '.join(MODES)}")
+
+        if mode == 'dashboard' and not sys.stdout.isatty():
+            mode = 'grouped'
+
+        self.mode = mode
+        self._writer = TerminalWriter()
+        self._lock = threading.Lock()
+        self._jobs = 0
+        self._running: Dict[int, JobOutput] = {}
+
+    def __enter__(self) -> 'OutputRouter':
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def job(self, name: str, title: Optional[str] = None) -> JobOutput:
+        """
+        Registers a job that starts.
+        """
+        with self._lock:
+            job_output = JobOutput(self, name, title if title is not None else f"$ {name}", PREFIX_COLORS[self._jobs % len(PREFIX_COLORS)])
+            self._jobs += 1
+            self._running[id(job_output)] = job_output
+            if self.mode == 'prefixed':
+                self._writer.write(click.style(f"[{name}] {job_output.title}", fg=job_output.color, bold=True) + '\n')
+            elif self.mode == 'dashboard':
+                self._draw_dashboard()
+
+        return job_output
+
+    def route(self, job_output: JobOutput, line: str, err: bool) -> None:
+        with self._lock:
+            job_output.streamed = True
+            if self.mode == 'prefixed':
+                self._writer.write(click.style(f"[{job_output.name}] ", fg=job_output.color) + line, err)
+                return
+
+            job_output.entries.append((err, line))
+            if self.mode == 'dashboard':
+                job_output.last_line = line.rstrip()
+                self._draw_dashboard()
+
+    def end(self, job_output: JobOutput, display: bool) -> None:
+        with self._lock:
+            self._running.pop(id(job_output), None)
+            if self.mode in ('grouped', 'dashboard') and display:
+                self._writer.write(click.style(job_output.title, fg="green", bold=True) + '\n')
+                for err, line in job_output.entries:
+                    self._writer.write(line, err)
+
+            if self.mode == 'dashboard':
+                self._draw_dashboard()
+
+    def close(self) -> None:
+        self._writer.close()
+
+    def _draw_dashboard(self) -> None:
+        width = max(20, shutil.get_terminal_size().columns - 1)
+        lines = []
+        for job_output in self._running.values():
+            prefix = f"[{job_output.name}] "
+            lines.append(click.style(prefix, fg=job_output.color) + job_output.last_line[:max(0, width - len(prefix))])
+
+        self._writer.set_footer(lines)
+
+
+class _JobStream:
+    """
+    A text stream that routes the complete lines written to it, the end of an incomplete line waits for the next writes.
+    """
+
+    def __init__(self, job_output: JobOutput, err: bool):
+        self.job_output = job_output
+        self.err = err
+        self._partial = ''
+
+    def write(self, text: str) -> int:
+        lines = (self._partial + text).splitlines(keepends=True)
+        self._partial = lines.pop() if len(lines) > 0 and not lines[-1].endswith(('\n', '\r')) else ''
+        for line in lines:
+            self.job_output.router.route(self.job_output, line, self.err)
+
+        return len(text)
+
+    def flush(self) -> None:
+        pass
+
+    def flush_line(self) -> None:
+        """
+        Routes the last incomplete line.
+        """
+        if self._partial != '':
+            partial, self._partial = self._partial, ''
+            self.job_output.router.route(self.job_output, partial + '\n', self.err)
+
+
+_job_output_var: contextvars.ContextVar[Optional[JobOutput]] = contextvars.ContextVar('alfred_job_output', default=None)
+_recording_var: contextvars.ContextVar[Optional[Tuple[IO, IO]]] = contextvars.ContextVar('alfred_recording', default=None)
+
+
+@contextlib.contextmanager
+def use_job_output(job_output: JobOutput) -> ContextManager[None]:
+    """
+    Streams the output of the programs started in the context to a job instead of the terminal.
+    """
+    token = _job_output_var.set(job_output)
+    try:
+        yield
+    finally:
+        _job_output_var.reset(token)
+
+
+@contextlib.contextmanager
+def record() -> ContextManager[Tuple[io.StringIO, io.StringIO]]:
+    """
+    Records the output of the programs started in the context while still streaming it. The recording is bound
+    to the context, the jobs that run at the same time record their own output. What a command writes
+    with ``print`` is not recorded.
+
+    >>> with output.record() as (stdout, stderr):
+    >>>     process.run("echo hello")
+    >>> print(stdout.getvalue())  # hello
+    """
+    stdout = io.StringIO()
+    stderr = io.StringIO()
+    token = _recording_var.set((_TeeStream(stdout_stream(), stdout), _TeeStream(stderr_stream(), stderr)))
+    try:
+        yield stdout, stderr
+    finally:
+        _recording_var.reset(token)
+
+
+def stdout_stream() -> IO:
+    """
+    Returns the stream where the output of the programs is streamed, the output of the current job or the terminal.
+    """
+    recording = _recording_var.get()
+    if recording is not None:
+        return recording[0]
+
+    job_output = _job_output_var.get()
+    return job_output.stdout if job_output is not None else sys.stdout
+
+
+def stderr_stream() -> IO:
+    recording = _recording_var.get()
+    if recording is not None:
+        return recording[1]
+
+    job_output = _job_output_var.get()
+    return job_output.stderr if job_output is not None else sys.stderr
+
+
+class _TeeStream:
+    """
+    A text stream that writes to a stream and records what is written.
+    """
+
+    def __init__(self, stream: IO, recorded: io.StringIO):
+        self.stream = stream
+        self.recorded = recorded
+
+    def write(self, text: str) -> int:
+        self.recorded.write(text)
+        return self.stream.write(text)
+
+    def flush(self) -> None:
+        self.stream.flush()
+
+    def __getattr__(self, name):
+        return getattr(self.stream, name)
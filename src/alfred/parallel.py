@@ -0,0 +1,177 @@
+"""
+This module runs jobs concurrently in a pool of workers. A job is a program started in its own subprocess,
+for example an alfred command invoked in the interpreter of its project.
+
+>>> jobs = [parallel.Job("lint", lambda: process.start("pylint src"))]
+>>> results = parallel.run_jobs(jobs, max_workers=4)
+
+The output that a job streams is routed by ``alfred.output``, grouped by job, prefixed by the name of the job
+or on a dashboard.
+
+>>> results = parallel.run_jobs(jobs, max_workers=4, output_mode="prefixed")
+"""
+import dataclasses
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, Future, wait, FIRST_COMPLETED
+from typing import Callable, List, Optional, Dict
+
+from alfred import ctx, output, process
+
+
+@dataclasses.dataclass
+class Job:
+    name: str
+    start: Callable[[], process.RunningProcess]
+    title: Optional[str] = None
+
+
+@dataclasses.dataclass
+class JobResult:
+    name: str
+    result: Optional[process.ProcessResult] = None
+    cancelled: bool = False
+    duration: float = 0.0
+    ended_at: float = 0.0
+
+    @property
+    def return_code(self) -> Optional[int]:
+        return self.result.return_code if self.result is not None else None
+
+    @property
+    def failed(self) -> bool:
+        return not self.cancelled and self.return_code != 0
+
+    @property
+    def succeeded(self) -> bool:
+        return not self.cancelled and self.return_code == 0
+
+
+def run_jobs(jobs: List[Job], max_workers: Optional[int] = None, fail_fast: bool = True, output_mode: Optional[str] = None) -> List[JobResult]:
+    """
+    Runs jobs concurrently with at most ``max_workers`` jobs at the same time. The output of the jobs is displayed
+    according to ``output_mode``, the mode of the invocation by default (``alfred --output``). In the mode ``grouped``,
+    the output of a job is displayed in one piece when it ends, the outputs of the jobs are never interleaved.
+
+    If ``fail_fast`` is enabled, the first failure stops the jobs that are running and
+    cancels the jobs that have not started yet.
+
+    The results are returned in the order of the jobs.
+
+    >>> results = parallel.run_jobs(jobs, max_workers=4)
+    >>> failure = parallel.first_failure(results)
+    """
+    return run_graph(jobs, {}, max_workers=max_workers, fail_fast=fail_fast, output_mode=output_mode)
+
+
+def run_graph(jobs: List[Job], dependencies: Dict[str, List[str]], max_workers: Optional[int] = None, fail_fast: bool = True,  # pylint: disable=too-many-locals
+              output_mode: Optional[str] = None) -> List[JobResult]:
+    """
+    Runs jobs that depend on each other. A job starts as soon as all its dependencies have succeeded,
+    the jobs whose dependencies are met run concurrently. A job whose dependency has failed is cancelled.
+
+    ``dependencies`` maps the name of a job to the names of the jobs it depends on. A dependency that is
+    not in ``jobs`` is considered as met. The graph must not contain any cycle.
+
+    >>> results = parallel.run_graph(jobs, {"dist": ["lint", "tests"]}, max_workers=4)
+    """
+    router = output.OutputRouter(output_mode)
+    scheduler = _Scheduler(fail_fast, router)
+    names = {job.name for job in jobs}
+    pending = list(jobs)
+    results: Dict[str, JobResult] = {}
+    with router, ThreadPoolExecutor(max_workers=max_workers) as executor:
+        futures: Dict[Future, str] = {}
+        try:
+            while len(pending) > 0 or len(futures) > 0:
+                for job in list(pending):
+                    job_dependencies = [name for name in dependencies.get(job.name, []) if name in names]
+                    if any(name in results and not results[name].succeeded for name in job_dependencies):
+                        results[job.name] = JobResult(job.name, cancelled=True)
+                        pending.remove(job)
+                    elif all(name in results for name in job_dependencies):
+                        futures[executor.submit(ctx.bind(scheduler.run_job), job)] = job.name
+                        pending.remove(job)
+
+                if len(futures) == 0:
+                    # the remaining jobs wait on each other, it's a cycle
+                    for job in pending:
+                        results[job.name] = JobResult(job.name, cancelled=True)
+                    break
+
+                done, _ = wait(futures, return_when=FIRST_COMPLETED)
+                for future in done:
+                    results[futures.pop(future)] = future.result()
+        except BaseException:
+            scheduler.cancel()
+            raise
+
+    return [results[job.name] for job in jobs]
+
+
+def first_failure(results: List[JobResult]) -> Optional[JobResult]:
+    """
+    Returns the job that failed first, the cancelled jobs are ignored.
+
+    >>> failure = parallel.first_failure(results)
+    >>> if failure is not None:
+    >>>     raise Exit(failure.return_code)
+    """
+    failures = [result for result in results if result.failed]
+    if len(failures) == 0:
+        return None
+
+    return min(failures, key=lambda result: result.ended_at)
+
+
+class _Scheduler:
+
+    def __init__(self, fail_fast: bool, router: output.OutputRouter):
+        self.fail_fast = fail_fast
+        self.router = router
+        self._lock = threading.Lock()
+        self._cancelled = False
+        self._running: Dict[int, process.RunningProcess] = {}
+
+    def run_job(self, job: Job) -> JobResult:
+        with self._lock:
+            if self._cancelled:
+                return JobResult(job.name, cancelled=True)
+
+        # the start of a job may take time, the other jobs end and get cancelled meanwhile
+        started_at = time.monotonic()
+        job_output = self.router.job(job.name, job.title)
+        try:
+            with output.use_job_output(job_output):
+                running_process = job.start()
+        except BaseException:
+            job_output.end(display=False)
+            raise
+
+        with self._lock:
+            self._running[id(job)] = running_process
+            if self._cancelled:
+                # the jobs have been cancelled while this one was starting
+                running_process.terminate()
+
+        result = running_process.wait()
+        ended_at = time.monotonic()
+        with self._lock:
+            del self._running[id(job)]
+            cancelled = self._cancelled and result.return_code != 0
+            job_result = JobResult(job.name, result, cancelled, ended_at - started_at, ended_at)
+            job_output.end(result.stdout, result.stderr, display=not cancelled)
+
+            if job_result.failed and self.fail_fast:
+                self._cancel()
+
+        return job_result
+
+    def cancel(self) -> None:
+        with self._lock:
+            self._cancel()
+
+    def _cancel(self) -> None:
+        self._cancelled = True
+        for running_process in self._running.values():
+            running_process.terminate()
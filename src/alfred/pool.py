@@ -0,0 +1,202 @@
+"""
+This module runs many programs concurrently within a memory budget. A program starts only while the peak memory
+predicted for the running programs stays under the budget. The prediction of a program is the highest peak of
+its last runs, recorded in ``.alfred/memory.json`` under a fingerprint of its command line and its working directory.
+
+>>> results = pool.run_pool(["pytest tests/api", "pytest tests/worker", "mypy src"], mem_budget="12G", project_dir=project_dir)
+
+A program that has never been recorded gets a fair share of the budget, the budget divided by the number of workers.
+A program is always admitted when nothing else runs, even if its prediction exceeds the budget.
+"""
+import hashlib
+import json
+import os
+import re
+from concurrent.futures import ThreadPoolExecutor, Future, wait, FIRST_COMPLETED
+from typing import Any, Dict, List, Optional, Tuple, Union
+
+import click
+
+from alfred import ctx, logger, monitor, output, process, state
+
+MEMORY_ENTRY = 'memory.json'
+LOCK_ENTRY = 'memory.lock'
+MAX_RECORDED_PEAKS = 5
+
+"""
+Interval in seconds between two samples of the memory of a program, when the tree of processes can be sampled.
+"""
+SAMPLE_INTERVAL = 0.5
+
+SIZE_UNITS = {'': 1, 'K': 1024, 'M': 1024 ** 2, 'G': 1024 ** 3, 'T': 1024 ** 4}
+
+PoolJob = Union[str, process.Command, process.Pipeline,
+                Tuple[Union[str, process.Command, process.Pipeline], Optional[List[str]]],
+                Tuple[Union[str, process.Command, process.Pipeline], Optional[List[str]], Dict[str, Any]]]
+
+
+def run_pool(jobs: List[PoolJob],  # pylint: disable=too-many-arguments,too-many-locals
+             mem_budget: Optional[Union[str, int]] = None,
+             max_workers: Optional[int] = None,
+             project_dir: Optional[str] = None,
+             stream_stdout: bool = True,
+             stream_stderr: bool = True,
+             output_mode: Optional[str] = None) -> List[process.ProcessResult]:
+    """
+    Runs programs concurrently, with at most ``max_workers`` programs at the same time and a predicted peak memory
+    under ``mem_budget``. A job is a program with optional arguments and options of ``process.start``.
+
+    >>> results = pool.run_pool(["mypy src", ("pytest", ["tests/api"], {"cwd": "api"})], mem_budget="12G", max_workers=8)
+
+    The output of the programs is displayed according to ``output_mode`` (see ``alfred.output``), in one piece
+    per program when it ends by default. The results are returned in the order of the jobs.
+
+    :param jobs: programs to run, with their arguments and their options as a tuple
+    :param mem_budget: memory available to the programs, in bytes or with a unit like ``512M`` or ``12G``
+    :param max_workers: maximum number of programs that run at the same time, the number of CPUs by default
+    :param project_dir: project whose state directory keeps the peaks of memory, nothing is recorded if None
+    :param output_mode: display of the output, ``grouped``, ``prefixed`` or ``dashboard``
+    """
+    if max_workers is None:
+        max_workers = os.cpu_count()
+
+    budget = parse_size(mem_budget) if mem_budget is not None else None
+    invocations = [_invocation(job) for job in jobs]
+    pipelines = [process.pipe(command, args) for command, args, _ in invocations]
+    fingerprints = [fingerprint(pipeline, options.get('cwd')) for pipeline, (_, _, options) in zip(pipelines, invocations)]
+    history = (state.read_json(project_dir, MEMORY_ENTRY) or {}) if project_dir is not None else {}
+    predictions = [predicted_rss(history, _fingerprint, budget, max_workers) for _fingerprint in fingerprints]
+
+    router = output.OutputRouter(output_mode)
+    names = _job_names(pipelines)
+
+    def run_job(index: int) -> process.ProcessResult:
+        _, _, options = invocations[index]
+        if monitor.supported():
+            options = {'sample_interval': SAMPLE_INTERVAL, **options}
+
+        job_output = router.job(names[index], f"$ {_text_command(pipelines[index])}")
+        with output.use_job_output(job_output):
+            running_process = process.start(pipelines[index], stream_stdout=stream_stdout, stream_stderr=stream_stderr, **options)
+
+        result = running_process.wait()
+        job_output.end()
+        return result
+
+    pending = list(range(len(invocations)))
+    results: Dict[int, process.ProcessResult] = {}
+    reserved = 0
+    with router, ThreadPoolExecutor(max_workers=max_workers) as executor:
+        futures: Dict[Future, int] = {}
+        while len(pending) > 0 or len(futures) > 0:
+            # the first pending jobs that fit in the budget start, a large job does not block the smaller ones
+            for index in list(pending):
+                if len(futures) >= max_workers:
+                    break
+
+                if len(futures) == 0 or budget is None or reserved + predictions[index] <= budget:
+                    futures[executor.submit(ctx.bind(run_job), index)] = index
+                    reserved += predictions[index]
+                    pending.remove(index)
+                    logger.debug(f"pool - job {index} admitted, {reserved} bytes reserved on a budget of {budget}")
+
+            done, _ = wait(futures, return_when=FIRST_COMPLETED)
+            for future in done:
+                index = futures.pop(future)
+                reserved -= predictions[index]
+                results[index] = future.result()
+
+    if project_dir is not None:
+        _record_peaks(project_dir, {_fingerprint: peak_rss(results[index]) for index, _fingerprint in enumerate(fingerprints)})
+
+    return [results[index] for index in range(len(invocations))]
+
+
+def parse_size(size: Union[str, int]) -> int:
+    """
+    Converts a size with a binary unit in bytes.
+
+    >>> pool.parse_size("12G")
+    >>> # 12884901888
+    """
+    if isinstance(size, int):
+        return size
+
+    match = re.fullmatch(r'\s*(\d+(?:\.\d+)?)\s*([KMGT]?)i?B?\s*', size, re.IGNORECASE)
+    if match is None:
+        raise click.ClickException(f"invalid memory size: {size}, expected a size like 512M or 12G")
+
+    return int(float(match.group(1)) * SIZE_UNITS[match.group(2).upper()])
+
+
+def fingerprint(pipeline: process.Pipeline, cwd: Optional[str] = None) -> str:
+    """
+    Identifies a program by its command line and its working directory.
+    """
+    working_directory = os.path.realpath(cwd if cwd is not None else os.getcwd())
+    stages = [[stage_command.executable] + stage_args for stage_command, stage_args in pipeline.stages]
+    return hashlib.sha256(json.dumps([stages, working_directory]).encode('utf-8')).hexdigest()
+
+
+def predicted_rss(history: Dict[str, List[int]], _fingerprint: str, budget: Optional[int], max_workers: int) -> int:
+    """
+    Predicts the peak memory of a program from the peaks of its last runs.
+    """
+    peaks = history.get(_fingerprint, [])
+    if len(peaks) > 0:
+        return max(peaks)
+
+    return budget // max_workers if budget is not None else 0
+
+
+def peak_rss(result: process.ProcessResult) -> Optional[int]:
+    """
+    Returns the peak memory of a program. The sampling of its tree of processes sees all its descendants,
+    ``os.wait4`` gives the peak of its largest process only.
+    """
+    peaks = []
+    if result.tree_usage is not None:
+        peaks.append(result.tree_usage.peak_rss)
+    if result.usage is not None:
+        peaks.append(result.usage.max_rss)
+
+    return max(peaks) if len(peaks) > 0 else None
+
+
+def _record_peaks(project_dir: str, peaks: Dict[str, Optional[int]]) -> None:
+    with state.lock(project_dir, LOCK_ENTRY):
+        history = state.read_json(project_dir, MEMORY_ENTRY) or {}
+        for _fingerprint, peak in peaks.items():
+            if peak is not None:
+                history[_fingerprint] = (history.get(_fingerprint, []) + [peak])[-MAX_RECORDED_PEAKS:]
+
+        state.write_json(project_dir, MEMORY_ENTRY, history)
+
+
+def _job_names(pipelines: List[process.Pipeline]) -> List[str]:
+    """
+    Names the jobs after their program, ``pytest``, ``pytest#2``, ...
+    """
+    names = []
+    counts: Dict[str, int] = {}
+    for pipeline in pipelines:
+        name = os.path.basename(pipeline.stages[0][0].executable)
+        counts[name] = counts.get(name, 0) + 1
+        names.append(name if counts[name] == 1 else f"{name}#{counts[name]}")
+
+    return names
+
+
+def _text_command(pipeline: process.Pipeline) -> str:
+    return ' | '.join(' '.join([stage_command.executable] + stage_args) for stage_command, stage_args in pipeline.stages)
+
+
+def _invocation(job: PoolJob) -> Tuple[Union[str, process.Command, process.Pipeline], Optional[List[str]], Dict[str, Any]]:
+    if not isinstance(job, tuple):
+        return job, None, {}
+
+    command, args, options = job if len(job) == 3 else (job[0], job[1], {})
+    if isinstance(args, str):
+        args = [args]
+
+    return command, args, options
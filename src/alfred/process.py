@@ -1,28 +1,110 @@
+# pylint: disable=too-many-lines
+import asyncio
+import codecs
+import contextlib
 import dataclasses
 import os
 import shlex
 import shutil
+import signal
 import subprocess
 import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
 from threading import Thread
-from typing import List, Union, Optional, Tuple, IO
+from typing import List, Union, Optional, Tuple, IO, ContextManager, Iterable, Iterator, Dict, Any, Callable
 
 import click
 
 import alfred.os
-from alfred import logger
+from alfred import logger, ctx, jobserver, lifecycle, monitor, output, shims
 
 @dataclasses.dataclass
 class Command:
     executable: str
 
+    def __or__(self, other: Union[str, 'Command', 'Pipeline']) -> 'Pipeline':
+        return pipe(self) | other
+
 @dataclasses.dataclass
-class ProcessResult:
+class Pipeline:
+    """
+    A pipeline chains commands, the standard output of a stage is connected to the standard input of the next one.
+
+    >>> pipeline = process.pipe(process.sh("git"), ["log"]) | process.sh("grep")
+    """
+    stages: List[Tuple[Command, List[str]]] = dataclasses.field(default_factory=list)
+
+    def __or__(self, other: Union[str, Command, 'Pipeline']) -> 'Pipeline':
+        return Pipeline(self.stages + pipe(other).stages)
+
+@dataclasses.dataclass
+class ResourceUsage:
+    """
+    The resources consumed by the programs of a pipeline, as reported by ``os.wait4``. The times and the counters
+    are summed over the programs, ``max_rss`` is the peak memory of the largest one in bytes.
+
+    The resources of the descendants count only if the program waits for them.
+    """
+    user_time: float
+    system_time: float
+    max_rss: int
+    block_input: int
+    block_output: int
+    voluntary_context_switches: int
+    involuntary_context_switches: int
+
+    def __str__(self) -> str:
+        return f"user {self.user_time:.2f}s, system {self.system_time:.2f}s, max rss {self.max_rss / (1024 * 1024):.1f} MB, " \
+               f"block i/o {self.block_input}/{self.block_output}, " \
+               f"context switches {self.voluntary_context_switches}/{self.involuntary_context_switches}"
+
+
+@dataclasses.dataclass
+class ProcessResult:  # pylint: disable=too-many-instance-attributes
     return_code: int
     stdout: Optional[str]
     stderr: Optional[str]
+    return_codes: List[int] = dataclasses.field(default_factory=list)
+    timed_out: bool = False
+    wall_time: Optional[float] = None
+    usage: Optional[ResourceUsage] = None  # not available on windows
+    tree_usage: Optional[monitor.TreeUsage] = None  # only with sample_interval, on linux
+
+
+"""
+The space left free on the command line for the headers added by the system.
+"""
+ARGLEN_HEADROOM = 2048
+WINDOWS_MAX_COMMAND_LINE = 32767
+MAX_BATCHED_OUTPUT = 10 * 1024 * 1024
+INPUT_CHUNK_SIZE = 64 * 1024
+
+"""
+When a timeout expires, the programs receive SIGTERM, then SIGKILL if they are still running after this delay in seconds.
+The return code is the one of the command ``timeout`` of coreutils.
+"""
+TIMEOUT_KILL_DELAY = 5.0
+TIMEOUT_RETURN_CODE = 124
 
-def run(command: Union[str, Command], args: Optional[List[str]] = None, stream_stdout: bool = True, stream_stderr: bool = True) -> ProcessResult:
+"""
+The hard limit of CPU time is a few seconds above the soft one, the program receives SIGXCPU first, then SIGKILL.
+"""
+RLIMIT_CPU_GRACE = 5
+
+"""
+A redirection is either a path to a file, either a file object opened by the caller.
+"""
+Redirection = Union[str, os.PathLike, IO]
+
+"""
+The input sent to the standard input of a subprocess, either data, either a file object, either an iterator of chunks.
+"""
+Input = Union[bytes, str, IO, Iterable[Union[bytes, str]]]
+
+
+def run(command: Union[str, Command, Pipeline], args: Optional[List[str]] = None, **options: Any) -> ProcessResult:
     """
     Executes a program in a subprocess and retrieves its result (return code, stdout, stderr). The call is blocking.
 
@@ -33,28 +115,888 @@ def run(command: Union[str, Command], args: Optional[List[str]] = None, stream_s
     >>> process.run("mypy", ["src/alfred/process.py"])
 
     >>> process.run("mypy", ["src/alfred/process.py"], stream_stdout=False, stream_stderr=False)
-    :param sync:
-    :return:
+
+    The standard streams can be redirected to a file, given as a path or as a file object. The subprocess
+    writes directly in the file, the output is neither streamed nor captured (``stdout`` or ``stderr`` of the result is None).
+
+    >>> process.run("pip freeze", stdout="requirements.txt")
+    >>> with open("build.log", "ab") as filep:
+    >>>     process.run("make", stdout=filep, stderr=filep)
+    >>> process.run("wc -l", stdin="requirements.txt")
+
+    The standard input can be fed from python with ``input``. It accepts bytes, a file object or an iterator of chunks.
+    The chunks are written by a dedicated thread as the subprocess consumes them, the memory used stays constant.
+
+    >>> process.run("jq .name", input=b'{"name": "alfred"}')
+    >>> process.run("psql", input=(f"INSERT INTO t VALUES ({i});\\n" for i in range(1000000)))
+
+    The environment variables of ``env`` are added to the environment of the subprocess and ``cwd`` sets
+    its working directory. Neither ``os.environ`` nor the working directory of alfred are modified.
+
+    >>> process.run("pytest", env={"DATABASE_URL": "sqlite://"}, cwd="tests")
+
+    With ``timeout``, the programs start in their own process group. When the timeout expires, the whole group receives
+    SIGTERM, then SIGKILL after ``TIMEOUT_KILL_DELAY`` seconds. The result keeps the output written until then,
+    its return code is 124 and ``timed_out`` is set. The timeout of the running command also applies.
+
+    >>> result = process.run("pytest tests/integrations", timeout=600)
+
+    The result gives the duration of the programs in ``wall_time`` and, on posix, the resources they consumed
+    in ``usage`` (CPU time, peak memory, block I/O, context switches). They are logged with ``alfred --debug``.
+
+    >>> result = process.run("pytest")
+    >>> cpu_bound = result.usage.user_time + result.usage.system_time > 0.8 * result.wall_time
+
+    ``os.wait4`` misses the descendants the program does not wait for. On linux, ``sample_interval`` samples the whole tree
+    of processes every ``sample_interval`` seconds while the program runs. The peak and the average CPU and memory
+    are summarised at the end in ``tree_usage``, the samples are written in a timeline file (see ``alfred.monitor``).
+
+    >>> result = process.run("pytest -n 8", sample_interval=0.5)
+
+    On posix, ``nice``, ``rlimit_as``, ``rlimit_cpu`` and ``cpu_affinity`` (linux only) set the priority and the resource
+    limits of the programs. They are applied in the child process before it executes the program, its descendants
+    inherit them. The limits of the running command apply by default.
+
+    >>> process.run("make -j8", nice=10, rlimit_as=4 * 1024 ** 3, cpu_affinity=[0, 1, 2, 3])
+
+    The programs started by alfred and the processes they leave are stopped when alfred exits (see ``alfred.lifecycle``).
+    With ``detach``, the programs start in their own session and are not tracked, a daemon they start keeps running.
+
+    >>> process.run("pg_ctl start -l postgres.log", detach=True)
+
+    A pipeline connects the stages through OS pipes, the data does not go through python. Only the output of the
+    last stage is captured, the error output of the other stages goes to the terminal. The return code of each stage
+    is available in ``return_codes``, the return code of the pipeline is the last one that is not 0.
+
+    >>> process.run("git log | grep fix")
+    >>> process.run(process.pipe(process.sh("git"), ["log"]) | process.sh("wc"))
+
+    :param command: command, text program or pipeline to execute
+    :param args: arguments of the command
+    :param options: options of the execution, see ``process.start``
     """
-    if isinstance(command, str):
-        executable, args = parse_text_command(command)
-        command = sh(executable)
+    return start(command, args, **options).wait()
 
-    if args is None:
-        args = []
 
-    full_command = [command.executable] + args
-    text_command = ' '.join(full_command)
-    working_directory = os.getcwd()
+def start(command: Union[str, Command, Pipeline],  # pylint: disable=too-many-arguments,too-many-locals,too-many-statements
+          args: Optional[List[str]] = None,
+          stream_stdout: bool = True,
+          stream_stderr: bool = True,
+          stdout: Optional[Redirection] = None,
+          stderr: Optional[Redirection] = None,
+          stdin: Optional[Redirection] = None,
+          input: Optional[Input] = None,  # pylint: disable=redefined-builtin
+          env: Optional[Dict[str, str]] = None,
+          cwd: Optional[str] = None,
+          timeout: Optional[float] = None,
+          sample_interval: Optional[float] = None,
+          nice: Optional[int] = None,
+          rlimit_as: Optional[int] = None,
+          rlimit_cpu: Optional[int] = None,
+          cpu_affinity: Optional[List[int]] = None,
+          detach: bool = False) -> 'RunningProcess':
+    """
+    Starts a program in a subprocess without waiting for its end. See ``process.run`` for the examples.
+
+    >>> running_process = process.start("pytest", stream_stdout=False)
+    >>> result = running_process.wait()
+
+    :param command: command, text program or pipeline to execute
+    :param args: arguments of the command
+    :param stream_stdout: stream the output in the terminal
+    :param stream_stderr: stream the error output in the terminal
+    :param stdout: redirect the output to a path or a file object
+    :param stderr: redirect the error output to a path or a file object
+    :param stdin: read the input from a path or a file object
+    :param input: feed the input with bytes, a file object or an iterator of chunks
+    :param env: environment variables added to the environment of the subprocess
+    :param cwd: working directory of the subprocess
+    :param timeout: maximum duration of the programs in seconds
+    :param sample_interval: interval in seconds between two samples of the tree of processes, disabled by default
+    :param nice: priority of the programs, from -20 (highest) to 19 (lowest)
+    :param rlimit_as: maximum size in bytes of the address space of each program
+    :param rlimit_cpu: maximum CPU time in seconds of each program
+    :param cpu_affinity: CPUs on which the programs run
+    :param detach: start the programs in their own session without tracking them, they keep running after alfred
+    """
+    pipeline = pipe(command, args)
+    text_command = ' | '.join(' '.join([stage_command.executable] + stage_args) for stage_command, stage_args in pipeline.stages)
+    working_directory = cwd if cwd is not None else os.getcwd()
     logger.debug(f'{text_command} - wd: {working_directory}')
+    child_env = environment(env)
+    remaining_time = ctx.remaining_time()
+    if remaining_time is not None and (timeout is None or remaining_time < timeout):
+        timeout = remaining_time
+
+    apply_limits = _limits_preexec(nice=nice, rlimit_as=rlimit_as, rlimit_cpu=rlimit_cpu, cpu_affinity=cpu_affinity)
+
+    if stdin is not None and input is not None:
+        raise ValueError("stdin and input arguments may not both be used.")
 
     # run the command
-    with subprocess.Popen(full_command, stdout=subprocess.PIPE, stderr=subprocess.PIPE) as pid:
-        stdout_capture = capture_output(pid, pid.stdout, sys.stdout, stream=stream_stdout)
-        stderr_capture = capture_output(pid, pid.stderr, sys.stderr, stream=stream_stderr)
-        return_code = pid.wait()
+    stack = contextlib.ExitStack()
+    try:
+        stdout_file = stack.enter_context(open_redirection(stdout, 'wb'))
+        stderr_file = stack.enter_context(open_redirection(stderr, 'wb'))
+        stdin_file = stack.enter_context(open_redirection(stdin, 'rb'))
+        if input is not None and _has_fileno(input):
+            stdin_file = stack.enter_context(open_redirection(input, 'rb'))
+
+        pids: List[subprocess.Popen] = []
+        input_feed = None
+        stage_stdin = stdin_file if stdin_file is not None or input is None else subprocess.PIPE
+        isolated = detach or lifecycle.isolated(stage_stdin, timeout)
+        for index, (stage_command, stage_args) in enumerate(pipeline.stages):
+            last_stage = index == len(pipeline.stages) - 1
+            if last_stage:
+                stage_stdout = stdout_file if stdout_file is not None else subprocess.PIPE
+                stage_stderr = stderr_file if stderr_file is not None else subprocess.PIPE
+            else:
+                stage_stdout = subprocess.PIPE
+                stage_stderr = stderr_file if stderr_file is not None else (None if stream_stderr else subprocess.DEVNULL)
+
+            executable, stage_env = _resolve_shim(stage_command.executable, working_directory, child_env)
+            pid = stack.enter_context(subprocess.Popen([executable] + stage_args,  # pylint: disable=subprocess-popen-preexec-fn
+                                                       stdin=stage_stdin,
+                                                       stdout=stage_stdout,
+                                                       stderr=stage_stderr,
+                                                       env=stage_env,
+                                                       cwd=cwd,
+                                                       preexec_fn=apply_limits,
+                                                       pass_fds=jobserver.pass_fds(),
+                                                       **lifecycle.popen_options(isolated)))
+            if not detach:
+                lifecycle.track(pid.pid, text_command, isolated)
+            if len(pids) > 0:
+                # the previous stage must receive SIGPIPE if the current one stops reading
+                pids[-1].stdout.close()
+            elif stage_stdin == subprocess.PIPE:
+                input_feed = feed_input(pid.stdin, input)
+
+            pids.append(pid)
+            stage_stdin = pid.stdout
+
+        sampler = None
+        if sample_interval is not None and monitor.supported():
+            sampler = monitor.TreeSampler([pid.pid for pid in pids], sample_interval,
+                                          monitor.default_timeline_path(pipeline.stages[0][0].executable))
+            sampler.start()
+        elif sample_interval is not None:
+            logger.debug("the sampling of the process tree is available on linux only")
+
+        last_pid = pids[-1]
+        # inside a concurrent job, the output is streamed to the job instead of the terminal
+        stdout_capture = capture_output(last_pid, last_pid.stdout, output.stdout_stream(), stream=stream_stdout)
+        stderr_capture = capture_output(last_pid, last_pid.stderr, output.stderr_stream(), stream=stream_stderr)
+    except BaseException:
+        stack.close()
+        raise
+
+    return RunningProcess(pids, stack, stdout_capture, stderr_capture, input_feed, timeout, sampler, isolated)
+
+
+async def arun(command: Union[str, Command, Pipeline],  # pylint: disable=too-many-arguments,too-many-locals,too-many-branches,too-many-statements
+               args: Optional[List[str]] = None,
+               stream_stdout: bool = True,
+               stream_stderr: bool = True,
+               stdout: Optional[Redirection] = None,
+               stderr: Optional[Redirection] = None,
+               stdin: Optional[Redirection] = None,
+               input: Optional[Input] = None,  # pylint: disable=redefined-builtin
+               env: Optional[Dict[str, str]] = None,
+               cwd: Optional[str] = None,
+               timeout: Optional[float] = None,
+               sample_interval: Optional[float] = None,
+               nice: Optional[int] = None,
+               rlimit_as: Optional[int] = None,
+               rlimit_cpu: Optional[int] = None,
+               cpu_affinity: Optional[List[int]] = None) -> ProcessResult:
+    """
+    Executes a program in a subprocess from a coroutine, it takes the same options as ``process.start``.
+    The subprocesses are watched by the event loop, no thread is started for them.
+
+    >>> results = await asyncio.gather(process.arun("pytest tests/units"), process.arun("mypy src"))
+
+    ``timeout`` and the timeout of the running command stop the programs with their process group as ``process.run`` does,
+    the return code is 124. The subprocesses are killed if the coroutine is cancelled.
+
+    >>> result = await process.arun("pytest tests/integrations", timeout=600)
+
+    The event loop reaps the programs itself, the ``usage`` of the result is not available. ``sample_interval``
+    fills ``tree_usage`` on linux.
+    """
+    pipeline = pipe(command, args)
+    text_command = ' | '.join(' '.join([stage_command.executable] + stage_args) for stage_command, stage_args in pipeline.stages)
+    working_directory = cwd if cwd is not None else os.getcwd()
+    logger.debug(f'{text_command} - wd: {working_directory}')
+    child_env = environment(env)
+    remaining_time = ctx.remaining_time()
+    if remaining_time is not None and (timeout is None or remaining_time < timeout):
+        timeout = remaining_time
+
+    apply_limits = _limits_preexec(nice=nice, rlimit_as=rlimit_as, rlimit_cpu=rlimit_cpu, cpu_affinity=cpu_affinity)
+
+    if stdin is not None and input is not None:
+        raise ValueError("stdin and input arguments may not both be used.")
+
+    with contextlib.ExitStack() as stack:
+        stdout_file = stack.enter_context(open_redirection(stdout, 'wb'))
+        stderr_file = stack.enter_context(open_redirection(stderr, 'wb'))
+        stdin_file = stack.enter_context(open_redirection(stdin, 'rb'))
+        if input is not None and _has_fileno(input):
+            stdin_file = stack.enter_context(open_redirection(input, 'rb'))
+            input = None
+
+        processes: List[asyncio.subprocess.Process] = []  # pylint: disable=no-member
+        sampler = None
+        waiting = None
+        timed_out = False
+        started_at = time.monotonic()
+        stage_stdin = stdin_file if stdin_file is not None or input is None else asyncio.subprocess.PIPE
+        isolated = lifecycle.isolated(stage_stdin, timeout)
+        try:
+            for index, (stage_command, stage_args) in enumerate(pipeline.stages):
+                last_stage = index == len(pipeline.stages) - 1
+                executable, stage_env = _resolve_shim(stage_command.executable, working_directory, child_env)
+                read_fd, write_fd = (None, None) if last_stage else os.pipe()
+                if last_stage:
+                    stage_stdout = stdout_file if stdout_file is not None else asyncio.subprocess.PIPE
+                    stage_stderr = stderr_file if stderr_file is not None else asyncio.subprocess.PIPE
+                else:
+                    stage_stdout = write_fd
+                    stage_stderr = stderr_file if stderr_file is not None else (None if stream_stderr else asyncio.subprocess.DEVNULL)
+
+                try:
+                    processes.append(await asyncio.create_subprocess_exec(executable, *stage_args,
+                                                                          stdin=stage_stdin,
+                                                                          stdout=stage_stdout,
+                                                                          stderr=stage_stderr,
+                                                                          env=stage_env,
+                                                                          cwd=cwd,
+                                                                          preexec_fn=apply_limits,
+                                                                          pass_fds=jobserver.pass_fds(),
+                                                                          **lifecycle.popen_options(isolated)))
+                    lifecycle.track(processes[-1].pid, ' '.join([executable] + stage_args), isolated)
+                finally:
+                    # the ends of the pipes belong to the subprocesses, the stages must receive EOF and SIGPIPE
+                    if write_fd is not None:
+                        os.close(write_fd)
+                    if index > 0:
+                        os.close(stage_stdin)
+
+                stage_stdin = read_fd
+
+            if sample_interval is not None and monitor.supported():
+                sampler = monitor.TreeSampler([_process.pid for _process in processes], sample_interval,
+                                              monitor.default_timeline_path(pipeline.stages[0][0].executable))
+                sampler.start()
+            elif sample_interval is not None:
+                logger.debug("the sampling of the process tree is available on linux only")
+
+            last_process = processes[-1]
+            # inside a concurrent job, the output is streamed to the job instead of the terminal
+            waiting = asyncio.ensure_future(asyncio.gather(
+                _afeed_input(processes[0].stdin, input),
+                _acapture_output(last_process.stdout, output.stdout_stream(), stream_stdout),
+                _acapture_output(last_process.stderr, output.stderr_stream(), stream_stderr),
+                *[_process.wait() for _process in processes]))
+            if timeout is not None and len((await asyncio.wait({waiting}, timeout=timeout))[0]) == 0:
+                timed_out = True
+                logger.debug(f"timeout expired, stop the processes {[_process.pid for _process in processes]}")
+                for _process in processes:
+                    _signal_group(_process, terminate=True)
+                if len((await asyncio.wait({waiting}, timeout=TIMEOUT_KILL_DELAY))[0]) == 0:
+                    for _process in processes:
+                        _signal_group(_process, terminate=False)
+
+            _, stdout_output, stderr_output, *return_codes = await waiting
+        except BaseException:
+            if waiting is not None:
+                waiting.cancel()
+            for _process in processes:
+                if _process.returncode is None:
+                    if isolated:
+                        _signal_group(_process, terminate=False)
+                    else:
+                        _process.kill()
+                    await asyncio.shield(_process.wait())
+            raise
+        finally:
+            for _process in processes:
+                lifecycle.release(_process.pid)
+            # the sampler stops within an interval, the event loop keeps running meanwhile
+            tree_usage = await asyncio.get_running_loop().run_in_executor(None, sampler.stop) if sampler is not None else None
+
+    wall_time = time.monotonic() - started_at
+    logger.debug(f"{text_command} - wall {wall_time:.2f}s")
+    if tree_usage is not None:
+        logger.debug(f"{text_command} - process tree: {tree_usage}, timeline: {tree_usage.timeline}")
+
+    return_code = TIMEOUT_RETURN_CODE if timed_out else _pipeline_return_code(return_codes)
+    return ProcessResult(return_code, stdout_output, stderr_output, return_codes,
+                         timed_out=timed_out, wall_time=wall_time, tree_usage=tree_usage)
+
+
+def run_batched(command: Union[str, Command, Pipeline],  # pylint: disable=too-many-arguments,too-many-locals
+                items: List[str],
+                args: Optional[List[str]] = None,
+                chunk_size: Optional[int] = None,
+                jobs: Optional[int] = None,
+                max_arglen: Optional[int] = None,
+                max_output: int = MAX_BATCHED_OUTPUT,
+                stream_stdout: bool = True,
+                stream_stderr: bool = True,
+                **options: Any) -> ProcessResult:
+    """
+    Runs a program on many items, like ``xargs``. The items are split in batches whose command line fits
+    in the limit of the system, the batches run concurrently with at most ``jobs`` batches at the same time.
+
+    >>> result = process.run_batched("pylint", files, chunk_size=200, jobs=8)
+
+    The output of a batch is displayed in one piece when it ends, in the output of the current job inside
+    a concurrent job. The return code is the first one that is not 0.
+
+    The outputs of the batches are concatenated in the order of the items in the result, up to ``max_output`` characters
+    for stdout and for stderr. A batch is truncated as soon as it ends, the memory holds at most the output
+    of the running batches and ``max_output`` characters for each batch that ends before a previous one.
+
+    :param command: command, text program or pipeline to execute
+    :param items: arguments split between the batches, usually files
+    :param args: arguments given to every batch before the items
+    :param chunk_size: maximum number of items of a batch
+    :param jobs: maximum number of batches that run at the same time, the number of CPUs by default
+    :param max_arglen: maximum length of the command line, computed from ``ARG_MAX`` by default
+    :param max_output: maximum number of characters of stdout and stderr kept in the result
+    :param options: options of the execution, see ``process.start``
+    """
+    if args is None:
+        args = []
+
+    if max_arglen is None:
+        max_arglen = default_max_arglen(environment(options.get('env')))
+
+    pipeline = pipe(command, args)
+    # the items are added to the last stage of the pipeline
+    last_command, last_args = pipeline.stages[-1]
+    base_args = [last_command.executable] + last_args
+    chunks = batches(items, base_args, chunk_size, max_arglen)
+    logger.debug(f'{len(items)} items split in {len(chunks)} batches')
+
+    lock = threading.Lock()
+    stdout_output = _BatchedOutput(max_output)
+    stderr_output = _BatchedOutput(max_output)
+
+    def run_batch(index: int, chunk: List[str]) -> ProcessResult:
+        result = start(pipeline, chunk, stream_stdout=False, stream_stderr=False, **options).wait()
+        with lock:
+            display_output(result, stream_stdout, stream_stderr)
+            stdout_output.add(index, result.stdout)
+            stderr_output.add(index, result.stderr)
+
+        # the output of the batch is kept by the collectors only
+        return dataclasses.replace(result, stdout=None, stderr=None)
+
+    started_at = time.monotonic()
+    with ThreadPoolExecutor(max_workers=jobs if jobs is not None else os.cpu_count()) as executor:
+        futures = [executor.submit(ctx.bind(run_batch), index, chunk) for index, chunk in enumerate(chunks)]
+        results = [future.result() for future in futures]
+
+    return_codes = [result.return_code for result in results]
+    return ProcessResult(return_code=next((code for code in return_codes if code != 0), 0),
+                         stdout=stdout_output.text(),
+                         stderr=stderr_output.text(),
+                         return_codes=return_codes,
+                         timed_out=any(result.timed_out for result in results),
+                         wall_time=time.monotonic() - started_at,
+                         usage=_combine_usages([result.usage for result in results]))
+
+
+def display_output(result: ProcessResult, stream_stdout: bool = True, stream_stderr: bool = True) -> None:
+    """
+    Displays the output of a program that has been captured, in one piece. Inside a concurrent job,
+    it is written to the output of the job.
+    """
+    if stream_stdout and result.stdout:
+        output.stdout_stream().write(result.stdout)
+        output.stdout_stream().flush()
+    if stream_stderr and result.stderr:
+        output.stderr_stream().write(result.stderr)
+        output.stderr_stream().flush()
+
+
+def batches(items: List[str], base_args: List[str], chunk_size: Optional[int], max_arglen: int) -> List[List[str]]:
+    """
+    Splits items in batches whose command line, made of ``base_args`` and the items, stays under ``max_arglen``.
+
+    >>> chunks = process.batches(files, ["pylint"], chunk_size=None, max_arglen=process.default_max_arglen(os.environ))
+    """
+    base_length = sum(_arg_length(arg) for arg in base_args)
+    chunks: List[List[str]] = []
+    chunk: List[str] = []
+    length = base_length
+    for item in items:
+        item_length = _arg_length(item)
+        if base_length + item_length > max_arglen:
+            raise click.ClickException(f"argument is too long for the command line: {item[:100]}...")
+
+        if len(chunk) > 0 and (length + item_length > max_arglen or (chunk_size is not None and len(chunk) >= chunk_size)):
+            chunks.append(chunk)
+            chunk, length = [], base_length
+
+        chunk.append(item)
+        length += item_length
+
+    if len(chunk) > 0:
+        chunks.append(chunk)
+
+    return chunks
+
+
+def default_max_arglen(env: Dict[str, str]) -> int:
+    """
+    Computes the space available for the arguments of a command line. On posix, the arguments and the
+    environment share ``ARG_MAX``. On windows, a command line is limited to 32767 characters.
+    """
+    if alfred.os.is_windows():
+        return WINDOWS_MAX_COMMAND_LINE - ARGLEN_HEADROOM
+
+    env_length = sum(_arg_length(f"{key}={value}") for key, value in env.items())
+    return os.sysconf('SC_ARG_MAX') - env_length - ARGLEN_HEADROOM
+
+
+def _arg_length(arg: str) -> int:
+    if alfred.os.is_windows():
+        # the argument is quoted and separated from the next one by a space
+        return len(arg) + 3
+
+    # the string with its terminal null byte and its pointer in argv
+    return len(arg.encode('utf-8')) + 1 + 8
+
+
+class _BatchedOutput:
+    """
+    Concatenates the outputs of the batches in their order, up to ``max_output`` characters. The output of a batch
+    that ends before a previous one waits for it, truncated to what can still be kept.
+    """
+
+    def __init__(self, max_output: int):
+        self.max_output = max_output
+        self._parts: List[str] = []
+        self._length = 0
+        self._ignored = 0
+        self._pending: Dict[int, Tuple[str, int]] = {}
+        self._next_index = 0
+
+    def add(self, index: int, text: Optional[str]) -> None:
+        text = text or ''
+        self._pending[index] = (text[:self.max_output - self._length], len(text))
+        while self._next_index in self._pending:
+            kept, length = self._pending.pop(self._next_index)
+            kept = kept[:self.max_output - self._length]
+            self._parts.append(kept)
+            self._length += len(kept)
+            self._ignored += length - len(kept)
+            self._next_index += 1
+
+    def text(self) -> str:
+        if self._ignored == 0:
+            return ''.join(self._parts)
+
+        return ''.join(self._parts) + f"\n... output truncated, {self._ignored} characters ignored\n"
+
+
+class RunningProcess:  # pylint: disable=too-many-instance-attributes
+    """
+    A program started by ``process.start`` which may still be running.
+
+    >>> running_process = process.start("pytest")
+    >>> running_process.terminate()
+    >>> result = running_process.wait()
+
+    Iterating over a running process yields the lines of its standard output as the program writes them.
+
+    >>> with process.start("flask run", stream_stdout=False) as server:
+    >>>     for line in server:
+    >>>         if "Running on" in line:
+    >>>             break
+    >>>     process.run("pytest tests/e2e")
+    """
+
+    def __init__(self, pids: List[subprocess.Popen], stack: contextlib.ExitStack, stdout_capture: 'capture_output',  # pylint: disable=too-many-arguments
+                 stderr_capture: 'capture_output', input_feed: Optional['feed_input'] = None, timeout: Optional[float] = None,
+                 sampler: Optional[monitor.TreeSampler] = None, isolated: Optional[bool] = None):
+        self.pids = pids
+        self.isolated = isolated if isolated is not None else timeout is not None
+        self.started_at = time.monotonic()
+        self.deadline = self.started_at + timeout if timeout is not None else None
+        self.timed_out = False
+        self._rusages: Dict[int, ResourceUsage] = {}
+        self._reap_lock = threading.Lock()
+        self._stack = stack
+        self._stdout_capture = stdout_capture
+        self._stderr_capture = stderr_capture
+        self._input_feed = input_feed
+        self._sampler = sampler
+        self._result: Optional[ProcessResult] = None
+        self._lock = threading.Lock()
+
+    def __enter__(self) -> 'RunningProcess':
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb) -> None:
+        self.terminate()
+        self.wait()
 
-    return ProcessResult(return_code, stdout_capture.output(), stderr_capture.output())
+    def __iter__(self) -> Iterator[str]:
+        return self._stdout_capture.lines()
+
+    def wait(self, timeout: Optional[float] = None) -> ProcessResult:
+        """
+        Waits for the end of the program and returns its result. The programs are stopped if the timeout given
+        to ``process.start`` expires meanwhile.
+
+        :param timeout: maximum time to wait in seconds, ``subprocess.TimeoutExpired`` is raised when it expires
+        """
+        if timeout is not None and (self.deadline is None or time.monotonic() + timeout < self.deadline):
+            if not self._wait_pids(time.monotonic() + timeout):
+                raise subprocess.TimeoutExpired(self.pids[-1].args, timeout)
+
+        with self._lock:
+            if self._result is not None:
+                return self._result
+
+            with self._stack:
+                try:
+                    if self.deadline is not None:
+                        self._wait_deadline()
+                    self._wait_pids(None)
+                    return_codes = [pid.returncode for pid in self.pids]
+                    wall_time = time.monotonic() - self.started_at
+                    for pid in self.pids:
+                        lifecycle.release(pid.pid)
+                except BaseException:
+                    # the programs of their own process group do not receive the Ctrl+C of the terminal
+                    if self.isolated:
+                        self.kill()
+                    raise
+                finally:
+                    tree_usage = self._sampler.stop() if self._sampler is not None else None
+
+                if self._input_feed is not None:
+                    self._input_feed.join()
+
+                # a child that has left the process group may keep the output open after a timeout
+                capture_timeout = TIMEOUT_KILL_DELAY if self.timed_out else None
+                stdout_output, stderr_output = self._stdout_capture.output(capture_timeout), self._stderr_capture.output(capture_timeout)
+
+            return_code = TIMEOUT_RETURN_CODE if self.timed_out else _pipeline_return_code(return_codes)
+            usage = _combine_usages([self._rusages.get(pid.pid) for pid in self.pids])
+            text_command = ' | '.join(' '.join(map(str, pid.args)) for pid in self.pids)
+            logger.debug(f"{text_command} - wall {wall_time:.2f}s" + (f", {usage}" if usage is not None else ""))
+            if tree_usage is not None:
+                logger.debug(f"{text_command} - process tree: {tree_usage}, timeline: {tree_usage.timeline}")
+            self._result = ProcessResult(return_code, stdout_output, stderr_output, return_codes,
+                                         timed_out=self.timed_out, wall_time=wall_time, usage=usage, tree_usage=tree_usage)
+            return self._result
+
+    def result(self, timeout: Optional[float] = None) -> ProcessResult:
+        """
+        Returns the result of the program once it has ended, like ``concurrent.futures.Future.result``.
+        """
+        return self.wait(timeout)
+
+    def poll(self) -> Optional[int]:
+        """
+        Checks if the program has ended without waiting for it.
+
+        :return: the return code of the program, None if it is still running
+        """
+        ended = [self._reap(pid, 0.0) for pid in self.pids]
+        if not all(ended):
+            return None
+
+        return _pipeline_return_code([pid.returncode for pid in self.pids])
+
+    def terminate(self) -> None:
+        """
+        Asks the programs of the pipeline that are still running to stop. The programs of their own process group
+        are stopped with their children.
+        """
+        if self.isolated:
+            self._signal_groups(terminate=True)
+            return
+
+        for pid in self.pids:
+            if not self._reap(pid, 0.0):
+                pid.terminate()
+
+    def kill(self) -> None:
+        """
+        Kills the programs of the pipeline that are still running. The programs of their own process group
+        are killed with their children.
+        """
+        if self.isolated:
+            self._signal_groups(terminate=False)
+            return
+
+        for pid in self.pids:
+            if not self._reap(pid, 0.0):
+                pid.kill()
+
+    def _wait_deadline(self) -> None:
+        if self._wait_pids(self.deadline):
+            return
+
+        self.timed_out = True
+        logger.debug(f"timeout expired, stop the processes {[pid.pid for pid in self.pids]}")
+        self._signal_groups(terminate=True)
+        kill_deadline = time.monotonic() + TIMEOUT_KILL_DELAY
+        if self._wait_pids(kill_deadline):
+            while any(lifecycle.group_alive(pid.pid) for pid in self.pids) and time.monotonic() < kill_deadline:
+                time.sleep(0.05)
+
+        self._signal_groups(terminate=False)
+
+    def _wait_pids(self, deadline: Optional[float]) -> bool:
+        """
+        Waits for the end of the programs until the deadline, forever if it is None.
+
+        :return: False if a program is still running at the deadline
+        """
+        for pid in self.pids:
+            if not self._reap(pid, None if deadline is None else max(0.0, deadline - time.monotonic())):
+                return False
+
+        return True
+
+    def _reap(self, pid: subprocess.Popen, timeout: Optional[float]) -> bool:  # pylint: disable=too-many-return-statements
+        """
+        Waits for the end of a program with ``os.wait4`` to record the resources it has consumed,
+        ``Popen.wait`` discards them.
+
+        :param timeout: maximum time to wait in seconds, 0 only checks the program, None waits for its end
+        :return: True if the program has ended
+        """
+        if not hasattr(os, 'wait4'):
+            try:
+                pid.wait(timeout)
+                return True
+            except subprocess.TimeoutExpired:
+                return False
+
+        deadline = time.monotonic() + timeout if timeout is not None else None
+        delay = 0.0005
+        while True:
+            if pid.returncode is not None:
+                return True
+
+            try:
+                # a blocking wait does not hold the lock, a concurrent poll may reap the program meanwhile
+                with self._reap_lock if deadline is not None else contextlib.nullcontext():
+                    if pid.returncode is not None:
+                        return True
+                    child_pid, status, rusage = os.wait4(pid.pid, 0 if deadline is None else os.WNOHANG)  # pylint: disable=no-member
+            except ChildProcessError:
+                with self._reap_lock:
+                    if pid.returncode is None:
+                        pid.wait()
+                return True
+
+            if child_pid != 0:
+                with self._reap_lock:
+                    self._rusages[pid.pid] = _resource_usage(rusage)
+                    pid.returncode = _exit_code(status)
+                return True
+
+            if time.monotonic() >= deadline:
+                return False
+
+            time.sleep(min(delay, max(0.0, deadline - time.monotonic())))
+            delay = min(delay * 2, 0.05)
+
+    def _signal_groups(self, terminate: bool) -> None:
+        for pid in self.pids:
+            if not alfred.os.is_windows() or not self._reap(pid, 0.0):
+                _signal_group(pid, terminate)
+
+
+def _signal_group(pid: Union[subprocess.Popen, asyncio.subprocess.Process], terminate: bool) -> None:  # pylint: disable=no-member
+    """
+    Stops a program started in its own process group with its children, ``SIGTERM`` first, then ``SIGKILL``.
+    """
+    if alfred.os.is_windows():
+        if terminate:
+            pid.send_signal(signal.CTRL_BREAK_EVENT)  # pylint: disable=no-member
+        else:
+            subprocess.run(['taskkill', '/F', '/T', '/PID', str(pid.pid)], stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, check=False)
+        return
+
+    try:
+        os.killpg(pid.pid, signal.SIGTERM if terminate else signal.SIGKILL)  # pylint: disable=no-member
+    except (ProcessLookupError, PermissionError):
+        # the process group has already ended
+        pass
+
+
+def _pipeline_return_code(return_codes: List[int]) -> int:
+    return next((code for code in reversed(return_codes) if code != 0), 0)
+
+
+def _limits_preexec(nice: Optional[int] = None, rlimit_as: Optional[int] = None, rlimit_cpu: Optional[int] = None,
+                    cpu_affinity: Optional[List[int]] = None) -> Optional[Callable[[], None]]:
+    """
+    Builds the function executed in the child process before the program to apply its priority and its resource limits.
+    The limits given to the call take precedence over the ones of the running command.
+    """
+    limits = {**ctx.process_limits(), **{key: value for key, value in
+                                          {'nice': nice, 'rlimit_as': rlimit_as, 'rlimit_cpu': rlimit_cpu, 'cpu_affinity': cpu_affinity}.items()
+                                          if value is not None}}
+    if len(limits) == 0:
+        return None
+
+    if alfred.os.is_windows():
+        raise click.ClickException(f"priority and resource limits are not supported on windows: {', '.join(limits)}")
+
+    if 'cpu_affinity' in limits and not hasattr(os, 'sched_setaffinity'):
+        raise click.ClickException("cpu_affinity is supported on linux only")
+
+    import resource  # pylint: disable=import-outside-toplevel,import-error
+
+    def apply_limits() -> None:
+        # this function runs between fork and exec, it must only make system calls
+        if 'nice' in limits:
+            # the priority of a child can not be higher than the one of alfred without privileges
+            os.setpriority(os.PRIO_PROCESS, 0, max(limits['nice'], os.getpriority(os.PRIO_PROCESS, 0)))  # pylint: disable=no-member
+        if 'rlimit_as' in limits:
+            resource.setrlimit(resource.RLIMIT_AS, (limits['rlimit_as'], limits['rlimit_as']))
+        if 'rlimit_cpu' in limits:
+            _, hard = resource.getrlimit(resource.RLIMIT_CPU)
+            cpu_hard = limits['rlimit_cpu'] + RLIMIT_CPU_GRACE
+            resource.setrlimit(resource.RLIMIT_CPU, (limits['rlimit_cpu'], cpu_hard if hard == resource.RLIM_INFINITY else min(cpu_hard, hard)))
+        if 'cpu_affinity' in limits:
+            os.sched_setaffinity(0, limits['cpu_affinity'])  # pylint: disable=no-member
+
+    return apply_limits
+
+
+def _exit_code(status: int) -> int:
+    if os.WIFSIGNALED(status):  # pylint: disable=no-member
+        return -os.WTERMSIG(status)  # pylint: disable=no-member
+
+    return os.WEXITSTATUS(status)  # pylint: disable=no-member
+
+
+def _resource_usage(rusage: Any) -> ResourceUsage:
+    # ru_maxrss is in kilobytes on linux and in bytes on macos
+    rss_unit = 1 if sys.platform == 'darwin' else 1024
+    return ResourceUsage(user_time=rusage.ru_utime,
+                         system_time=rusage.ru_stime,
+                         max_rss=rusage.ru_maxrss * rss_unit,
+                         block_input=rusage.ru_inblock,
+                         block_output=rusage.ru_oublock,
+                         voluntary_context_switches=rusage.ru_nvcsw,
+                         involuntary_context_switches=rusage.ru_nivcsw)
+
+
+def _combine_usages(usages: List[Optional[ResourceUsage]]) -> Optional[ResourceUsage]:
+    if len(usages) == 0 or any(usage is None for usage in usages):
+        return None
+
+    return ResourceUsage(user_time=sum(usage.user_time for usage in usages),
+                         system_time=sum(usage.system_time for usage in usages),
+                         max_rss=max(usage.max_rss for usage in usages),
+                         block_input=sum(usage.block_input for usage in usages),
+                         block_output=sum(usage.block_output for usage in usages),
+                         voluntary_context_switches=sum(usage.voluntary_context_switches for usage in usages),
+                         involuntary_context_switches=sum(usage.involuntary_context_switches for usage in usages))
+
+
+def environment(env: Optional[Dict[str, str]] = None) -> Dict[str, str]:
+    """
+    Builds the environment of a subprocess from ``os.environ``, the jobserver of ``alfred --jobs``,
+    the overlay of the running command and the variables ``env`` specific to the call.
+
+    >>> child_env = process.environment({"VIRTUAL_ENV": venv})
+    >>> subprocess.run(["python", "--version"], env=child_env)
+    """
+    if env is None:
+        env = {}
+
+    return {**os.environ, **jobserver.environment(), **ctx.env_overlay(), **env}
+
+
+def pipe(command: Union[str, Command, Pipeline], args: Optional[List[str]] = None) -> Pipeline:
+    """
+    Builds a pipeline from a command. The pipeline is extended with the operator ``|``.
+
+    >>> pipeline = process.pipe(process.sh("git"), ["log"]) | process.sh("grep")
+    >>> pipeline = process.pipe("git log") | "grep fix" | "wc -l"
+
+    A text command that contains ``|`` is parsed as a pipeline. The arguments ``args`` are added to the last stage.
+    """
+    if args is None:
+        args = []
+
+    if isinstance(command, Pipeline):
+        stages = list(command.stages)
+    elif isinstance(command, str):
+        stages = [(sh(executable), stage_args) for executable, stage_args in parse_text_pipeline(command)]
+    else:
+        stages = [(command, [])]
+
+    last_command, last_args = stages[-1]
+    stages[-1] = (last_command, last_args + list(args))
+    return Pipeline(stages)
+
+
+@contextlib.contextmanager
+def open_redirection(target: Optional[Redirection], mode: str) -> ContextManager[Optional[IO]]:
+    """
+    Opens the file targeted by a redirection of a standard stream.
+
+    A path is opened with ``mode`` and closed at the end of the context. A file object is given as is to the
+    subprocess, it remains open. Its python buffer is flushed to keep the writes in order.
+
+    >>> with open_redirection("build.log", "wb") as filep:
+    >>>     subprocess.Popen(["make"], stdout=filep)
+    """
+    if target is None:
+        yield None
+    elif isinstance(target, (str, os.PathLike)):
+        with open(target, mode) as filep:  # pylint: disable=unspecified-encoding
+            yield filep
+    else:
+        if hasattr(target, 'flush'):
+            target.flush()
+        yield target
+
+
+def _resolve_shim(executable: str, cwd: str, env: Dict[str, str]) -> Tuple[str, Dict[str, str]]:
+    """
+    Starts the program targeted by a shim of pyenv or asdf directly. As the version manager would do,
+    the directory of the program is added in front of the PATH.
+    """
+    target = shims.resolve(executable, cwd, env)
+    if target == executable:
+        return executable, env
+
+    path = env.get('PATH')
+    return target, {**env, 'PATH': os.pathsep.join([os.path.dirname(target), path]) if path else os.path.dirname(target)}
+
+
+def _has_fileno(stream: object) -> bool:
+    """
+    Checks if a stream is backed by a file descriptor, as a file opened with ``open``.
+    """
+    if not hasattr(stream, 'fileno'):
+        return False
+
+    try:
+        stream.fileno()
+        return True
+    except (OSError, ValueError):
+        # io.BytesIO exposes fileno but raises io.UnsupportedOperation
+        return False
 
 
 def parse_text_command(command: str) -> Tuple[str, List[str]]:
@@ -68,11 +1010,41 @@ def parse_text_command(command: str) -> Tuple[str, List[str]]:
     This function does not handle shell operations like `|`, `>`, `>>`, etc...
     These operations depend on the user's shell.
     """
+    return _parse_text_parts(command, _split_text_command(command))
+
+
+def parse_text_pipeline(command: str) -> List[Tuple[str, List[str]]]:
+    """
+    Parse a text command which may contain pipes `|` and return the executable and the list of arguments of each stage
+
+    >>> stages = parse_text_pipeline("git log | grep fix")
+    >>> # stages == [("git", ["log"]), ("grep", ["fix"])]
+
+    The other shell operations like `>`, `>>`, `&&`, etc... are not supported.
+    """
+    stages_parts: List[List[str]] = [[]]
+    for part in _split_text_command(command):
+        if part == '|':
+            stages_parts.append([])
+        else:
+            stages_parts[-1].append(part)
+
+    if any(len(stage_parts) == 0 for stage_parts in stages_parts):
+        exception = click.ClickException(f"a stage of the pipeline is empty: `{command}`")
+        exception.exit_code = 1
+        raise exception
+
+    return [_parse_text_parts(command, stage_parts) for stage_parts in stages_parts]
+
+
+def _split_text_command(command: str) -> List[str]:
     cmd_parser = shlex.shlex(command, punctuation_chars=True)
     cmd_parser.whitespace_split = True
-    cmd_parts = list(cmd_parser)
-    for index, part in enumerate(cmd_parts):
-        cmd_parts[index] = unquote_litteral_string(part)
+    return list(cmd_parser)
+
+
+def _parse_text_parts(command: str, cmd_parts: List[str]) -> Tuple[str, List[str]]:
+    cmd_parts = [unquote_litteral_string(part) for part in cmd_parts]
 
     contain_shell = any(True for part in cmd_parts if part in ['&', '|', '&&', '||', '>', '>>', '<', '<<'])
     if contain_shell:
@@ -130,9 +1102,10 @@ def sh(command: Union[str, List[str]], fail_message: str = None) -> Command:  #
     if alfred.os.is_windows():
         possible_suffixes.append(".exe")
 
+    path = environment().get('PATH')
     for _command in command:
         for suffix in possible_suffixes:
-            fullpath_command = shutil.which(_command + suffix)
+            fullpath_command = shutil.which(_command + suffix, path=path)
             if fullpath_command is not None:
                 executable_command = Command(fullpath_command)
                 break
@@ -146,7 +1119,7 @@ def sh(command: Union[str, List[str]], fail_message: str = None) -> Command:  #
     return executable_command
 
 
-class capture_output:  # pylint: disable=invalid-name
+class capture_output:  # pylint: disable=invalid-name,too-many-instance-attributes
     """
     Capture the output of a subprocess and stream it to the terminal
 
@@ -165,34 +1138,153 @@ class capture_output:  # pylint: disable=invalid-name
         self.capture_stream = capture_stream
         self.output_stream = output_stream
         self.stream = stream
+        self._condition = threading.Condition()
+        self._ended = False
         self.thread = Thread(target=self._run_capture)
         self.thread.start()
 
     def _run_capture(self):
-        if self.capture_stream is not None:
-            while True:
-                line = self.capture_stream.readline().decode('utf-8')
-
-                if line != '' and self.stream is True:
-                    try:
-                        self.output_stream.write(line)
-                        self.output_stream.flush()
-                    except UnicodeEncodeError:
-                        # Encoding error happens on windows because the terminal is not utf-8 by default
-                        #
-                        # encodings\cp1252.py", line 19, in encode
-                        #   return codecs.charmap_encode(input,self.errors,encoding_table)[0]
-                        # UnicodeEncodeError: 'charmap' codec can't encode character '\u2713' in position 5
-                        line = line.encode('ascii', errors='replace').decode('ascii')
-                        self.output_stream.write(line)
-                        self.output_stream.flush()
-
-                if line != '':
-                    self.capture_logs.append(line)
-
-                if self.subprocess.poll() is not None:
-                    break
-
-    def output(self):
+        try:
+            if self.capture_stream is not None:
+                # the stream is read until its end, the last lines may arrive after the end of the subprocess
+                for raw_line in iter(self.capture_stream.readline, b''):
+                    line = raw_line.decode('utf-8')
+                    if self.stream is True:
+                        _write_output(self.output_stream, line)
+
+                    with self._condition:
+                        self.capture_logs.append(line)
+                        self._condition.notify_all()
+        finally:
+            with self._condition:
+                self._ended = True
+                self._condition.notify_all()
+
+    def lines(self) -> Iterator[str]:
+        """
+        Yields the captured lines as they arrive, until the end of the stream.
+        """
+        index = 0
+        while True:
+            with self._condition:
+                self._condition.wait_for(lambda: index < len(self.capture_logs) or self._ended)
+                if index >= len(self.capture_logs):
+                    return
+
+                line = self.capture_logs[index]
+
+            index += 1
+            yield line
+
+    def output(self, timeout: Optional[float] = None) -> Optional[str]:
+        self.thread.join(timeout)
+        if self.capture_stream is None:
+            return None
+
+        with self._condition:
+            return ''.join(self.capture_logs)
+
+
+class feed_input:  # pylint: disable=invalid-name
+    """
+    Feed the standard input of a subprocess from a dedicated thread
+
+    The writes block as long as the subprocess does not consume its input, only one chunk
+    is kept in memory at a time.
+
+    >>> p = subprocess.Popen(["wc", "-l"], stdin=subprocess.PIPE)
+    >>> input_feed = feed_input(p.stdin, (f"line {i}\\n" for i in range(1000)))
+    >>> return_code = p.wait()
+    >>> input_feed.join()
+    """
+
+    def __init__(self, feed_stream: IO, data: Input):
+        self.feed_stream = feed_stream
+        self.data = data
+        self.thread = Thread(target=self._run_feed)
+        self.thread.start()
+
+    def _run_feed(self):
+        try:
+            for chunk in _input_chunks(self.data):
+                self.feed_stream.write(chunk)
+        except BrokenPipeError:
+            # the subprocess has stopped before reading all its input
+            pass
+        finally:
+            try:
+                self.feed_stream.close()
+            except BrokenPipeError:
+                pass
+
+    def join(self):
         self.thread.join()
-        return '\n'.join(self.capture_logs)
+
+
+def _write_output(output_stream: IO, line: str) -> None:
+    try:
+        output_stream.write(line)
+        output_stream.flush()
+    except UnicodeEncodeError:
+        # Encoding error happens on windows because the terminal is not utf-8 by default
+        #
+        # encodings\\cp1252.py", line 19, in encode
+        #   return codecs.charmap_encode(input,self.errors,encoding_table)[0]
+        # UnicodeEncodeError: 'charmap' codec can't encode character '\\u2713' in position 5
+        line = line.encode('ascii', errors='replace').decode('ascii')
+        output_stream.write(line)
+        output_stream.flush()
+
+
+def _input_chunks(data: Input) -> Iterator[bytes]:
+    if isinstance(data, (bytes, bytearray, str)):
+        chunks: Iterable[Union[bytes, str]] = [data]
+    elif hasattr(data, 'read'):
+        chunks = _read_chunks(data)
+    else:
+        chunks = data
+
+    for chunk in chunks:
+        yield chunk.encode('utf-8') if isinstance(chunk, str) else chunk
+
+
+def _read_chunks(filep: IO) -> Iterator[Union[bytes, str]]:
+    while True:
+        chunk = filep.read(INPUT_CHUNK_SIZE)
+        if not chunk:
+            break
+        yield chunk
+
+
+async def _acapture_output(stream: Optional[asyncio.StreamReader], output_stream: IO, stream_output: bool) -> Optional[str]:
+    if stream is None:
+        return None
+
+    decoder = codecs.getincrementaldecoder('utf-8')()
+    capture_logs = []
+    while True:
+        chunk = await stream.read(INPUT_CHUNK_SIZE)
+        text = decoder.decode(chunk, final=chunk == b'')
+        if stream_output and text != '':
+            _write_output(output_stream, text)
+        capture_logs.append(text)
+        if chunk == b'':
+            break
+
+    return ''.join(capture_logs)
+
+
+async def _afeed_input(feed_stream: Optional[asyncio.StreamWriter], data: Optional[Input]) -> None:
+    if feed_stream is None or data is None:
+        return
+
+    try:
+        for chunk in _input_chunks(data):
+            feed_stream.write(chunk)
+            # the coroutine waits as long as the subprocess does not consume its input
+            await feed_stream.drain()
+    except (BrokenPipeError, ConnectionResetError):
+        # the subprocess has stopped before reading all its input
+        pass
+    finally:
+        feed_stream.close()
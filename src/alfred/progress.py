@@ -0,0 +1,212 @@
+"""
+This module displays the progress of a pipeline. The duration of each step invoked with ``alfred.invoke_command``
+is recorded in ``.alfred/durations.json`` of the project of the root command. The next runs of the same root command
+display the number of steps done over the expected ones and the time left, estimated from the median durations.
+
+>>> # $ alfred tests : run the tests [2/4, 6m32s left]
+
+The commands started together with ``alfred.invoke_commands`` are a single step, named after them, whose duration
+is the one of the slowest command.
+
+>>> # $ alfred lint : lint the code [3/4, 4m10s left]
+>>> # $ alfred tests : run the tests [3/4, 4m10s left]
+
+In continuous integration, where the output is not a terminal, a progress line is also logged periodically.
+
+>>> # progress: tests running for 2m30s, 1/4 steps done, 4m02s left
+"""
+import contextlib
+import contextvars
+import dataclasses
+import os
+import statistics
+import sys
+import threading
+import time
+from typing import ContextManager, Dict, List, Optional
+
+from alfred import ctx, echo, state
+from alfred.domain.command import AlfredCommand
+
+DURATIONS_ENTRY = 'durations.json'
+LOCK_ENTRY = 'durations.lock'
+MAX_RECORDED_DURATIONS = 10
+
+"""
+Interval in seconds between two progress lines in continuous integration.
+"""
+CI_PROGRESS_INTERVAL = 30.0
+
+
+@dataclasses.dataclass
+class PipelineProgress:  # pylint: disable=too-many-instance-attributes
+    """
+    The progress of the steps of a root command, compared with its last successful run.
+    """
+    root: str
+    project_dir: str
+    durations: Dict[str, List[float]]
+    expected_steps: List[str]
+    done_steps: List[str] = dataclasses.field(default_factory=list)
+    new_durations: Dict[str, List[float]] = dataclasses.field(default_factory=dict)
+    current_step: Optional[str] = None
+    current_started_at: Optional[float] = None
+
+    def time_left(self) -> Optional[float]:
+        """
+        Estimates the time left from the median durations of the steps not done yet.
+
+        :return: None if a step has never been recorded
+        """
+        remaining_steps = self.remaining_steps()
+        if any(step not in self.durations for step in remaining_steps):
+            return None
+
+        time_left = sum(statistics.median(self.durations[step]) for step in remaining_steps)
+        if self.current_step in remaining_steps:
+            # the time spent in the running step is deducted without exceeding its median
+            elapsed = time.monotonic() - self.current_started_at
+            time_left -= min(elapsed, statistics.median(self.durations[self.current_step]))
+
+        return max(0.0, time_left)
+
+    def remaining_steps(self) -> List[str]:
+        """
+        Lists the expected steps that are not done yet. The steps are matched by name, a pipeline
+        whose steps run in another order keeps a right estimation.
+        """
+        remaining_steps = list(self.expected_steps)
+        for done_step in self.done_steps:
+            if done_step in remaining_steps:
+                remaining_steps.remove(done_step)
+
+        return remaining_steps
+
+    def label(self) -> str:
+        """
+        Formats the progress of the pipeline, empty if it has never been recorded.
+
+        >>> # "[2/4, 6m32s left]"
+        """
+        if len(self.expected_steps) == 0:
+            return ""
+
+        step_number = min(len(self.done_steps) + 1, len(self.expected_steps))
+        time_left = self.time_left()
+        if time_left is None:
+            return f"[{step_number}/{len(self.expected_steps)}]"
+
+        return f"[{step_number}/{len(self.expected_steps)}, {format_duration(time_left)} left]"
+
+
+_pipeline_var: contextvars.ContextVar[Optional[PipelineProgress]] = contextvars.ContextVar('alfred_pipeline_progress', default=None)
+
+
+@contextlib.contextmanager
+def track_pipeline(root_command: AlfredCommand) -> ContextManager[None]:
+    """
+    Tracks the steps of a root command. The durations of its steps are recorded at the end, the list of its steps
+    only if it succeeds.
+
+    >>> with progress.track_pipeline(command):
+    >>>     pass
+    """
+    store = state.read_json(root_command.project_dir, DURATIONS_ENTRY) or {}
+    pipeline = PipelineProgress(root=root_command.fullname,
+                                project_dir=root_command.project_dir,
+                                durations=store.get('commands', {}),
+                                expected_steps=store.get('pipelines', {}).get(root_command.fullname, []))
+    token = _pipeline_var.set(pipeline)
+    ticker = _start_ci_ticker(pipeline)
+    succeeded = False
+    try:
+        yield
+        succeeded = True
+    finally:
+        _pipeline_var.reset(token)
+        if ticker is not None:
+            ticker.set()
+        _record(pipeline, succeeded)
+
+
+@contextlib.contextmanager
+def step(name: str) -> ContextManager[str]:
+    """
+    Tracks a step of the pipeline, invoked by the root command. The steps invoked deeper are part of their parent.
+
+    >>> with progress.step("lint") as progress_label:
+    >>>     pass
+
+    :param name: fullname of the command, or the names of the commands run together joined with `` + ``
+    :return: the progress label of the pipeline at the start of the step
+    """
+    pipeline = _pipeline_var.get()
+    if pipeline is None or ctx.current_command() is not ctx.root_command():
+        yield ""
+        return
+
+    pipeline.current_step = name
+    pipeline.current_started_at = time.monotonic()
+    try:
+        yield pipeline.label()
+        pipeline.new_durations.setdefault(name, []).append(time.monotonic() - pipeline.current_started_at)
+        pipeline.done_steps.append(name)
+    finally:
+        pipeline.current_step = None
+        pipeline.current_started_at = None
+
+
+def format_duration(seconds: float) -> str:
+    """
+    >>> progress.format_duration(392)
+    >>> # "6m32s"
+    """
+    seconds = int(round(seconds))
+    if seconds < 60:
+        return f"{seconds}s"
+
+    if seconds < 3600:
+        return f"{seconds // 60}m{seconds % 60:02d}s"
+
+    return f"{seconds // 3600}h{seconds % 3600 // 60:02d}m"
+
+
+def _record(pipeline: PipelineProgress, succeeded: bool) -> None:
+    if len(pipeline.new_durations) == 0 and not succeeded:
+        return
+
+    with state.lock(pipeline.project_dir, LOCK_ENTRY):
+        store = state.read_json(pipeline.project_dir, DURATIONS_ENTRY) or {}
+        durations = store.setdefault('commands', {})
+        for name, new_durations in pipeline.new_durations.items():
+            durations[name] = (durations.get(name, []) + new_durations)[-MAX_RECORDED_DURATIONS:]
+
+        if succeeded:
+            store.setdefault('pipelines', {})[pipeline.root] = pipeline.done_steps
+
+        state.write_json(pipeline.project_dir, DURATIONS_ENTRY, store)
+
+
+def _start_ci_ticker(pipeline: PipelineProgress) -> Optional[threading.Event]:
+    """
+    Logs the progress periodically when the output is not a terminal, the progress label of the steps
+    is not enough to follow a long step in the log of a continuous integration.
+    """
+    if len(pipeline.expected_steps) == 0 or (sys.stdout.isatty() and os.environ.get('CI') is None):
+        return None
+
+    stopped = threading.Event()
+
+    def log_progress():
+        while not stopped.wait(CI_PROGRESS_INTERVAL):
+            current_step, started_at = pipeline.current_step, pipeline.current_started_at
+            if current_step is None:
+                continue
+
+            time_left = pipeline.time_left()
+            echo.message(f"progress: {current_step} running for {format_duration(time.monotonic() - started_at)}, "
+                         f"{len(pipeline.done_steps)}/{len(pipeline.expected_steps)} steps done"
+                         + (f", {format_duration(time_left)} left" if time_left is not None else ""))
+
+    threading.Thread(target=log_progress, daemon=True).start()
+    return stopped
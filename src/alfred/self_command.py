@@ -11,13 +11,15 @@ from typing import List, Optional
 import shellingham
 from click.exceptions import Exit
 
-from alfred import logger, echo, commands, alfred_prompt, manifest, resource
+from alfred import logger, echo, commands, dependencies, alfred_prompt, manifest, multiproject, parallel, project, resource
+from alfred.domain.project import AlfredProject
 from alfred.lib import slugify
 
 
 def check():
     logger.debug("Checking commands integrity...")
     is_ok = commands.check_integrity()
+    is_ok = dependencies.check_integrity() and is_ok
     if is_ok is True:
         logger.debug("Commands integrity is ok")
         raise Exit(code=0)
@@ -65,6 +67,37 @@ def new(shell_cmd: Optional[str] = None, project_dir: Optional[str] = None):
 
     raise Exit(code=0)
 
+def affected(base_ref: str, args: List[str], projects_pattern: Optional[str] = None):
+    """
+    Runs a command only in the projects affected by the changes since ``base_ref``.
+
+    >>> # alfred --affected origin/main tests
+    """
+    projects = _select_projects(args, projects_pattern)
+    projects = multiproject.affected_projects(base_ref, projects)
+    logger.debug(f"projects affected since {base_ref}: {[_project.name for _project in projects]}")
+    if len(projects) == 0:
+        echo.message(f"no project is affected by the changes since {base_ref}")
+        raise Exit(code=0)
+
+    _run_in_projects(projects, args)
+
+
+def all_projects(args: List[str], projects_pattern: Optional[str] = None):
+    """
+    Runs a command in the main project and in all its subprojects.
+
+    >>> # alfred --all tests
+    >>> # alfred --all --projects "products/*" tests
+    """
+    projects = _select_projects(args, projects_pattern)
+    if len(projects) == 0:
+        echo.message(f"no project matches {projects_pattern}")
+        raise Exit(code=0)
+
+    _run_in_projects(projects, args)
+
+
 def version():
     import alfred  # pylint: disable=import-outside-toplevel
     echo.message(f"{alfred.__version__}")
@@ -95,6 +128,27 @@ def completion_supported_shells() -> List[str]:
     return ["bash", "zsh", "fish"]
 
 
+def _select_projects(args: List[str], projects_pattern: Optional[str]) -> List[AlfredProject]:
+    if len(args) == 0:
+        echo.error("a command is required, for example: alfred --all tests")
+        raise Exit(code=1)
+
+    projects = project.list_all()
+    if projects_pattern is not None:
+        projects = multiproject.select_projects(projects, projects_pattern, manifest.lookup_project_dir())
+
+    return projects
+
+
+def _run_in_projects(projects: List[AlfredProject], args: List[str]):
+    results = multiproject.run_command(projects, args[0], args[1:])
+    if len(results) > 0:
+        multiproject.display_summary(results)
+
+    failure = parallel.first_failure(results)
+    raise Exit(code=failure.return_code if failure is not None else 0)
+
+
 def _scaffhold_command(project_dir: str, module_target: str, tpl_command_variables: dict):
     target_file = os.path.join(project_dir, module_target)
     if os.path.isfile(target_file) is False:
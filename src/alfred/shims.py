@@ -0,0 +1,171 @@
+"""
+This module resolves the shims of the version managers pyenv and asdf. A shim is a script that looks for
+the version of a tool to use before starting it, it costs between 50 and 150 ms on each call.
+
+alfred asks the version manager which program a shim targets and starts this program directly. The target
+is cached as long as the working directory and the version files (``.python-version``, ``.tool-versions``, ...)
+are unchanged.
+
+>>> executable = shims.resolve("/home/far/.pyenv/shims/python", os.getcwd(), process.environment())
+>>> # executable == "/home/far/.pyenv/versions/3.11.4/bin/python"
+
+The program started directly skips what the shim does besides choosing the version. An asdf plugin may declare
+an ``exec-env`` hook that sets environment variables before its tool starts, the tool runs without them.
+The bypass is disabled with ``shims_bypass = false`` in the section ``[alfred.project]`` of the manifest.
+"""
+import functools
+import hashlib
+import json
+import os
+import shutil
+import subprocess
+import threading
+from typing import Dict, Optional, Tuple
+
+import alfred.os
+from alfred import ctx, lib, logger, manifest, state
+
+"""
+The version managers with their root directory, given by an environment variable or a default location.
+"""
+MANAGERS = {
+    'pyenv': ('PYENV_ROOT', os.path.join('~', '.pyenv')),
+    'asdf': ('ASDF_DATA_DIR', os.path.join('~', '.asdf')),
+}
+
+VERSION_FILES = ['.python-version', '.tool-versions']
+CACHE_ENTRY = 'shims.json'
+
+_lock = threading.Lock()
+_resolved: Dict[str, Optional[str]] = {}
+
+
+def resolve(executable: str, cwd: str, env: Dict[str, str]) -> str:
+    """
+    Returns the program targeted by a shim. An executable that is not a shim, or a shim the version manager
+    fails to resolve, is returned as is.
+    """
+    manager = shim_manager(executable, env)
+    if manager is None or not _bypass_enabled():
+        return executable
+
+    key = _cache_key(executable, cwd, env)
+    with _lock:
+        if len(_resolved) == 0:
+            _resolved.update(_load_cache())
+
+        target = _resolved.get(key)
+        if target is not None and os.path.isfile(target):
+            return target
+
+    target = _which(manager, executable, cwd, env)
+    logger.debug(f"shim {executable} resolved to {target} in {cwd}")
+    with _lock:
+        _resolved[key] = target
+        _save_cache()
+
+    return target if target is not None else executable
+
+
+def shim_manager(executable: str, env: Dict[str, str]) -> Optional[Tuple[str, str]]:
+    """
+    Returns the name and the root directory of the version manager that owns a shim.
+
+    >>> manager = shims.shim_manager("/home/far/.pyenv/shims/python", os.environ)
+    >>> # manager == ("pyenv", "/home/far/.pyenv")
+    """
+    if alfred.os.is_windows():
+        return None
+
+    directory = os.path.dirname(executable)
+    for name, (root_variable, default_root) in MANAGERS.items():
+        root = os.path.expanduser(env.get(root_variable, default_root))
+        if directory == os.path.join(root, 'shims'):
+            return name, root
+
+    return None
+
+
+def cache_clear() -> None:
+    """
+    Forgets the resolved shims and the ``shims_bypass`` setting of the projects.
+    """
+    with _lock:
+        _resolved.clear()
+
+    _project_bypass_enabled.cache_clear()
+
+
+def _which(manager: Tuple[str, str], executable: str, cwd: str, env: Dict[str, str]) -> Optional[str]:
+    name, root = manager
+    manager_executable = os.path.join(root, 'bin', name)
+    if not os.path.isfile(manager_executable):
+        manager_executable = shutil.which(name, path=env.get('PATH'))
+
+    if manager_executable is None:
+        return None
+
+    result = subprocess.run([manager_executable, 'which', os.path.basename(executable)], cwd=cwd, env=env,
+                            stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, check=False)
+    target = result.stdout.decode('utf-8').strip()
+    if result.returncode != 0 or not os.path.isfile(target):
+        return None
+
+    return target
+
+
+def _cache_key(executable: str, cwd: str, env: Dict[str, str]) -> str:
+    """
+    The key changes with the state of the version files that apply to the working directory,
+    including the global versions of pyenv and asdf, and with the variables that select a version.
+    """
+    version_files = [os.path.join(directory, filename)
+                     for directory in lib.list_hierarchy_directory(cwd)
+                     for filename in VERSION_FILES]
+    version_files.append(os.path.join(os.path.expanduser(env.get('PYENV_ROOT', MANAGERS['pyenv'][1])), 'version'))
+    version_files.append(os.path.join(os.path.expanduser('~'), '.tool-versions'))
+
+    key_state = [executable, cwd]
+    for path in version_files:
+        try:
+            stat = os.stat(path)
+            key_state.append(f"{path}:{stat.st_mtime_ns}:{stat.st_size}")
+        except OSError:
+            pass
+
+    key_state += [f"{key}={value}" for key, value in sorted(env.items())
+                  if key == 'PYENV_VERSION' or (key.startswith('ASDF_') and key.endswith('_VERSION'))]
+    return hashlib.sha256(json.dumps(key_state).encode('utf-8')).hexdigest()
+
+
+def _load_cache() -> Dict[str, Optional[str]]:
+    project_dir = _project_dir()
+    if project_dir is None:
+        return {}
+
+    return state.read_json(project_dir, CACHE_ENTRY) or {}
+
+
+def _save_cache() -> None:
+    project_dir = _project_dir()
+    if project_dir is not None:
+        state.write_json(project_dir, CACHE_ENTRY, _resolved)
+
+
+def _bypass_enabled() -> bool:
+    project_dir = _project_dir()
+    if project_dir is None:
+        return True
+
+    return _project_bypass_enabled(project_dir)
+
+
+@functools.lru_cache(maxsize=None)
+def _project_bypass_enabled(project_dir: str) -> bool:
+    # the manifest is read once per project, a resolution happens on each program started
+    return manifest.lookup_parameter_project('shims_bypass', project_dir) is not False
+
+
+def _project_dir() -> Optional[str]:
+    command = ctx.current_command()
+    return command.project_dir if command is not None else None
@@ -0,0 +1,90 @@
+"""
+This module stores the state alfred keeps between two invocations in the directory ``.alfred`` of a project.
+
+>>> state.write_json(project_dir, "incremental/dist.json", {"fingerprint": "..."})
+>>> data = state.read_json(project_dir, "incremental/dist.json")
+"""
+import contextlib
+import json
+import os
+import tempfile
+from typing import Optional, Any, ContextManager
+
+import alfred.os
+
+STATE_DIRECTORY = '.alfred'
+
+
+def directory(project_dir: str) -> str:
+    """
+    Returns the state directory of a project. The directory is created on first use with
+    a ``.gitignore`` to keep it out of the repository.
+
+    >>> state_dir = state.directory(alfred.project_directory())
+    """
+    state_dir = os.path.join(project_dir, STATE_DIRECTORY)
+    if not os.path.isdir(state_dir):
+        os.makedirs(state_dir, exist_ok=True)
+        with open(os.path.join(state_dir, '.gitignore'), 'w', encoding='utf-8') as filep:
+            filep.write('*\n')
+
+    return state_dir
+
+
+def path(project_dir: str, name: str) -> str:
+    """
+    Returns the path of an entry of the state directory, its parent directory is created if needed.
+
+    >>> index_path = state.path(project_dir, "files.json")
+    """
+    entry_path = os.path.join(directory(project_dir), name)
+    os.makedirs(os.path.dirname(entry_path), exist_ok=True)
+    return entry_path
+
+
+@contextlib.contextmanager
+def lock(project_dir: str, name: str) -> ContextManager[None]:
+    """
+    Takes an exclusive lock shared with the other alfred processes. The lock is released when the block ends.
+
+    >>> with state.lock(project_dir, "cache.lock"):
+    >>>     state.write_json(project_dir, "cache/entries.json", entries)
+    """
+    with open(path(project_dir, name), 'a+b') as filep:
+        if alfred.os.is_windows():
+            import msvcrt  # pylint: disable=import-outside-toplevel,import-error
+            filep.seek(0)
+            msvcrt.locking(filep.fileno(), msvcrt.LK_LOCK, 1)
+        else:
+            import fcntl  # pylint: disable=import-outside-toplevel,import-error
+            fcntl.flock(filep.fileno(), fcntl.LOCK_EX)
+
+        yield
+
+
+def read_json(project_dir: str, name: str) -> Optional[Any]:
+    """
+    Reads an entry of the state directory. It returns None if the entry does not exist or is not readable.
+    """
+    entry_path = os.path.join(project_dir, STATE_DIRECTORY, name)
+    try:
+        with open(entry_path, encoding='utf-8') as filep:
+            return json.load(filep)
+    except (OSError, ValueError):
+        return None
+
+
+def write_json(project_dir: str, name: str, data: Any) -> None:
+    """
+    Writes an entry of the state directory. The entry is replaced atomically, a concurrent reader
+    sees either the previous version or the new one.
+    """
+    entry_path = path(project_dir, name)
+    filep = tempfile.NamedTemporaryFile('w', dir=os.path.dirname(entry_path), suffix='.tmp', delete=False, encoding='utf-8')  # pylint: disable=consider-using-with
+    try:
+        with filep:
+            json.dump(data, filep)
+        os.replace(filep.name, entry_path)
+    except BaseException:
+        os.remove(filep.name)
+        raise
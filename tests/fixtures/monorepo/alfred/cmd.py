@@ -0,0 +1,6 @@
+import alfred
+
+
+@alfred.command("lint")
+def lint():
+    print("lint monorepo")
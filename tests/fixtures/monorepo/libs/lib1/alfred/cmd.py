@@ -0,0 +1,6 @@
+import alfred
+
+
+@alfred.command("tests")
+def tests():
+    print("tests lib1")
@@ -1,4 +1,3 @@
-import os
 import sys
 
 import alfred
@@ -18,13 +17,15 @@ def print_python_exec():
 @alfred.command("pythonpath")
 @alfred.pythonpath()
 def pythonpath():
-    print(f"{os.getenv('PYTHONPATH')}")
+    python = alfred.sh(sys.executable)
+    alfred.run(python, ["-c", "import os; print(os.environ['PYTHONPATH'])"])
 
 
 @alfred.command("pythonpath_src")
 @alfred.pythonpath(['src'])
 def pythonpath_src():
-    print(f"{os.getenv('PYTHONPATH')}")
+    python = alfred.sh(sys.executable)
+    alfred.run(python, ["-c", "import os; print(os.environ['PYTHONPATH'])"])
 
 
 @alfred.command("hello_world_2")
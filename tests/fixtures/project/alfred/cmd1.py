@@ -13,13 +13,15 @@ def hello_world_command(name):
 @alfred.command("pythonpath")
 @alfred.pythonpath()
 def pythonpath():
-    print(f"{os.getenv('PYTHONPATH')}")
+    python = alfred.sh(sys.executable)
+    alfred.run(python, ["-c", "import os; print(os.environ['PYTHONPATH'])"])
 
 
 @alfred.command("pythonpath_src")
 @alfred.pythonpath(['src'])
 def pythonpath_src():
-    print(f"{os.getenv('PYTHONPATH')}")
+    python = alfred.sh(sys.executable)
+    alfred.run(python, ["-c", "import os; print(os.environ['PYTHONPATH'])"])
 
 
 @alfred.command("hello_world_2")
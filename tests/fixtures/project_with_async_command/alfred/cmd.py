@@ -0,0 +1,38 @@
+import asyncio
+import sys
+
+import alfred
+
+
+@alfred.command("ci")
+async def ci():
+    python = alfred.sh(sys.executable)
+    results = await asyncio.gather(*[alfred.arun(python, ["-c", f"print('job {i}')"], stream_stdout=False) for i in range(3)])
+    for _, stdout, _ in results:
+        print(stdout.strip())
+
+    alfred.invoke_command("lint")
+
+
+@alfred.command("lint")
+async def lint():
+    python = alfred.sh(sys.executable)
+    await alfred.arun(python, ["-c", "print('lint')"])
+
+
+@alfred.command("slow")
+async def slow():
+    python = alfred.sh(sys.executable)
+    await asyncio.wait_for(alfred.arun(python, ["-c", "import time; time.sleep(30)"]), timeout=0.2)
+
+
+@alfred.command("fail")
+async def fail():
+    python = alfred.sh(sys.executable)
+    await alfred.arun(python, ["-c", "import sys; sys.exit(3)"])
+
+
+@alfred.command("hang", timeout=0.5)
+async def hang():
+    python = alfred.sh(sys.executable)
+    await alfred.arun(python, ["-c", "import time; print('started', flush=True); time.sleep(30)"], sample_interval=0.1)
@@ -0,0 +1,33 @@
+import sys
+
+import alfred
+
+
+@alfred.command("compile")
+def compile_command():
+    print("compile")
+
+
+@alfred.command("lint", depends=["compile"])
+def lint():
+    print("lint")
+
+
+@alfred.command("tests", depends=["compile"])
+def tests():
+    print("tests")
+
+
+@alfred.command("dist", depends=["lint", "tests"])
+def dist():
+    print("dist")
+
+
+@alfred.command("broken")
+def broken():
+    sys.exit(3)
+
+
+@alfred.command("dist_broken", depends=["lint", "broken"])
+def dist_broken():
+    print("dist_broken")
@@ -0,0 +1,11 @@
+import alfred
+
+
+@alfred.command("build", depends=["package"])
+def build():
+    print("build")
+
+
+@alfred.command("package", depends=["build"])
+def package():
+    print("package")
@@ -0,0 +1,51 @@
+import os
+import sys
+
+import alfred
+
+
+@alfred.command("build")
+@alfred.option("--name", default="world")
+@alfred.inputs("src/**/*.txt")
+@alfred.outputs("dist/*")
+def build(name):
+    os.makedirs("dist", exist_ok=True)
+    with open("src/message.txt", encoding="utf-8") as filep:
+        message = filep.read().strip()
+
+    with open("dist/message.txt", "w", encoding="utf-8") as filep:
+        filep.write(f"{message} {name}\n")
+
+    python = alfred.sh(sys.executable)
+    alfred.run(python, ["-c", f"print('build {message} {name}')"])
+
+
+@alfred.command("package", cache_inputs=["src/**/*.txt"], cache_outputs=["dist/*"])
+def package():
+    os.makedirs("dist", exist_ok=True)
+    with open("src/message.txt", encoding="utf-8") as filep:
+        message = filep.read().strip()
+
+    with open("dist/package.txt", "w", encoding="utf-8") as filep:
+        filep.write(f"package {message}\n")
+
+    python = alfred.sh(sys.executable)
+    alfred.run(python, ["-c", f"print('package {message}')"])
+
+
+@alfred.command("site", cache_inputs=["src/**/*.txt"], cache_outputs=["site/*"])
+def site():
+    # like an incremental builder, only the pages whose source has changed are written again
+    os.makedirs("site", exist_ok=True)
+    for source in sorted(os.listdir("src")):
+        with open(os.path.join("src", source), encoding="utf-8") as filep:
+            content = filep.read()
+
+        page = os.path.join("site", source.replace(".txt", ".html"))
+        if os.path.isfile(page):
+            with open(page, encoding="utf-8") as filep:
+                if filep.read() == content:
+                    continue
+
+        with open(page, "w", encoding="utf-8") as filep:
+            filep.write(content)
@@ -0,0 +1,26 @@
+import sys
+
+import alfred
+
+# counts the job slots available in the pipe of the jobserver, then gives them back
+COUNT_TOKENS = """
+import os
+auth = [flag for flag in os.environ.get('MAKEFLAGS', '').split() if flag.startswith('--jobserver-auth=')]
+read_fd, write_fd = (int(fd) for fd in auth[0].split('=')[1].split(','))
+os.set_blocking(read_fd, False)
+tokens = b''
+try:
+    while True:
+        tokens += os.read(read_fd, 1)
+except BlockingIOError:
+    pass
+os.write(write_fd, tokens)
+print('tokens', len(tokens))
+"""
+
+
+@alfred.command("tokens")
+def tokens():
+    python = alfred.sh(sys.executable)
+    alfred.run(python, ["-c", COUNT_TOKENS])
+    alfred.run(python, ["-c", COUNT_TOKENS])
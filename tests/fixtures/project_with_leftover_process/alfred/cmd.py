@@ -0,0 +1,18 @@
+import sys
+
+import alfred
+
+LEAVE_CHILD = "import subprocess, sys; child = subprocess.Popen([sys.executable, '-c', 'import time; time.sleep(30)'], stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL); print(child.pid)"
+
+
+@alfred.command("leak", help="start a program that leaves a child running")
+def leak():
+    python = alfred.sh(sys.executable)
+    alfred.run(python, ["-c", LEAVE_CHILD], input="")
+
+
+@alfred.command("leak_and_fail", help="leave a child running and fail")
+def leak_and_fail():
+    python = alfred.sh(sys.executable)
+    alfred.run(python, ["-c", LEAVE_CHILD], input="")
+    alfred.run(python, ["-c", "raise SystemExit(3)"])
@@ -0,0 +1,27 @@
+import alfred
+
+
+@alfred.command("ci", help="run the pipeline")
+def ci():
+    alfred.invoke_command("lint")
+    alfred.invoke_command("tests")
+
+
+@alfred.command("lint", help="lint the code")
+def lint():
+    alfred.invoke_command("format")
+
+
+@alfred.command("format", help="format the code")
+def format_code():
+    print("format")
+
+
+@alfred.command("tests", help="run the tests")
+def tests():
+    print("tests")
+
+
+@alfred.command("ci_parallel", help="run the pipeline concurrently")
+def ci_parallel():
+    alfred.invoke_commands(["lint", "tests"])
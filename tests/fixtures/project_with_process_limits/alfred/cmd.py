@@ -0,0 +1,21 @@
+import os
+import sys
+
+import alfred
+
+
+@alfred.command("low_priority", nice=7)
+def low_priority():
+    python = alfred.sh(sys.executable)
+    alfred.run(python, ["-c", "import os; print('nice', os.getpriority(os.PRIO_PROCESS, 0))"])
+    alfred.run(python, ["-c", "import os; print('nice', os.getpriority(os.PRIO_PROCESS, 0))"], nice=12)
+
+
+@alfred.command("alfred_priority")
+def alfred_priority():
+    print('nice', os.getpriority(os.PRIO_PROCESS, 0))
+
+
+@alfred.command("pipeline")
+def pipeline():
+    alfred.invoke_command("low_priority")
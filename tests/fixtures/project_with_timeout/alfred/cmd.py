@@ -0,0 +1,20 @@
+import sys
+
+import alfred
+
+
+@alfred.command("hang", timeout=0.5)
+def hang():
+    python = alfred.sh(sys.executable)
+    alfred.run(python, ["-c", "import time; print('started', flush=True); time.sleep(30)"])
+
+
+@alfred.command("quick", timeout=10)
+def quick():
+    python = alfred.sh(sys.executable)
+    alfred.run(python, ["-c", "print('done')"], timeout=5)
+
+
+@alfred.command("pipeline")
+def pipeline():
+    alfred.invoke_command("hang")
@@ -0,0 +1,36 @@
+import asyncio
+
+import fixtup
+import pytest
+
+from tests.fixtures import alfred_fixture
+
+
+def test_async_command_should_run_programs_concurrently():
+    with fixtup.up("project_with_async_command"):
+        exit_code, stdout, _ = alfred_fixture.invoke(["ci"])
+
+        assert exit_code == 0
+        assert stdout.splitlines() == ["job 0", "job 1", "job 2", "$ alfred lint : ", "lint"]
+
+
+def test_async_command_should_exit_with_the_return_code_of_a_failed_program():
+    with fixtup.up("project_with_async_command"):
+        exit_code, _, _ = alfred_fixture.invoke(["fail"])
+
+        assert exit_code == 3
+
+
+def test_async_command_should_kill_the_program_when_its_timeout_expires():
+    with fixtup.up("project_with_async_command"):
+        with pytest.raises(asyncio.TimeoutError):
+            alfred_fixture.invoke(["slow"])
+
+
+def test_async_command_should_stop_the_program_when_the_timeout_of_the_command_expires():
+    with fixtup.up("project_with_async_command"):
+        exit_code, stdout, stderr = alfred_fixture.invoke(["hang"])
+
+        assert exit_code == 124
+        assert "started" in stdout
+        assert "timeout expired" in stderr
@@ -0,0 +1,97 @@
+import os
+
+import fixtup
+
+from alfred import cache, state
+from tests.fixtures import alfred_fixture
+
+
+def test_command_should_restore_its_outputs_from_the_cache():
+    with fixtup.up("project_with_incremental"):
+        alfred_fixture.invoke(["package"])
+        _write("src/message.txt", "bonjour\n")
+        alfred_fixture.invoke(["package"])
+        _write("src/message.txt", "hello\n")
+
+        exit_code, stdout, _ = alfred_fixture.invoke(["package"])
+
+        assert exit_code == 0
+        assert "outputs restored from the cache" in stdout
+        assert "package hello" in stdout
+        assert _read("dist/package.txt") == "package hello\n"
+
+
+def test_command_should_not_alter_the_cache_when_it_modifies_a_restored_output():
+    with fixtup.up("project_with_incremental"):
+        alfred_fixture.invoke(["package"])
+        _write("src/message.txt", "bonjour\n")
+        alfred_fixture.invoke(["package"])
+        _write("src/message.txt", "hello\n")
+        alfred_fixture.invoke(["package"])
+        _write("src/message.txt", "hola\n")
+        exit_code, _, _ = alfred_fixture.invoke(["package"])
+        assert exit_code == 0
+        assert _read("dist/package.txt") == "package hola\n"
+
+        _write("src/message.txt", "hello\n")
+        alfred_fixture.invoke(["package"])
+
+        assert _read("dist/package.txt") == "package hello\n"
+
+
+def test_command_should_restore_the_outputs_that_an_incremental_run_has_kept():
+    with fixtup.up("project_with_incremental"):
+        _write("src/page.txt", "page\n")
+        alfred_fixture.invoke(["site"])
+        _write("src/message.txt", "bonjour\n")
+        alfred_fixture.invoke(["site"])
+        _write("src/message.txt", "hello\n")
+        alfred_fixture.invoke(["site"])
+        _write("src/message.txt", "bonjour\n")
+
+        exit_code, stdout, _ = alfred_fixture.invoke(["site"])
+
+        assert exit_code == 0
+        assert "outputs restored from the cache" in stdout
+        assert sorted(os.listdir("site")) == ["message.html", "page.html"]
+        assert _read("site/message.html") == "bonjour\n"
+        assert _read("site/page.html") == "page\n"
+
+
+def test_command_should_remove_the_outputs_that_the_restored_run_has_not_produced():
+    with fixtup.up("project_with_incremental"):
+        alfred_fixture.invoke(["package"])
+        _write("src/message.txt", "bonjour\n")
+        alfred_fixture.invoke(["package"])
+        _write("dist/stale.txt", "stale\n")
+        _write("src/message.txt", "hello\n")
+
+        exit_code, stdout, _ = alfred_fixture.invoke(["package"])
+
+        assert exit_code == 0
+        assert "outputs restored from the cache" in stdout
+        assert os.listdir("dist") == ["package.txt"]
+        assert _read("dist/package.txt") == "package hello\n"
+
+
+def test_evict_should_remove_the_least_recently_used_runs():
+    with fixtup.up("project_with_incremental"):
+        project_dir = os.getcwd()
+        alfred_fixture.invoke(["package"])
+
+        with state.lock(project_dir, cache.LOCK_ENTRY):
+            cache.evict(project_dir, 0)
+
+        exit_code, stdout, _ = alfred_fixture.invoke(["package"])
+        assert exit_code == 0
+        assert "outputs restored from the cache" not in stdout
+
+
+def _write(path: str, content: str) -> None:
+    with open(path, "w", encoding="utf-8") as filep:
+        filep.write(content)
+
+
+def _read(path: str) -> str:
+    with open(path, encoding="utf-8") as filep:
+        return filep.read()
@@ -0,0 +1,48 @@
+import fixtup
+
+from alfred import dependencies, commands
+from tests.fixtures import alfred_fixture
+
+
+def test_invoke_command_should_execute_its_dependencies_once():
+    with fixtup.up("project_with_dependencies"):
+        exit_code, stdout, _ = alfred_fixture.invoke(["dist"])
+
+        assert exit_code == 0
+        lines = stdout.splitlines()
+        assert lines.count("compile") == 1
+        assert lines.index("compile") < lines.index("lint")
+        assert lines.index("compile") < lines.index("tests")
+        assert lines[-1] == "dist"
+
+
+def test_invoke_command_should_skip_dependencies_with_no_deps():
+    with fixtup.up("project_with_dependencies"):
+        exit_code, stdout, _ = alfred_fixture.invoke(["--no-deps", "dist"])
+
+        assert exit_code == 0
+        assert stdout == "dist\n"
+
+
+def test_invoke_command_should_stop_when_a_dependency_fails():
+    with fixtup.up("project_with_dependencies"):
+        exit_code, stdout, _ = alfred_fixture.invoke(["dist_broken"])
+
+        assert exit_code == 3
+        assert "dist_broken" not in stdout
+
+
+def test_graph_should_raise_an_error_on_cycle():
+    with fixtup.up("project_with_dependency_cycle"):
+        exit_code, _, stderr = alfred_fixture.invoke(["build"])
+
+        assert exit_code == 1
+        assert "dependency cycle detected: build -> package -> build" in stderr
+
+
+def test_check_integrity_should_detect_dependency_cycle():
+    with fixtup.up("project_with_dependency_cycle"):
+        assert dependencies.check_integrity() is False
+
+    with fixtup.up("project_with_dependencies"):
+        assert dependencies.check_integrity() is True
@@ -0,0 +1,88 @@
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from unittest import mock
+
+import fixtup
+import pytest
+
+from alfred import file_index
+
+
+def test_digests_should_not_hash_again_a_file_whose_stat_is_unchanged():
+    with fixtup.up("project_with_incremental"):
+        project_dir = os.getcwd()
+        _age_file("src/message.txt")
+        expected = file_index.files_digest(project_dir, ["src/**/*.txt"])
+
+        with mock.patch.object(file_index, "file_digest", side_effect=AssertionError("file hashed again")):
+            digests = file_index.files_digest(project_dir, ["src/**/*.txt"])
+
+        assert digests == expected
+        assert list(digests) == [os.path.join("src", "message.txt")]
+
+
+def test_digests_should_hash_again_a_modified_file():
+    with fixtup.up("project_with_incremental"):
+        project_dir = os.getcwd()
+        _age_file("src/message.txt")
+        previous = file_index.files_digest(project_dir, ["src/**/*.txt"])
+
+        with open("src/message.txt", "w", encoding="utf-8") as filep:
+            filep.write("bonjour\n")
+
+        assert file_index.files_digest(project_dir, ["src/**/*.txt"]) != previous
+
+
+def test_digests_should_leave_out_a_file_removed_since_it_was_listed():
+    with fixtup.up("project_with_incremental"):
+        project_dir = os.getcwd()
+        paths = file_index.list_files(project_dir, ["src/**/*.txt"])
+        os.remove("src/message.txt")
+
+        assert file_index.digests(project_dir, paths) == {}
+
+
+def test_digests_should_keep_the_files_indexed_by_concurrent_updates():
+    with fixtup.up("project_with_incremental"):
+        project_dir = os.getcwd()
+        paths = []
+        for i in range(8):
+            paths.append(os.path.join("src", f"file{i}.txt"))
+            with open(paths[-1], "w", encoding="utf-8") as filep:
+                filep.write(f"file {i}\n")
+            _age_file(paths[-1])
+
+        with ThreadPoolExecutor(max_workers=8) as executor:
+            list(executor.map(lambda path: file_index.digests(project_dir, [path]), paths))
+
+        with mock.patch.object(file_index, "file_digest", side_effect=AssertionError("file hashed again")):
+            assert list(file_index.digests(project_dir, paths)) == paths
+
+
+def test_changed_since_should_list_the_files_modified_since_the_last_snapshot():
+    with fixtup.up("project_with_incremental"):
+        project_dir = os.getcwd()
+        assert file_index.changed_since(project_dir, "lint", ["src/*.txt"]) == [os.path.join("src", "message.txt")]
+        assert file_index.changed_since(project_dir, "lint", ["src/*.txt"]) == []
+
+        with open("src/message.txt", "w", encoding="utf-8") as filep:
+            filep.write("bonjour\n")
+
+        assert file_index.changed_since(project_dir, "lint", ["src/*.txt"]) == [os.path.join("src", "message.txt")]
+
+
+def test_changed_since_should_not_record_the_snapshot_when_the_command_fails():
+    with fixtup.up("project_with_incremental"):
+        project_dir = os.getcwd()
+        with pytest.raises(ValueError):
+            with file_index.record_snapshots_on_success():
+                file_index.changed_since(project_dir, "lint", ["src/*.txt"])
+                raise ValueError()
+
+        assert file_index.changed_since(project_dir, "lint", ["src/*.txt"]) == [os.path.join("src", "message.txt")]
+
+
+def _age_file(path: str) -> None:
+    past = time.time() - 60
+    os.utime(path, (past, past))
@@ -0,0 +1,50 @@
+import os
+
+import fixtup
+
+from tests.fixtures import alfred_fixture
+
+
+def test_command_should_be_skipped_when_its_inputs_have_not_changed():
+    with fixtup.up("project_with_incremental"):
+        alfred_fixture.invoke(["build"])
+        exit_code, stdout, _ = alfred_fixture.invoke(["build"])
+
+        assert exit_code == 0
+        assert "build is up to date" in stdout
+        assert "build hello world" in stdout
+
+
+def test_command_should_run_again_when_an_input_changes():
+    with fixtup.up("project_with_incremental"):
+        alfred_fixture.invoke(["build"])
+        with open("src/message.txt", "w", encoding="utf-8") as filep:
+            filep.write("bonjour\n")
+
+        exit_code, stdout, _ = alfred_fixture.invoke(["build"])
+
+        assert exit_code == 0
+        assert "up to date" not in stdout
+        assert "build bonjour world" in stdout
+
+
+def test_command_should_run_again_when_its_arguments_change():
+    with fixtup.up("project_with_incremental"):
+        alfred_fixture.invoke(["build"])
+        exit_code, stdout, _ = alfred_fixture.invoke(["build", "--name", "alfred"])
+
+        assert exit_code == 0
+        assert "up to date" not in stdout
+        assert "build hello alfred" in stdout
+
+
+def test_command_should_run_again_when_an_output_is_deleted():
+    with fixtup.up("project_with_incremental"):
+        alfred_fixture.invoke(["build"])
+        os.remove("dist/message.txt")
+
+        exit_code, stdout, _ = alfred_fixture.invoke(["build"])
+
+        assert exit_code == 0
+        assert "up to date" not in stdout
+        assert os.path.isfile("dist/message.txt")
@@ -0,0 +1,24 @@
+import os
+
+import fixtup
+import pytest
+
+import alfred.os
+from tests.fixtures import alfred_fixture
+
+
+@pytest.mark.skipif(alfred.os.is_windows(), reason="the jobserver is not supported on windows")
+def test_jobs_should_share_a_jobserver_with_the_programs():
+    with fixtup.up("project_with_jobserver"):
+        exit_code, stdout, _ = alfred_fixture.invoke(["--jobs", "4", "tokens"])
+
+        assert exit_code == 0
+        assert stdout.splitlines()[-2:] == ["tokens 3", "tokens 3"]
+
+
+@pytest.mark.skipif(alfred.os.is_windows() or "MAKEFLAGS" in os.environ, reason="the tests must not run under make")
+def test_jobs_should_not_be_shared_without_the_option():
+    with fixtup.up("project_with_jobserver"):
+        exit_code, _, _ = alfred_fixture.invoke(["tokens"])
+
+        assert exit_code != 0
@@ -0,0 +1,135 @@
+import os
+import signal
+import sys
+import time
+
+import fixtup
+import pytest
+
+from alfred import lifecycle, monitor, process
+from tests.fixtures import alfred_fixture
+
+LEAVE_CHILD = "import subprocess, sys; child = subprocess.Popen([sys.executable, '-c', 'import time; time.sleep(30)'], stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL); print(child.pid)"
+
+
+def test_start_should_run_a_program_that_does_not_read_the_terminal_in_its_own_process_group():
+    python = process.sh(sys.executable)
+    result = process.run(python, ["-c", "import os; print(os.getpgid(0) == os.getpid())"], input="", stream_stdout=False)
+
+    assert result.stdout.strip() == "True"
+
+
+def test_cleanup_should_stop_the_children_left_running_by_a_program(capsys):
+    python = process.sh(sys.executable)
+    result = process.run(python, ["-c", LEAVE_CHILD], input="", stream_stdout=False)
+    child_pid = int(result.stdout.strip())
+    assert _is_running(child_pid) is True
+
+    survivors = lifecycle.cleanup(grace_period=2)
+
+    assert survivors == []
+    assert _is_running(child_pid) is False
+    assert "alfred has stopped the processes left running by" in capsys.readouterr().err
+
+
+@pytest.mark.skipif(not monitor.supported(), reason="the adoption of orphans works on linux only")
+def test_cleanup_should_stop_the_orphans_of_a_program_that_reads_the_terminal(monkeypatch, capsys):
+    monkeypatch.setattr(lifecycle, "_terminal_input", lambda: True)
+    python = process.sh(sys.executable)
+    lifecycle.adopt_orphans()
+    result = process.run(python, ["-c", LEAVE_CHILD], stream_stdout=False)
+    child_pid = int(result.stdout.strip())
+    assert _is_running(child_pid) is True
+
+    survivors = lifecycle.cleanup(grace_period=2)
+
+    assert survivors == []
+    assert _is_running(child_pid) is False
+    assert "alfred has stopped the processes left running by: python" in capsys.readouterr().err
+
+
+@pytest.mark.skipif(not monitor.supported(), reason="the adoption of orphans works on linux only")
+def test_cleanup_should_not_stop_the_orphans_that_have_left_the_session_of_alfred(monkeypatch):
+    monkeypatch.setattr(lifecycle, "_terminal_input", lambda: True)
+    python = process.sh(sys.executable)
+    leave_daemon = LEAVE_CHILD.replace("stderr=subprocess.DEVNULL", "stderr=subprocess.DEVNULL, start_new_session=True")
+    lifecycle.adopt_orphans()
+    result = process.run(python, ["-c", leave_daemon], stream_stdout=False)
+    daemon_pid = int(result.stdout.strip())
+    try:
+        assert lifecycle.cleanup(grace_period=2) == []
+        assert _is_running(daemon_pid) is True
+    finally:
+        os.kill(daemon_pid, signal.SIGKILL)
+        os.waitpid(daemon_pid, 0)
+
+
+def test_cleanup_should_not_stop_a_detached_program(capsys):
+    python = process.sh(sys.executable)
+    running_process = process.start(python, ["-c", "import time; time.sleep(30)"], detach=True, stream_stdout=False)
+    try:
+        assert lifecycle.cleanup(grace_period=2) == []
+        assert _is_running(running_process.pids[0].pid) is True
+        assert os.getsid(running_process.pids[0].pid) == running_process.pids[0].pid
+        assert capsys.readouterr().err == ""
+    finally:
+        running_process.kill()
+        running_process.wait()
+
+
+def test_cleanup_should_not_report_the_programs_that_have_ended(capsys):
+    python = process.sh(sys.executable)
+    process.run(python, ["-c", "print('done')"], input="", stream_stdout=False)
+
+    assert lifecycle.cleanup(grace_period=2) == []
+    assert capsys.readouterr().err == ""
+
+
+def test_cleanup_should_leave_the_return_code_of_an_ended_program_to_its_owner(capsys):
+    python = process.sh(sys.executable)
+    running_process = process.start(python, ["-c", "raise SystemExit(3)"], input="", stream_stdout=False)
+    while lifecycle.group_alive(running_process.pids[0].pid):
+        time.sleep(0.05)
+
+    assert lifecycle.cleanup(grace_period=2) == []
+    assert running_process.wait().return_code == 3
+    assert capsys.readouterr().err == ""
+
+
+def test_forward_signal_should_send_the_signal_to_the_process_groups():
+    python = process.sh(sys.executable)
+    running_process = process.start(python, ["-c", "import time; time.sleep(30)"], input="", stream_stdout=False)
+
+    lifecycle.forward_signal(signal.SIGTERM)
+
+    assert running_process.wait().return_code == -signal.SIGTERM
+
+
+def test_command_should_stop_the_children_left_running_when_alfred_exits():
+    with fixtup.up("project_with_leftover_process"):
+        exit_code, stdout, stderr = alfred_fixture.invoke(["leak"])
+
+        assert exit_code == 0
+        assert _is_running(int(stdout.strip().splitlines()[-1])) is False
+        assert "alfred has stopped the processes left running by" in stderr
+
+
+def test_command_should_stop_the_children_left_running_when_it_fails():
+    with fixtup.up("project_with_leftover_process"):
+        exit_code, stdout, _ = alfred_fixture.invoke(["leak_and_fail"])
+
+        assert exit_code == 3
+        assert _is_running(int(stdout.strip().splitlines()[-1])) is False
+
+
+def _is_running(pid: int) -> bool:
+    # an orphan may stay a zombie if the init process of a container does not reap it
+    if os.path.isfile(f"/proc/{pid}/stat"):
+        with open(f"/proc/{pid}/stat", encoding="utf-8") as filep:
+            return filep.read().rsplit(")", 1)[1].split()[0] != "Z"
+
+    try:
+        os.kill(pid, 0)
+        return True
+    except ProcessLookupError:
+        return False
@@ -7,6 +7,7 @@ import fixtup
 import pytest
 
 import alfred
+from alfred import process
 from alfred.os import is_windows, is_posix
 from tests.fixtures import alfred_fixture
 
@@ -23,7 +24,8 @@ def test_pythonpath_should_add_alfred_project_directory_to_pythonpath_env_variab
     with fixtup.up("project"):
         with alfred_fixture.use_command_context("cmd:hello_world"):
             with alfred.pythonpath():
-                assert alfred.project_directory() in os.getenv('PYTHONPATH')
+                assert alfred.project_directory() in process.environment()['PYTHONPATH']
+                assert alfred.project_directory() not in os.getenv('PYTHONPATH', '')
 
 
 def test_invoke_command_should_invoke_command_in_the_same_project():
@@ -134,3 +136,50 @@ def test_run_should_not_handle_shell_instruction(cmd: str, for_platform: Callabl
             alfred.run("echo 'hello world' > /dev/null")
         except Exception as e:
             assert str(e).startswith("shell operations are not supported")
+
+
+def test_invoke_commands_should_invoke_commands_concurrently():
+    with fixtup.up("project"):
+        with alfred_fixture.use_command_context("cmd:hello_world"):
+            # Acts
+            @click.command
+            def click_wrapper():
+                alfred.invoke_commands([("cmd:hello_world", {"name": "alfred"}), "cmd:print_cwd"], jobs=2)
+
+            exit_code, stdout, _ = alfred_fixture.invoke_click(click_wrapper)
+
+            # Assert
+            assert exit_code == 0
+            assert "hello world, alfred" in stdout
+            assert os.path.realpath(os.getcwd()) in stdout
+
+
+def test_invoke_commands_should_prefix_the_lines_with_the_name_of_the_command():
+    with fixtup.up("project"):
+        with alfred_fixture.use_command_context("cmd:hello_world"):
+            # Acts
+            @click.command
+            def click_wrapper():
+                alfred.invoke_commands([("cmd:hello_world", {"name": "alfred"}), "cmd:print_cwd"], jobs=2, output_mode="prefixed")
+
+            exit_code, stdout, _ = alfred_fixture.invoke_click(click_wrapper)
+
+            # Assert
+            assert exit_code == 0
+            assert "[cmd:hello_world] hello world, alfred" in stdout
+            assert f"[cmd:print_cwd] {os.path.realpath(os.getcwd())}" in stdout
+
+
+def test_invoke_commands_should_exit_with_the_exit_code_of_the_failure():
+    with fixtup.up("project"):
+        with alfred_fixture.use_command_context("cmd:hello_world"):
+            # Acts
+            @click.command
+            def click_wrapper():
+                alfred.invoke_commands(["cmd:wrong_multicommand", "cmd:hello_world"], fail_fast=False)
+
+            exit_code, stdout, _ = alfred_fixture.invoke_click(click_wrapper)
+
+            # Assert
+            assert exit_code == 1
+            assert "hello world" in stdout
@@ -0,0 +1,80 @@
+import json
+import os
+import subprocess
+import sys
+
+import pytest
+from click import BaseCommand
+
+from alfred import ctx, monitor, process
+from alfred.domain.command import AlfredCommand
+
+
+@pytest.mark.skipif(not monitor.supported(), reason="the sampling of the process tree requires /proc")
+def test_process_run_should_sample_the_descendants_of_the_program():
+    python = process.Command(sys.executable)
+    script = "\n".join([
+        "import subprocess, sys, time",
+        "child = subprocess.Popen([sys.executable, '-c', 'data = bytearray(64 * 1024 * 1024); import time; time.sleep(1)'])",
+        "time.sleep(1)",
+    ])
+
+    # Acts
+    with ctx.use_new_context():
+        result = process.run(python, ["-c", script], sample_interval=0.1)
+
+    # Assert
+    assert result.tree_usage.samples > 0
+    assert result.tree_usage.peak_processes == 2
+    assert result.tree_usage.peak_rss > 64 * 1024 * 1024
+    assert result.tree_usage.timeline is None
+
+
+@pytest.mark.skipif(not monitor.supported(), reason="the sampling of the process tree requires /proc")
+def test_tree_sampler_should_write_a_timeline(tmp_path):
+    timeline_path = os.path.join(tmp_path, "timeline.jsonl")
+    with subprocess.Popen([sys.executable, "-c", "import time; time.sleep(0.5)"]) as pid:
+        sampler = monitor.TreeSampler([pid.pid], interval=0.1, timeline_path=timeline_path)
+        sampler.start()
+        pid.wait()
+        tree_usage = sampler.stop()
+
+    with open(timeline_path, encoding="utf-8") as filep:
+        samples = [json.loads(line) for line in filep]
+
+    assert len(samples) == tree_usage.samples
+    assert samples[0]["processes"] == 1
+    assert set(samples[0]) == {"time", "cpu", "rss", "processes"}
+
+
+@pytest.mark.skipif(not monitor.supported(), reason="the sampling of the process tree requires /proc")
+def test_tree_sampler_should_sample_a_program_whose_name_is_not_utf8(tmp_path):
+    program = os.path.join(os.fsencode(tmp_path), b"sleep\xff")
+    os.symlink(sys.executable, program)
+    with subprocess.Popen([program, "-c", "import time; time.sleep(0.5)"]) as pid:
+        sampler = monitor.TreeSampler([pid.pid], interval=0.1)
+        sampler.start()
+        pid.wait()
+        tree_usage = sampler.stop()
+
+    assert tree_usage.samples > 0
+    assert tree_usage.peak_processes == 1
+
+
+def test_default_timeline_path_should_keep_the_last_timelines(tmp_path, monkeypatch):
+    monkeypatch.setattr(monitor, "MAX_TIMELINES", 3)
+    monitor_directory = tmp_path / ".alfred" / monitor.MONITOR_DIRECTORY
+    monitor_directory.mkdir(parents=True)
+    for index in range(5):
+        timeline = monitor_directory / f"old-{index}.jsonl"
+        timeline.write_text("")
+        os.utime(timeline, (index, index))
+
+    with ctx.use_new_context():
+        alfred_command = AlfredCommand(BaseCommand("tests"))
+        alfred_command.project_dir = str(tmp_path)
+        ctx.stack_root_command(alfred_command)
+        timeline_path = monitor.default_timeline_path("pytest")
+
+    assert sorted(os.listdir(monitor_directory)) == ["old-3.jsonl", "old-4.jsonl"]
+    assert os.path.dirname(timeline_path) == str(monitor_directory)
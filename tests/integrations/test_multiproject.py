@@ -0,0 +1,77 @@
+import os
+import subprocess
+
+import fixtup
+
+from alfred import multiproject, project
+from tests.fixtures import alfred_fixture
+
+
+def test_affected_projects_should_select_the_projects_that_contain_a_change():
+    with fixtup.up("monorepo"):
+        _git_init()
+        _write("products/product1/src.txt", "product1")
+
+        projects = multiproject.affected_projects("HEAD", project.list_all())
+
+        assert [_project.name for _project in projects] == ["product1"]
+
+
+def test_affected_projects_should_select_the_projects_that_depend_on_a_change():
+    with fixtup.up("monorepo"):
+        _git_init()
+        _write("libs/lib1/src/lib1.txt", "lib1 v2")
+
+        projects = multiproject.affected_projects("HEAD", project.list_all())
+
+        assert sorted(_project.name for _project in projects) == ["lib1", "product2"]
+
+
+def test_alfred_affected_should_run_the_command_only_in_the_affected_projects():
+    with fixtup.up("monorepo"):
+        _git_init()
+        _write("libs/lib1/src/lib1.txt", "lib1 v2")
+
+        exit_code, stdout, _ = alfred_fixture.invoke(["--affected", "HEAD", "tests"])
+
+        assert exit_code == 0
+        assert "tests lib1" in stdout
+        assert "tests product2" in stdout
+        assert "tests product1" not in stdout
+
+
+def _git_init():
+    for args in [["init", "-q"], ["add", "."], ["-c", "user.name=alfred", "-c", "user.email=alfred@localhost", "commit", "-q", "-m", "init"]]:
+        subprocess.run(["git"] + args, check=True)
+
+
+def _write(path: str, content: str) -> None:
+    with open(path, "w", encoding="utf-8") as filep:
+        filep.write(content)
+
+
+def test_alfred_all_should_run_the_command_in_every_project_that_declares_it():
+    with fixtup.up("monorepo"):
+        exit_code, stdout, _ = alfred_fixture.invoke(["--all", "tests"])
+
+        assert exit_code == 0
+        for name in ["product1", "product2", "lib1"]:
+            assert f"tests {name}" in stdout
+        assert "exit code" in stdout
+
+
+def test_alfred_all_should_run_the_command_in_the_projects_matching_the_glob():
+    with fixtup.up("monorepo"):
+        exit_code, stdout, _ = alfred_fixture.invoke(["--all", "--projects", "products/*", "tests"])
+
+        assert exit_code == 0
+        assert "tests product1" in stdout
+        assert "tests product2" in stdout
+        assert "tests lib1" not in stdout
+
+
+def test_select_projects_should_match_the_name_of_the_project():
+    with fixtup.up("monorepo"):
+        projects = multiproject.select_projects(project.list_all(), "lib*", os.getcwd())
+
+        assert [_project.name for _project in projects] == ["lib1"]
@@ -0,0 +1,65 @@
+import sys
+import time
+
+from alfred import parallel, process
+
+
+def _python_job(name: str, code: str) -> parallel.Job:
+    python = process.Command(sys.executable)
+    return parallel.Job(name, lambda: process.start(python, ["-c", code], stream_stdout=False, stream_stderr=False))
+
+
+def test_run_jobs_should_run_jobs_concurrently():
+    # Arrange
+    jobs = [_python_job(f"job{i}", "import time; time.sleep(0.5); print('done')") for i in range(4)]
+
+    # Acts
+    started_at = time.monotonic()
+    results = parallel.run_jobs(jobs, max_workers=4)
+    duration = time.monotonic() - started_at
+
+    # Assert
+    assert [result.return_code for result in results] == [0, 0, 0, 0]
+    assert all("done" in result.result.stdout for result in results)
+    assert duration < 1.5
+
+
+def test_run_jobs_should_stop_other_jobs_on_failure():
+    # Arrange
+    jobs = [
+        _python_job("slow", "import time; time.sleep(30)"),
+        _python_job("failure", "import sys; sys.exit(3)"),
+        _python_job("pending", "print('pending')"),
+    ]
+
+    # Acts
+    started_at = time.monotonic()
+    results = parallel.run_jobs(jobs, max_workers=2, fail_fast=True)
+    duration = time.monotonic() - started_at
+
+    # Assert
+    assert duration < 10
+    assert results[0].cancelled is True
+    assert results[2].cancelled is True
+    assert parallel.first_failure(results).name == "failure"
+    assert parallel.first_failure(results).return_code == 3
+
+
+def test_run_jobs_should_start_jobs_concurrently():
+    # Arrange
+    python = process.Command(sys.executable)
+
+    def slow_start() -> process.RunningProcess:
+        time.sleep(0.5)
+        return process.start(python, ["-c", "print('done')"], stream_stdout=False)
+
+    jobs = [parallel.Job(f"job{i}", slow_start) for i in range(4)]
+
+    # Acts
+    started_at = time.monotonic()
+    results = parallel.run_jobs(jobs, max_workers=4)
+    duration = time.monotonic() - started_at
+
+    # Assert
+    assert [result.return_code for result in results] == [0, 0, 0, 0]
+    assert duration < 1.5
@@ -0,0 +1,47 @@
+import sys
+import time
+
+from alfred import pool, process, state
+
+
+def test_run_pool_should_return_the_results_in_the_order_of_the_jobs(tmp_path):
+    python = process.sh(sys.executable)
+    results = pool.run_pool([(python, ["-c", "import time; time.sleep(0.2); print('first')"]),
+                             (python, ["-c", "print('second')"])],
+                            max_workers=2, project_dir=str(tmp_path), stream_stdout=False)
+
+    assert [result.stdout for result in results] == ["first\n", "second\n"]
+    assert all(result.return_code == 0 for result in results)
+
+
+def test_run_pool_should_record_the_peak_memory_of_each_job(tmp_path):
+    python = process.sh(sys.executable)
+    job = (python, ["-c", "data = bytearray(64 * 1024 * 1024)"])
+    pool.run_pool([job], project_dir=str(tmp_path))
+
+    history = state.read_json(str(tmp_path), pool.MEMORY_ENTRY)
+    peaks = history[pool.fingerprint(process.pipe(*job))]
+    assert peaks[0] >= 64 * 1024 * 1024
+
+
+def test_run_pool_should_not_admit_jobs_beyond_the_memory_budget(tmp_path):
+    python = process.sh(sys.executable)
+    jobs = [(python, ["-c", f"import time; time.sleep(0.5); print({index})"]) for index in range(2)]
+    state.write_json(str(tmp_path), pool.MEMORY_ENTRY, {pool.fingerprint(process.pipe(*job)): [600 * 1024 * 1024] for job in jobs})
+
+    started_at = time.monotonic()
+    results = pool.run_pool(jobs, mem_budget="1G", max_workers=2, project_dir=str(tmp_path), stream_stdout=False)
+
+    assert time.monotonic() - started_at >= 1.0
+    assert all(result.return_code == 0 for result in results)
+
+
+def test_run_pool_should_run_jobs_concurrently_within_the_memory_budget(tmp_path):
+    python = process.sh(sys.executable)
+    jobs = [(python, ["-c", f"import time; time.sleep(1); print({index})"]) for index in range(2)]
+    state.write_json(str(tmp_path), pool.MEMORY_ENTRY, {pool.fingerprint(process.pipe(*job)): [100 * 1024 * 1024] for job in jobs})
+
+    started_at = time.monotonic()
+    pool.run_pool(jobs, mem_budget="1G", max_workers=2, project_dir=str(tmp_path), stream_stdout=False)
+
+    assert time.monotonic() - started_at < 1.9
@@ -1,3 +1,9 @@
+import asyncio
+import os
+import subprocess
+import sys
+import time
+
 import pytest
 from fixtup import fixtup
 
@@ -17,3 +23,312 @@ def test_process_should_encode_unicode_on_windows_equivalent():
 
         # Acts
         assert "✓" in result.stdout
+
+
+def test_process_should_redirect_stdout_in_a_file(tmp_path):
+    # Arrange
+    python = process.Command(sys.executable)
+    output_path = os.path.join(tmp_path, "output.txt")
+
+    # Acts
+    result = process.run(python, ["-c", "print('hello world')"], stdout=output_path)
+
+    # Assert
+    assert result.return_code == 0
+    assert result.stdout is None
+    with open(output_path, encoding="utf-8") as filep:
+        assert filep.read().strip() == "hello world"
+
+
+def test_process_should_redirect_stderr_in_an_opened_file(tmp_path):
+    # Arrange
+    python = process.Command(sys.executable)
+    output_path = os.path.join(tmp_path, "output.txt")
+
+    # Acts
+    with open(output_path, "wb") as filep:
+        result = process.run(python, ["-c", "import sys; sys.stderr.write('hello world')"], stderr=filep)
+
+    # Assert
+    assert result.stderr is None
+    with open(output_path, encoding="utf-8") as filep:
+        assert filep.read() == "hello world"
+
+
+def test_process_should_read_stdin_from_a_file(tmp_path):
+    # Arrange
+    python = process.Command(sys.executable)
+    input_path = os.path.join(tmp_path, "input.txt")
+    with open(input_path, "w", encoding="utf-8") as filep:
+        filep.write("hello world")
+
+    # Acts
+    result = process.run(python, ["-c", "import sys; print(sys.stdin.read().upper())"], stdin=input_path)
+
+    # Assert
+    assert "HELLO WORLD" in result.stdout
+
+
+def test_process_should_connect_the_stages_of_a_pipeline():
+    # Arrange
+    python = process.Command(sys.executable)
+    producer = process.pipe(python, ["-c", "print('hello world')"])
+    consumer = process.pipe(python, ["-c", "import sys; print(sys.stdin.read().upper())"])
+
+    # Acts
+    result = process.run(producer | consumer, stream_stdout=False)
+
+    # Assert
+    assert result.return_code == 0
+    assert result.return_codes == [0, 0]
+    assert "HELLO WORLD" in result.stdout
+
+
+def test_process_should_return_the_failure_of_a_stage_of_the_pipeline():
+    # Arrange
+    python = process.Command(sys.executable)
+    producer = process.pipe(python, ["-c", "import sys; sys.exit(3)"])
+    consumer = process.pipe(python, ["-c", "import sys; sys.stdin.read()"])
+
+    # Acts
+    result = process.run(producer | consumer)
+
+    # Assert
+    assert result.return_code == 3
+    assert result.return_codes == [3, 0]
+
+
+def test_process_should_feed_stdin_from_an_iterator_of_chunks():
+    # Arrange
+    python = process.Command(sys.executable)
+    chunks = (f"line {i}\n" for i in range(10000))
+
+    # Acts
+    result = process.run(python, ["-c", "import sys; print(len(sys.stdin.readlines()))"], input=chunks, stream_stdout=False)
+
+    # Assert
+    assert result.return_code == 0
+    assert result.stdout.strip() == "10000"
+
+
+def test_process_should_feed_stdin_from_bytes():
+    # Arrange
+    python = process.Command(sys.executable)
+
+    # Acts
+    result = process.run(python, ["-c", "import sys; print(sys.stdin.read().upper())"], input=b"hello world", stream_stdout=False)
+
+    # Assert
+    assert "HELLO WORLD" in result.stdout
+
+
+def test_process_should_stop_feeding_stdin_when_the_process_stops_reading():
+    # Arrange
+    python = process.Command(sys.executable)
+    chunks = (b"x" * 1024 for _ in range(100000))
+
+    # Acts
+    result = process.run(python, ["-c", "import sys; sys.stdin.read(10)"], input=chunks)
+
+    # Assert
+    assert result.return_code == 0
+
+
+def test_process_should_run_with_the_environment_and_working_directory_of_the_call(tmp_path):
+    # Arrange
+    python = process.Command(sys.executable)
+    previous_directory = os.getcwd()
+
+    # Acts
+    result = process.run(python, ["-c", "import os; print(os.getcwd()); print(os.environ['ALFRED_VAR'])"],
+                         env={"ALFRED_VAR": "hello"},
+                         cwd=str(tmp_path),
+                         stream_stdout=False)
+
+    # Assert
+    assert os.path.realpath(str(tmp_path)) in result.stdout
+    assert "hello" in result.stdout
+    assert "ALFRED_VAR" not in os.environ
+    assert os.getcwd() == previous_directory
+
+
+def test_process_run_should_return_the_output_as_the_program_has_written_it():
+    python = process.Command(sys.executable)
+
+    # Acts
+    result = process.run(python, ["-c", "import sys; print('line 1'); print('line 2'); sys.stdout.write('end')"], stream_stdout=False)
+
+    # Assert
+    assert result.stdout == "line 1\nline 2\nend"
+
+
+@pytest.mark.skipif(alfred.os.is_windows(), reason="this test run only on linux or macos environment")
+def test_process_run_batched_should_run_every_item_and_keep_their_order():
+    items = [f"item{i}" for i in range(50)]
+
+    result = process.run_batched("echo", items, chunk_size=7, jobs=4, stream_stdout=False)
+
+    assert result.return_code == 0
+    assert len(result.return_codes) == 8
+    assert result.stdout.split() == items
+
+
+@pytest.mark.skipif(alfred.os.is_windows(), reason="this test run only on linux or macos environment")
+def test_process_run_batched_should_keep_the_output_up_to_max_output():
+    items = [f"item{i:02d}" for i in range(50)]
+
+    result = process.run_batched("echo", items, chunk_size=5, jobs=4, max_output=30, stream_stdout=False)
+
+    assert result.stdout.startswith("item00 item01 item02 item03 it\n... output truncated, ")
+    assert result.stdout.endswith(f" {len(items) * 7 - 30} characters ignored\n")
+
+
+@pytest.mark.skipif(alfred.os.is_windows(), reason="this test run only on linux or macos environment")
+def test_process_run_batched_should_return_the_failure_of_a_batch():
+    result = process.run_batched(f"{sys.executable} -c", ["import sys; sys.exit(3)"], stream_stderr=False)
+
+    assert result.return_code == 3
+
+
+def test_process_start_should_yield_the_lines_of_the_output_while_the_program_runs():
+    python = process.Command(sys.executable)
+    script = "import sys, time\nprint('ready', flush=True)\ntime.sleep(0.2)\nprint('done')"
+
+    # Acts
+    with process.start(python, ["-c", script], stream_stdout=False) as running_process:
+        lines = list(running_process)
+        result = running_process.result(timeout=10)
+
+    # Assert
+    assert lines == ["ready\n", "done\n"]
+    assert result.return_code == 0
+    assert result.stdout == "ready\ndone\n"
+
+
+def test_process_start_should_poll_and_kill_the_program():
+    python = process.Command(sys.executable)
+    running_process = process.start(python, ["-c", "import time; time.sleep(30)"], stream_stdout=False)
+
+    # Acts
+    assert running_process.poll() is None
+    with pytest.raises(subprocess.TimeoutExpired):
+        running_process.wait(timeout=0.1)
+
+    running_process.kill()
+    result = running_process.wait()
+
+    # Assert
+    assert result.return_code != 0
+    assert running_process.poll() == result.return_code
+
+
+@pytest.mark.skipif(alfred.os.is_windows(), reason="this test run only on linux or macos environment")
+def test_process_run_should_kill_the_process_group_when_the_timeout_expires(monkeypatch):
+    monkeypatch.setattr(process, "TIMEOUT_KILL_DELAY", 0.5)
+    python = process.Command(sys.executable)
+    script = "\n".join([
+        "import signal, subprocess, sys, time",
+        "signal.signal(signal.SIGTERM, signal.SIG_IGN)",
+        "child = subprocess.Popen([sys.executable, '-c', 'import time; time.sleep(30)'])",
+        "print(child.pid, flush=True)",
+        "time.sleep(30)",
+    ])
+
+    # Acts
+    started_at = time.monotonic()
+    result = process.run(python, ["-c", script], stream_stdout=False, timeout=1)
+
+    # Assert
+    assert time.monotonic() - started_at < 10
+    assert result.timed_out is True
+    assert result.return_code == process.TIMEOUT_RETURN_CODE
+    time.sleep(0.2)
+    assert _is_running(int(result.stdout.strip())) is False
+
+
+
+@pytest.mark.skipif(alfred.os.is_windows(), reason="this test run only on linux or macos environment")
+def test_process_arun_should_kill_the_process_group_when_the_timeout_expires(monkeypatch):
+    monkeypatch.setattr(process, "TIMEOUT_KILL_DELAY", 0.5)
+    python = process.Command(sys.executable)
+    script = "\n".join([
+        "import signal, subprocess, sys, time",
+        "signal.signal(signal.SIGTERM, signal.SIG_IGN)",
+        "child = subprocess.Popen([sys.executable, '-c', 'import time; time.sleep(30)'])",
+        "print(child.pid, flush=True)",
+        "time.sleep(30)",
+    ])
+
+    # Acts
+    started_at = time.monotonic()
+    result = asyncio.run(process.arun(python, ["-c", script], stream_stdout=False, timeout=1))
+
+    # Assert
+    assert time.monotonic() - started_at < 10
+    assert result.timed_out is True
+    assert result.return_code == process.TIMEOUT_RETURN_CODE
+    time.sleep(0.2)
+    assert _is_running(int(result.stdout.strip())) is False
+
+
+def _is_running(pid: int) -> bool:
+    # an orphan may stay a zombie if the init process of a container does not reap it
+    if os.path.isfile(f"/proc/{pid}/stat"):
+        with open(f"/proc/{pid}/stat", encoding="utf-8") as filep:
+            return filep.read().rsplit(")", 1)[1].split()[0] != "Z"
+
+    try:
+        os.kill(pid, 0)
+        return True
+    except ProcessLookupError:
+        return False
+
+
+@pytest.mark.skipif(alfred.os.is_windows(), reason="this test run only on linux or macos environment")
+def test_process_run_should_measure_the_resources_of_the_program():
+    python = process.Command(sys.executable)
+    script = "data = bytearray(64 * 1024 * 1024)\nsum(i for i in range(2000000))"
+
+    # Acts
+    result = process.run(python, ["-c", script])
+
+    # Assert
+    assert result.wall_time > 0
+    assert result.usage.user_time > 0
+    assert result.usage.max_rss > 64 * 1024 * 1024
+
+
+@pytest.mark.skipif(alfred.os.is_windows(), reason="this test run only on linux or macos environment")
+def test_process_run_should_apply_the_priority_and_the_resource_limits_to_the_program():
+    python = process.Command(sys.executable)
+    script = "import os, resource; print(os.getpriority(os.PRIO_PROCESS, 0), resource.getrlimit(resource.RLIMIT_AS)[0], resource.getrlimit(resource.RLIMIT_CPU)[0])"
+
+    # Acts
+    result = process.run(python, ["-c", script], stream_stdout=False, nice=5, rlimit_as=2 * 1024 ** 3, rlimit_cpu=60)
+
+    # Assert
+    assert result.stdout.split() == [str(max(5, os.getpriority(os.PRIO_PROCESS, 0))), str(2 * 1024 ** 3), "60"]
+
+
+@pytest.mark.skipif(alfred.os.is_windows(), reason="this test run only on linux or macos environment")
+def test_process_run_should_fail_to_allocate_more_memory_than_rlimit_as():
+    python = process.Command(sys.executable)
+
+    # Acts
+    result = process.run(python, ["-c", "data = bytearray(512 * 1024 * 1024)"], stream_stderr=False, rlimit_as=256 * 1024 ** 2)
+
+    # Assert
+    assert result.return_code != 0
+    assert "MemoryError" in result.stderr
+
+
+@pytest.mark.skipif(not hasattr(os, "sched_setaffinity"), reason="cpu_affinity is supported on linux only")
+def test_process_run_should_pin_the_program_on_the_cpus():
+    python = process.Command(sys.executable)
+    cpus = sorted(os.sched_getaffinity(0))[:1]
+
+    # Acts
+    result = process.run(python, ["-c", "import os; print(sorted(os.sched_getaffinity(0)))"], stream_stdout=False, cpu_affinity=cpus)
+
+    # Assert
+    assert result.stdout.strip() == str(cpus)
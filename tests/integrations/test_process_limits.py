@@ -0,0 +1,36 @@
+import os
+
+import fixtup
+import pytest
+
+import alfred.os
+from tests.fixtures import alfred_fixture
+
+
+@pytest.mark.skipif(alfred.os.is_windows(), reason="this test run only on linux or macos environment")
+def test_command_should_apply_its_priority_to_the_programs_it_starts():
+    with fixtup.up("project_with_process_limits"):
+        exit_code, stdout, _ = alfred_fixture.invoke(["low_priority"])
+
+        current_priority = os.getpriority(os.PRIO_PROCESS, 0)
+        assert exit_code == 0
+        assert stdout.splitlines() == [f"nice {max(7, current_priority)}", f"nice {max(12, current_priority)}"]
+
+
+@pytest.mark.skipif(alfred.os.is_windows(), reason="this test run only on linux or macos environment")
+def test_command_should_not_change_the_priority_of_alfred():
+    with fixtup.up("project_with_process_limits"):
+        alfred_fixture.invoke(["low_priority"])
+        _, stdout, _ = alfred_fixture.invoke(["alfred_priority"])
+
+        assert stdout.strip() == f"nice {os.getpriority(os.PRIO_PROCESS, 0)}"
+
+
+@pytest.mark.skipif(alfred.os.is_windows(), reason="this test run only on linux or macos environment")
+def test_subcommand_should_apply_its_priority_to_the_programs_it_starts():
+    with fixtup.up("project_with_process_limits"):
+        exit_code, stdout, _ = alfred_fixture.invoke(["pipeline"])
+
+        current_priority = os.getpriority(os.PRIO_PROCESS, 0)
+        assert exit_code == 0
+        assert f"nice {max(7, current_priority)}" in stdout.splitlines()
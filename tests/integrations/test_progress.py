@@ -0,0 +1,44 @@
+import os
+
+import fixtup
+
+from alfred import progress, state
+from tests.fixtures import alfred_fixture
+
+
+def test_pipeline_should_record_the_durations_of_its_steps():
+    with fixtup.up("project_with_pipeline"):
+        exit_code, _, _ = alfred_fixture.invoke(["ci"])
+
+        assert exit_code == 0
+        store = state.read_json(os.getcwd(), progress.DURATIONS_ENTRY)
+        assert store['pipelines']['ci'] == ['lint', 'tests']
+        assert len(store['commands']['lint']) == 1
+        assert 'format' not in store['commands']
+
+
+def test_pipeline_should_display_its_progress_once_it_has_been_recorded():
+    with fixtup.up("project_with_pipeline"):
+        _, stdout, _ = alfred_fixture.invoke(["ci"])
+        assert "[1/2" not in stdout
+
+        exit_code, stdout, _ = alfred_fixture.invoke(["ci"])
+
+        assert exit_code == 0
+        assert "$ alfred lint : lint the code [1/2, 0s left]" in stdout
+        assert "$ alfred tests : run the tests [2/2, 0s left]" in stdout
+        assert "$ alfred format : format the code\n" in stdout
+
+
+def test_pipeline_should_record_the_commands_invoked_together_as_one_step():
+    with fixtup.up("project_with_pipeline"):
+        alfred_fixture.invoke(["ci_parallel"])
+
+        exit_code, stdout, _ = alfred_fixture.invoke(["ci_parallel"])
+
+        assert exit_code == 0
+        store = state.read_json(os.getcwd(), progress.DURATIONS_ENTRY)
+        assert store['pipelines']['ci_parallel'] == ['lint + tests']
+        # the jobs run in their own alfred process, the time left depends on the speed of the machine
+        assert "$ alfred lint : lint the code [1/1, " in stdout
+        assert "$ alfred tests : run the tests [1/1, " in stdout
@@ -0,0 +1,99 @@
+import os
+import stat
+from unittest import mock
+
+import pytest
+from click import BaseCommand
+
+import alfred
+from alfred import ctx, manifest, process, shims
+from alfred.domain.command import AlfredCommand
+
+
+@pytest.mark.skipif(alfred.is_windows(), reason="pyenv and asdf shims exist only on linux or macos environment")
+def test_process_should_start_the_program_targeted_by_a_pyenv_shim(tmp_path):
+    pyenv_root = os.path.join(tmp_path, "pyenv")
+    shim = _script(os.path.join(pyenv_root, "shims", "tool"), "echo shim")
+    tool = _script(os.path.join(pyenv_root, "versions", "1.0", "bin", "tool"), "echo tool")
+    calls = os.path.join(tmp_path, "calls.txt")
+    _script(os.path.join(pyenv_root, "bin", "pyenv"), f"echo $@ >> {calls}\necho {tool}")
+    shims.cache_clear()
+
+    with ctx.use_new_context():
+        first = process.run(process.Command(shim), stream_stdout=False, env={"PYENV_ROOT": pyenv_root}, cwd=str(tmp_path))
+        second = process.run(process.Command(shim), stream_stdout=False, env={"PYENV_ROOT": pyenv_root}, cwd=str(tmp_path))
+
+    assert first.stdout == "tool\n"
+    assert second.stdout == "tool\n"
+    with open(calls, encoding="utf-8") as filep:
+        assert filep.read() == "which tool\n"
+
+
+@pytest.mark.skipif(alfred.is_windows(), reason="pyenv and asdf shims exist only on linux or macos environment")
+def test_process_should_resolve_the_shim_again_when_a_version_file_changes(tmp_path):
+    pyenv_root = os.path.join(tmp_path, "pyenv")
+    shim = _script(os.path.join(pyenv_root, "shims", "tool"), "echo shim")
+    _script(os.path.join(pyenv_root, "versions", "1.0", "bin", "tool"), "echo tool 1.0")
+    _script(os.path.join(pyenv_root, "versions", "2.0.1", "bin", "tool"), "echo tool 2.0.1")
+    _script(os.path.join(pyenv_root, "bin", "pyenv"), f"echo {pyenv_root}/versions/$(cat .python-version)/bin/tool")
+    shims.cache_clear()
+
+    with ctx.use_new_context():
+        with open(os.path.join(tmp_path, ".python-version"), "w", encoding="utf-8") as filep:
+            filep.write("1.0")
+        first = process.run(process.Command(shim), stream_stdout=False, env={"PYENV_ROOT": pyenv_root}, cwd=str(tmp_path))
+        with open(os.path.join(tmp_path, ".python-version"), "w", encoding="utf-8") as filep:
+            filep.write("2.0.1")
+        second = process.run(process.Command(shim), stream_stdout=False, env={"PYENV_ROOT": pyenv_root}, cwd=str(tmp_path))
+
+    assert first.stdout == "tool 1.0\n"
+    assert second.stdout == "tool 2.0.1\n"
+
+
+@pytest.mark.skipif(alfred.is_windows(), reason="pyenv and asdf shims exist only on linux or macos environment")
+def test_process_should_start_the_shim_when_the_bypass_is_disabled(tmp_path):
+    pyenv_root = os.path.join(tmp_path, "pyenv")
+    shim = _script(os.path.join(pyenv_root, "shims", "tool"), "echo shim")
+    tool = _script(os.path.join(pyenv_root, "versions", "1.0", "bin", "tool"), "echo tool")
+    _script(os.path.join(pyenv_root, "bin", "pyenv"), f"echo {tool}")
+    with open(os.path.join(tmp_path, ".alfred.toml"), "w", encoding="utf-8") as filep:
+        filep.write("[alfred]\n\n[alfred.project]\nshims_bypass = false\n")
+    shims.cache_clear()
+
+    with ctx.use_new_context():
+        alfred_command = AlfredCommand(BaseCommand("tool"))
+        alfred_command.project_dir = str(tmp_path)
+        ctx.stack_root_command(alfred_command)
+        result = process.run(process.Command(shim), stream_stdout=False, env={"PYENV_ROOT": pyenv_root}, cwd=str(tmp_path))
+
+    assert result.stdout == "shim\n"
+
+
+@pytest.mark.skipif(alfred.is_windows(), reason="pyenv and asdf shims exist only on linux or macos environment")
+def test_process_should_read_the_shims_bypass_setting_once_per_project(tmp_path):
+    pyenv_root = os.path.join(tmp_path, "pyenv")
+    shim = _script(os.path.join(pyenv_root, "shims", "tool"), "echo shim")
+    tool = _script(os.path.join(pyenv_root, "versions", "1.0", "bin", "tool"), "echo tool")
+    _script(os.path.join(pyenv_root, "bin", "pyenv"), f"echo {tool}")
+    with open(os.path.join(tmp_path, ".alfred.toml"), "w", encoding="utf-8") as filep:
+        filep.write("[alfred]\n\n[alfred.project]\n")
+    shims.cache_clear()
+
+    with ctx.use_new_context():
+        alfred_command = AlfredCommand(BaseCommand("tool"))
+        alfred_command.project_dir = str(tmp_path)
+        ctx.stack_root_command(alfred_command)
+        first = process.run(process.Command(shim), stream_stdout=False, env={"PYENV_ROOT": pyenv_root}, cwd=str(tmp_path))
+        with mock.patch.object(manifest, "lookup_parameter_project", side_effect=AssertionError("manifest read again")):
+            second = process.run(process.Command(shim), stream_stdout=False, env={"PYENV_ROOT": pyenv_root}, cwd=str(tmp_path))
+
+    assert first.stdout == "tool\n"
+    assert second.stdout == "tool\n"
+
+
+def _script(path: str, content: str) -> str:
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "w", encoding="utf-8") as filep:
+        filep.write(f"#!/bin/sh\n{content}\n")
+    os.chmod(path, os.stat(path).st_mode | stat.S_IEXEC)
+    return path
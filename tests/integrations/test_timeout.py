@@ -0,0 +1,29 @@
+import fixtup
+
+from tests.fixtures import alfred_fixture
+
+
+def test_command_should_stop_its_program_when_its_timeout_expires():
+    with fixtup.up("project_with_timeout"):
+        exit_code, stdout, stderr = alfred_fixture.invoke(["hang"])
+
+        assert exit_code == 124
+        assert "started" in stdout
+        assert "timeout expired" in stderr
+
+
+def test_command_should_run_normally_when_it_ends_before_its_timeout():
+    with fixtup.up("project_with_timeout"):
+        exit_code, stdout, _ = alfred_fixture.invoke(["quick"])
+
+        assert exit_code == 0
+        assert "done" in stdout
+
+
+def test_subcommand_should_stop_its_program_when_its_timeout_expires():
+    with fixtup.up("project_with_timeout"):
+        exit_code, stdout, stderr = alfred_fixture.invoke(["pipeline"])
+
+        assert exit_code == 124
+        assert "started" in stdout
+        assert "timeout expired" in stderr
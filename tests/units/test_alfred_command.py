@@ -50,3 +50,31 @@ def test_format_cli_arguments_convert_command_to_shell_command_with_options_and_
 
     # Assert
     assert cmdline == ["hello", "--name", "fabien"]
+
+
+def test_format_cli_arguments_should_ignore_flag_disabled():
+    # Assign
+    @alfred.command("hello")
+    @alfred.option("--verbose", is_flag=True)
+    def cmd():
+        pass
+
+    # Acts
+    cmdline = alfred_command.format_cli_arguments(cmd, {"verbose": False})
+
+    # Assert
+    assert cmdline == ["hello"]
+
+
+def test_format_cli_arguments_should_keep_a_value_with_spaces_in_one_argument():
+    # Assign
+    @alfred.command("tests")
+    @alfred.option("--marker")
+    def cmd():
+        pass
+
+    # Acts
+    cmdline = alfred_command.format_cli_arguments(cmd, {"marker": "not slow"})
+
+    # Assert
+    assert cmdline == ["tests", "--marker", "not slow"]
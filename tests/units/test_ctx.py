@@ -1,3 +1,7 @@
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
 from click import BaseCommand
 
 from alfred import ctx
@@ -35,3 +39,35 @@ def test_root_command_should_return_root_command():
 
         # Acts & Asserts
         assert ctx.root_command() == alfred_command
+
+
+def test_use_env_overlay_should_not_modify_os_environ():
+    with ctx.use_new_context():
+        with ctx.use_env_overlay(ALFRED_OVERLAY="1"):
+            # Acts & Asserts
+            assert ctx.env_overlay() == {"ALFRED_OVERLAY": "1"}
+            assert "ALFRED_OVERLAY" not in os.environ
+
+        assert ctx.env_overlay() == {}
+
+
+def test_stack_subcommand_should_isolate_the_commands_stack_of_each_thread():
+    with ctx.use_new_context():
+        root_command = AlfredCommand(BaseCommand("root"))
+        ctx.stack_root_command(root_command)
+        barrier = threading.Barrier(2)
+
+        def task(name: str):
+            command = AlfredCommand(BaseCommand(name))
+            with ctx.stack_subcommand(command):
+                barrier.wait()
+                return ctx.current_command().name, ctx.root_command().name
+
+        # Acts
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            futures = [executor.submit(ctx.bind(task), name) for name in ["lint", "tests"]]
+            results = [future.result() for future in futures]
+
+        # Asserts
+        assert results == [("lint", "root"), ("tests", "root")]
+        assert ctx.current_command() == root_command
@@ -0,0 +1,18 @@
+import pytest
+
+from alfred import jobserver
+
+
+@pytest.mark.parametrize('flags,auth', [
+    ("", None),
+    ("k", None),
+    (" -j8 --jobserver-auth=3,4", "3,4"),
+    ("k -j --jobserver-fds=5,6 -j", "5,6"),
+    ("-j4 --jobserver-auth=fifo:/tmp/GMfifo1234", "fifo:/tmp/GMfifo1234"),
+])
+def test_parent_auth_should_read_the_jobserver_of_make(flags: str, auth: str):
+    assert jobserver.parent_auth(flags) == auth
+
+
+def test_makeflags_should_replace_the_jobserver_and_keep_the_other_flags():
+    assert jobserver.makeflags("k -j2 --jobserver-auth=7,8", 8, 3, 4) == "k -j8 --jobserver-auth=3,4"
@@ -0,0 +1,74 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from alfred import output
+
+
+def test_grouped_router_should_display_the_output_of_a_job_in_one_piece(capsys):
+    with output.OutputRouter("grouped") as router:
+        lint = router.job("lint", "$ alfred lint")
+        tests = router.job("tests", "$ alfred tests")
+        lint.stdout.write("lint 1\n")
+        tests.stdout.write("tests 1\n")
+        lint.stdout.write("lint 2\n")
+        tests.end()
+        lint.end()
+
+    assert capsys.readouterr().out == "$ alfred tests\ntests 1\n$ alfred lint\nlint 1\nlint 2\n"
+
+
+def test_prefixed_router_should_prefix_each_line_with_the_name_of_its_job(capsys):
+    with output.OutputRouter("prefixed") as router:
+        lint = router.job("lint")
+        lint.stdout.write("lint ")
+        lint.stdout.write("1\nlint 2")
+        lint.stderr.write("warning\n")
+        lint.end()
+
+    captured = capsys.readouterr()
+    assert captured.out == "[lint] $ lint\n[lint] lint 1\n[lint] lint 2\n"
+    assert captured.err == "[lint] warning\n"
+
+
+def test_router_should_display_the_captured_output_of_a_job_that_has_not_streamed_it(capsys):
+    with output.OutputRouter("prefixed") as router:
+        lint = router.job("lint")
+        lint.end("lint 1\n", "warning\n")
+
+    captured = capsys.readouterr()
+    assert "[lint] lint 1\n" in captured.out
+    assert captured.err == "[lint] warning\n"
+
+
+def test_router_should_not_display_a_cancelled_job(capsys):
+    with output.OutputRouter("grouped") as router:
+        lint = router.job("lint")
+        lint.stdout.write("lint 1\n")
+        lint.end(display=False)
+
+    assert capsys.readouterr().out == ""
+
+
+def test_dashboard_router_should_fall_back_on_grouped_outside_of_a_terminal():
+    with output.OutputRouter("dashboard") as router:
+        assert router.mode == "grouped"
+
+
+def test_record_should_only_record_the_output_of_its_context(capsys):
+    barrier = threading.Barrier(2)
+
+    def job(name: str) -> str:
+        with output.record() as (stdout, _):
+            barrier.wait()
+            output.stdout_stream().write(f"{name}\n")
+            barrier.wait()
+
+        return stdout.getvalue()
+
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        lint = executor.submit(job, "lint")
+        tests = executor.submit(job, "tests")
+
+    assert lint.result() == "lint\n"
+    assert tests.result() == "tests\n"
+    assert sorted(capsys.readouterr().out.splitlines()) == ["lint", "tests"]
@@ -0,0 +1,24 @@
+import pytest
+from click import ClickException
+
+from alfred import pool
+
+
+def test_parse_size_should_convert_a_binary_unit_in_bytes():
+    assert pool.parse_size("12G") == 12 * 1024 ** 3
+    assert pool.parse_size("512m") == 512 * 1024 ** 2
+    assert pool.parse_size("1.5GiB") == int(1.5 * 1024 ** 3)
+    assert pool.parse_size(4096) == 4096
+
+
+def test_parse_size_should_reject_an_invalid_size():
+    with pytest.raises(ClickException):
+        pool.parse_size("twelve gigabytes")
+
+
+def test_predicted_rss_should_use_the_highest_recorded_peak():
+    history = {"pytest": [100, 300, 200]}
+
+    assert pool.predicted_rss(history, "pytest", budget=1000, max_workers=4) == 300
+    assert pool.predicted_rss(history, "mypy", budget=1000, max_workers=4) == 250
+    assert pool.predicted_rss(history, "mypy", budget=None, max_workers=4) == 0
@@ -1,5 +1,6 @@
 from typing import Tuple, List
 
+import click
 import pytest
 
 from alfred import process
@@ -25,3 +26,45 @@ def test_parse_text_command_should_handle_litteral_string():
 
     # Acts & Assert
     assert process.parse_text_command(cmd) == expected_result
+
+
+def test_parse_text_pipeline_should_split_stages():
+    # Acts & Assert
+    assert process.parse_text_pipeline("git log --oneline | grep 'fix bug'") == [
+        ('git', ['log', '--oneline']),
+        ('grep', ['fix bug']),
+    ]
+
+
+def test_parse_text_pipeline_should_refuse_empty_stage():
+    # Acts & Assert
+    with pytest.raises(click.ClickException):
+        process.parse_text_pipeline("git log |")
+
+
+def test_pipe_should_chain_commands_with_pipe_operator():
+    # Arrange
+    git = process.Command("git")
+    grep = process.Command("grep")
+
+    # Acts
+    pipeline = process.pipe(git, ["log"]) | process.pipe(grep, ["fix"]) | grep
+
+    # Assert
+    assert pipeline.stages == [(git, ["log"]), (grep, ["fix"]), (grep, [])]
+
+
+def test_batches_should_split_the_items_under_the_max_arglen():
+    items = [f"file{i:03d}.py" for i in range(100)]
+
+    chunks = process.batches(items, ["pylint"], chunk_size=None, max_arglen=300)
+
+    assert [item for chunk in chunks for item in chunk] == items
+    for chunk in chunks:
+        assert sum(len(arg) + 9 for arg in ["pylint"] + chunk) <= 300
+
+
+def test_batches_should_respect_the_chunk_size():
+    chunks = process.batches([str(i) for i in range(10)], ["echo"], chunk_size=4, max_arglen=10000)
+
+    assert [len(chunk) for chunk in chunks] == [4, 4, 2]
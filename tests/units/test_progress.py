@@ -0,0 +1,39 @@
+from alfred import progress
+
+
+def test_format_duration_should_display_minutes_and_hours():
+    assert progress.format_duration(42.4) == "42s"
+    assert progress.format_duration(392) == "6m32s"
+    assert progress.format_duration(3725) == "1h02m"
+
+
+def test_time_left_should_sum_the_medians_of_the_remaining_steps():
+    pipeline = progress.PipelineProgress(root="ci",
+                                         project_dir=".",
+                                         durations={"lint": [10, 30, 20], "tests": [60, 120]},
+                                         expected_steps=["lint", "tests"],
+                                         done_steps=["lint"])
+
+    assert pipeline.time_left() == 90
+    assert pipeline.label() == "[2/2, 1m30s left]"
+
+
+def test_time_left_should_be_unknown_when_a_step_has_never_been_recorded():
+    pipeline = progress.PipelineProgress(root="ci",
+                                         project_dir=".",
+                                         durations={"lint": [10]},
+                                         expected_steps=["lint", "tests"])
+
+    assert pipeline.time_left() is None
+    assert pipeline.label() == "[1/2]"
+
+
+def test_time_left_should_match_the_remaining_steps_by_name():
+    pipeline = progress.PipelineProgress(root="ci",
+                                         project_dir=".",
+                                         durations={"lint": [10], "tests": [60]},
+                                         expected_steps=["lint", "tests"],
+                                         done_steps=["tests"])
+
+    assert pipeline.remaining_steps() == ["lint"]
+    assert pipeline.time_left() == 10